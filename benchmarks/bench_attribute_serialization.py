@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Sets many style properties and attributes on many widgets between two update
+cycles (the root repr done by App.do_gui_update), with the attributes serialized
+when represented and, as before, at every change.
+
+    python benchmarks/bench_attribute_serialization.py [widgets] [properties]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def eager_need_update(self, emitter=None, child_ignore_update=False):
+    lazy_need_update(self, emitter, child_ignore_update)
+    if not emitter is None:
+        # the serialization is done at every change
+        self._repr_attributes
+
+lazy_need_update = gui.Tag._need_update
+
+
+def measure(widgets, properties):
+    labels = [gui.Label('label %s' % i) for i in range(widgets)]
+    root = gui.VBox(children=labels)
+    root.repr({})
+    t = time.time()
+    for i, label in enumerate(labels):
+        for p in range(properties):
+            label.style['margin-%s' % p] = '%spx' % i
+        label.attributes['title'] = 'label %s' % i
+    changed = time.time() - t
+    t = time.time()
+    root.repr({})
+    return changed, time.time() - t
+
+
+def main():
+    widgets = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    properties = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    print('%d widgets, %d style properties and one attribute set on each' % (widgets, properties))
+    print('%-6s %12s %12s %12s' % ('mode', 'changes', 'update', 'total'))
+    for mode in ('eager', 'lazy'):
+        gui.Tag._need_update = eager_need_update if mode == 'eager' else lazy_need_update
+        changed, update = measure(widgets, properties)
+        print('%-6s %10.1f ms %10.1f ms %10.1f ms' % (mode, changed * 1000, update * 1000, (changed + update) * 1000))
+    gui.Tag._need_update = lazy_need_update
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Compares parse_parametrs with the former implementation, that split the
+remaining string at each field, for callbacks carrying values of different
+sizes (e.g. a base64 encoded canvas frame).
+
+    python benchmarks/bench_callback_parameters.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.server as server
+
+
+def legacy_parse(p):
+    """parse_parametrs as it was before the single pass scan"""
+    ret = {}
+    while len(p) > 1 and p.count('|') > 0:
+        s = p.split('|')
+        l = int(s[0])  # length of param field
+        if l > 0:
+            p = p[len(s[0]) + 1:]
+            field_name = p.split('|')[0].split('=')[0]
+            field_value = p[len(field_name) + 1:l]
+            p = p[l + 1:]
+            ret[field_name] = field_value
+    return ret
+
+
+def main():
+    cases = (
+        ('click x,y', {'x': '120', 'y': '34'}),
+        ('100 fields', dict(('field%s' % i, 'value|%s' % i) for i in range(100))),
+        ('1 MB', {'image': 'data:image/png;base64,' + 'A' * 1024 * 1024}),
+        ('8 MB', {'image': 'data:image/png;base64,' + 'A' * 8 * 1024 * 1024, 'width': '1920', 'height': '1080'}),
+        ('2 MB |', {'text': '|' * 2 * 1024 * 1024, 'pos': '10'}),
+    )
+    for label, params in cases:
+        message = server.encode_parameters(params)
+        number = max(1, 2000000 // len(message))
+        legacy = min(timeit.repeat(lambda: legacy_parse(message), number=number, repeat=3)) / number
+        current = min(timeit.repeat(lambda: server.parse_parametrs(message), number=number, repeat=3)) / number
+        print('%-10s  legacy %12.1f us   current %10.1f us   speedup x%.1f' % (
+            label, legacy * 1e6, current * 1e6, legacy / current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Appends rows to a ListView and to a Table, one update cycle per row as a live
+log does, and reports the time and the bytes sent. The rows are inserted by key
+and the container representation is spliced; the "full" mode replaces the
+entire container at each cycle, as before the keyed operations.
+
+    python benchmarks/bench_container_append.py [rows] [full mode rows]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+import remi.server as server
+
+
+def cycle_bytes(root):
+    """bytes of the messages of one update cycle, with the native protocol"""
+    changed_widgets = {}
+    root.repr(changed_widgets)
+    patches = [op for c in changed_widgets.values() if isinstance(c, list) for op in c]
+    updates = [(w.identifier, c) for w, c in changed_widgets.items() if not isinstance(c, list)]
+    size = 0
+    if patches:
+        size += len(server.encode_text(server.encode_patch_message(patches, server._PROTOCOL_NATIVE)))
+    if updates:
+        size += len(server.encode_text(server.encode_update_message(updates, server._PROTOCOL_NATIVE)))
+    return size
+
+
+def append_rows(container, append, rows):
+    root = gui.VBox(children=[gui.Label('header'), container])
+    root.repr({})
+    sent = 0
+    t = time.time()
+    for i in range(rows):
+        append(i)
+        sent += cycle_bytes(root)
+    return time.time() - t, sent
+
+
+def listview(rows):
+    view = gui.ListView(width=300)
+    return append_rows(view, lambda i: view.append('entry %s' % i), rows)
+
+
+def table(rows):
+    view = gui.Table(width=300)
+    return append_rows(view, lambda i: view.append(gui.TableRow(['%s' % i, 'value %s' % i])), rows)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    full_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    patch, splice = gui.Tag._patch, gui.Tag._splice_repr
+    print('%-9s %-6s %6s %10s %14s %12s' % ('widget', 'mode', 'rows', 'time', 'bytes sent', 'bytes/row'))
+    for name, function in (('ListView', listview), ('Table', table)):
+        for mode, count in (('full', full_rows), ('keyed', rows)):
+            if mode == 'full':
+                gui.Tag._patch = lambda self, inner_html, local_changed_widgets, children_changes: None
+                gui.Tag._splice_repr = lambda self, local_changed_widgets, dirty_children, children_changes: None
+            else:
+                gui.Tag._patch, gui.Tag._splice_repr = patch, splice
+            elapsed, sent = function(count)
+            print('%-9s %-6s %6s %8.2f s %14s %12.0f' % (name, mode, count, elapsed, sent, float(sent) / count))
+    gui.Tag._patch, gui.Tag._splice_repr = patch, splice
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Times Container.empty() and the removal of single children from a container
+of N children, with the indexed render list and with the previous algorithm
+(render order in a plain list, children found scanning all of them).
+
+    python benchmarks/bench_container_empty.py [children] [legacy children]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def legacy_remove_child(self, child):
+    if child in self.children.values() and hasattr(child, 'identifier'):
+        for k in self.children.keys():
+            if hasattr(self.children[k], 'identifier'):
+                if self.children[k].identifier == child.identifier:
+                    if k in self._render_children_list:
+                        self._render_children_list.remove(k)
+                    self.children.pop(k)
+                    break
+
+
+def build(count, legacy):
+    container = gui.VBox()
+    if legacy:
+        container._render_children_list = []
+    container.append([gui.Label('label %s' % i) for i in range(count)])
+    container.repr({})
+    return container
+
+
+def measure(count, legacy):
+    container = build(count, legacy)
+    children = list(container.children.values())
+    t = time.time()
+    for child in children[count // 4:count // 4 + 100]:
+        container.remove_child(child)
+    remove = (time.time() - t) / 100
+    t = time.time()
+    container.empty()
+    return remove, time.time() - t
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    legacy_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    remove_child = gui.Tag.remove_child
+    print('%-8s %9s %16s %12s' % ('mode', 'children', 'remove_child', 'empty()'))
+    for mode, n in (('legacy', legacy_count), ('indexed', count)):
+        gui.Tag.remove_child = legacy_remove_child if mode == 'legacy' else remove_child
+        remove, empty = measure(n, mode == 'legacy')
+        print('%-8s %9s %13.1f us %10.3f s' % (mode, n, remove * 1e6, empty))
+    gui.Tag.remove_child = remove_child
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Builds a DataTable of N rows and 10 columns (list, array and, if installed,
+numpy columns) and times the sort and filter operations, the first time and
+with the cached permutation and index, and the bytes of a page change.
+A TableWidget is built for comparison with fewer rows, as it creates a widget
+per cell.
+
+    python benchmarks/bench_data_table.py [rows] [TableWidget rows]
+"""
+import gc
+import os
+import sys
+import time
+import array
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+import remi.server as server
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def update_bytes(root):
+    changed_widgets = {}
+    root.repr(changed_widgets)
+    patches = [op for c in changed_widgets.values() if isinstance(c, list) for op in c]
+    updates = [(w.identifier, c) for w, c in changed_widgets.items() if not isinstance(c, list)]
+    size = 0
+    if patches:
+        size += len(server.encode_text(server.encode_patch_message(patches, server._PROTOCOL_NATIVE)))
+    if updates:
+        size += len(server.encode_text(server.encode_update_message(updates, server._PROTOCOL_NATIVE)))
+    return size
+
+
+def columns(rows):
+    result = [list(range(rows)),
+              ['customer %s' % (i * 7919 % rows) for i in range(rows)],
+              array.array('d', (i * 0.37 % 1000 for i in range(rows)))]
+    if numpy is not None:
+        result.append(numpy.arange(rows, dtype='int64')[::-1].copy())
+    while len(result) < 10:
+        result.append(['c%s r%s' % (len(result), i) for i in range(rows)])
+    return result
+
+
+def timed(function, *args):
+    t = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - t) * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    widget_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    data = columns(rows)
+    titles = ['column %s' % i for i in range(10)]
+
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    table = gui.DataTable(data, titles=titles, page_size=50)
+    root = gui.VBox(children=[table])
+    page = len(root.repr())
+    elapsed = time.perf_counter() - t
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('DataTable %d x 10%s: %.2f s, %.1f MB of widgets, page %.1f KB' % (
+        rows, ' (numpy column)' if numpy is not None else '', elapsed, memory / 1e6, page / 1e3))
+    table.next_page()
+    print('  page change          %8s B' % update_bytes(root))
+    for column in (1, 2, 3):
+        print('  sort column %s         %8.1f ms, cached %6.1f ms' % (
+            column, timed(table.sort_by, column), timed(table.sort_by, column, True)))
+    table.sort_by(None)
+    print('  filter               %8.1f ms, cached %6.1f ms' % (
+        timed(table.set_filter, 'customer 12'), timed(table.set_filter, 'customer 12')))
+    print('  filter other text    %8.1f ms' % timed(table.set_filter, 'r4'))
+    print('  filter and sort      %8.1f ms' % timed(table.sort_by, 1))
+
+    del table, root
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    table = gui.TableWidget(widget_rows, 10)
+    page = len(table.repr())
+    elapsed = time.perf_counter() - t
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('TableWidget %d x 10: %.2f s, %.1f MB of widgets, page %.1f KB' % (widget_rows, elapsed, memory / 1e6, page / 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Measures the cost of an update cycle (root.repr) for trees of growing size,
+with a given number of changed labels. With the dirty subtree tracking only
+the paths to the changed widgets are visited, the former implementation
+walked the whole tree at each cycle.
+
+    python benchmarks/bench_dirty_subtree.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def legacy_repr(tag, changed_widgets):
+    """Tag.repr as it was before the dirty subtree tracking"""
+    local_changed_widgets = {}
+    _innerHTML = ''
+    for k in tag._render_children_list:
+        s = tag.children[k]
+        _innerHTML = _innerHTML + (legacy_repr(s, local_changed_widgets) if isinstance(s, gui.Tag) else s)
+    if tag._ischanged() or (len(local_changed_widgets) > 0):
+        tag._backup_repr = ''.join(('<', tag.type, ' ', tag._repr_attributes, '>', _innerHTML, '</', tag.type, '>'))
+    if tag._ischanged():
+        changed_widgets[tag] = tag._backup_repr
+        tag._set_updated()
+    else:
+        changed_widgets.update(local_changed_widgets)
+    return tag._backup_repr
+
+
+def build_tree(size, fanout=20):
+    """Nested VBoxes, fanout labels for each leaf container"""
+    labels = []
+    containers = []
+    while len(labels) < size:
+        box = gui.VBox()
+        for i in range(fanout):
+            label = gui.Label('label %s' % len(labels))
+            labels.append(label)
+            box.append(label)
+        containers.append(box)
+    while len(containers) > 1:
+        parents = []
+        for i in range(0, len(containers), fanout):
+            box = gui.VBox()
+            box.append(containers[i:i + fanout])
+            parents.append(box)
+        containers = parents
+    return containers[0], labels
+
+
+def measure(render, root, labels, changes, cycles=20):
+    rnd = random.Random(0)
+    elapsed = 0
+    for cycle in range(cycles):
+        for label in rnd.sample(labels, changes):
+            label.set_text('cycle %s' % cycle)
+        t = time.perf_counter()
+        render(root, {})
+        elapsed += time.perf_counter() - t
+    return elapsed / cycles
+
+
+def main():
+    print('%8s %8s   %12s %12s' % ('widgets', 'changed', 'legacy', 'dirty'))
+    for size in (1000, 5000, 20000):
+        root, labels = build_tree(size)
+        root.repr({})
+        for changes in (0, 1, 10, 100):
+            legacy = measure(legacy_repr, root, labels, changes)
+            current = measure(lambda tag, changed: tag.repr(changed), root, labels, changes)
+            print('%8s %8s   %9.3f ms %9.3f ms' % (len(labels), changes, legacy * 1000, current * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Compares the bytes sent for typical live updates when the changed widgets are
+patched (attribute, style and text operations) and when they are replaced
+entirely by their html, as before the patch protocol.
+
+    python benchmarks/bench_dom_patch.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+import remi.server as server
+
+
+def build():
+    leds = [gui.Widget(width=20, height=20, style={'background-color': 'gray', 'border-radius': '10px'}) for i in range(8)]
+    gauge = gui.Svg(width=200, height=200)
+    gauge.append(gui.SvgCircle(100, 100, 90))
+    for i in range(20):
+        gauge.append(gui.SvgLine(100, 10, 100, 20))
+    needle = gui.SvgLine(100, 100, 100, 20)
+    gauge.append(needle)
+    value = gui.Label('0.0')
+    log = gui.ListView(width=300)
+    for i in range(200):
+        log.append('entry %s' % i)
+    root = gui.VBox(children=[gui.HBox(children=leds), gauge, value, log])
+    return root, leds, needle, value, log
+
+
+def update_cost(root, change):
+    """bytes of the messages of one update cycle, with the native protocol"""
+    change()
+    changed_widgets = {}
+    root.repr(changed_widgets)
+    patches = [op for c in changed_widgets.values() if isinstance(c, list) for op in c]
+    updates = [(w.identifier, c) for w, c in changed_widgets.items() if not isinstance(c, list)]
+    size = 0
+    if patches:
+        size += len(server.encode_text(server.encode_patch_message(patches, server._PROTOCOL_NATIVE)))
+    if updates:
+        size += len(server.encode_text(server.encode_update_message(updates, server._PROTOCOL_NATIVE)))
+    return size
+
+
+def scenarios(leds, needle, value, log):
+    state = {'i': 0}
+
+    def blink():
+        state['i'] += 1
+        leds[0].style['background-color'] = 'green' if state['i'] % 2 else 'gray'
+
+    def gauge():
+        state['i'] += 1
+        needle.attributes['transform'] = 'rotate(%s 100 100)' % (state['i'] % 270)
+
+    def text():
+        state['i'] += 1
+        value.set_text('%.1f' % (state['i'] * 0.1))
+
+    def append():
+        state['i'] += 1
+        log.append('entry %s' % state['i'])
+
+    return (('blinking led', blink), ('gauge needle', gauge), ('label text', text), ('log append', append))
+
+
+def main():
+    patch = gui.Tag._patch
+    print('%-14s %10s %10s' % ('update', 'html', 'patch'))
+    results = {}
+    for mode in ('html', 'patch'):
+        if mode == 'html':
+            gui.Tag._patch = lambda self, inner_html, local_changed_widgets, children_changes: None
+        else:
+            gui.Tag._patch = patch
+        root, leds, needle, value, log = build()
+        root.repr({})
+        for name, change in scenarios(leds, needle, value, log):
+            update_cost(root, change)
+            results.setdefault(name, {})[mode] = update_cost(root, change)
+    gui.Tag._patch = patch
+    for name in ('blinking led', 'gauge needle', 'label text', 'log append'):
+        print('%-14s %8s B %8s B' % (name, results[name]['html'], results[name]['patch']))
+
+
+if __name__ == '__main__':
+    main()
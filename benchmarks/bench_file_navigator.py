@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Creates a directory of N files and M folders, then times FileFolderNavigator.chdir
+to it, the first time and once the listing is cached, and reports the size
+of the represented page.
+
+    python benchmarks/bench_file_navigator.py [files] [folders]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    folders = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    root = tempfile.mkdtemp()
+    try:
+        directory = os.path.join(root, 'big')
+        os.mkdir(directory)
+        for i in range(folders):
+            os.mkdir(os.path.join(directory, 'Folder %s' % i))
+        for i in range(files):
+            open(os.path.join(directory, 'file %s.txt' % (i * 7919 % files)), 'w').close()
+
+        navigator = gui.FileFolderNavigator(selection_folder=root)
+        # the directory is listed within the call, however long it takes
+        navigator.LISTING_TIMEOUT = None
+        for label in ('first chdir', 'cached chdir'):
+            t = time.perf_counter()
+            navigator.chdir(directory)
+            size = len(navigator.repr())
+            print('%s (%s files, %s folders): %.2f s, %s items shown, page %.1f KB' % (
+                label, files, folders, time.perf_counter() - t, len(navigator.folderItems), size / 1e3))
+            navigator.chdir(root)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
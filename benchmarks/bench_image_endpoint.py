@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+V viewers of an image updated F times per second for D seconds, each viewer requesting
+the get_image_data endpoint after every update and revalidating its copy, in two ways:
+    encode:  the previous get_image_data, encoding the image at every request under the update_lock
+    cache:   ImageEncodeCache, an encoding per version in the thread pool, 304 to the revalidations
+Reports the encodings done, the bytes sent and the request latency. OpenCV and PIL may not be available, the images are encoded with zlib.
+
+    python benchmarks/bench_image_endpoint.py [viewers] [fps] [seconds]
+"""
+import os
+import re
+import sys
+import time
+import zlib
+import socket
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi
+import remi.gui as gui
+
+IMAGE = os.urandom(50000) + bytes(bytearray(i * i // 7 % 256 for i in range(640 * 480 * 3 - 50000)))
+
+
+class EncodeImage(gui.Image):
+    """The OpencvImage endpoint before ImageEncodeCache"""
+    encodings = 0
+    image = IMAGE
+    version = 1
+
+    def set_image_data(self, image):
+        self.image = image
+        self.version += 1
+
+    def get_image_data(self, index=0):
+        EncodeImage.encodings += 1
+        return [zlib.compress(self.image, 1), {'Content-type': 'image/png', 'Cache-Control': 'no-cache'}]
+
+
+class CacheImage(gui.Image):
+    def __init__(self, *args, **kwargs):
+        super(CacheImage, self).__init__(*args, **kwargs)
+        self.image_cache = gui.ImageEncodeCache(lambda image: zlib.compress(image, 1), 'image/png')
+        self.set_image_data(IMAGE)
+
+    def set_image_data(self, image):
+        self.image_cache.set_image(image)
+        self.version = self.image_cache.version
+
+    def get_image_data(self, index=0):
+        return self.image_cache.response()
+
+
+class ViewersApp(remi.App):
+    mode = 'cache'
+
+    def main(self):
+        self.image = CacheImage('') if self.mode == 'cache' else EncodeImage('')
+        return self.image
+
+    def produce(self, fps, seconds):
+        for i in range(int(fps * seconds)):
+            time.sleep(1.0 / fps)
+            with self.update_lock:
+                self.image.set_image_data(IMAGE[i % 1000:] + IMAGE[:i % 1000])
+
+
+def get(port, cookie, path, etag, results):
+    t = time.time()
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(('GET %s HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: %s\r\n%s\r\n' % (
+        path, cookie, 'If-None-Match: %s\r\n' % etag if etag else '')).encode())
+    data = b''
+    while True:
+        chunk = sock.recv(1 << 20)
+        if not chunk:
+            break
+        data += chunk
+    sock.close()
+    results.append((time.time() - t, len(data)))
+    match = re.search(br'ETag: (.+)\r\n', data)
+    return match.group(1).decode('utf-8') if match else None
+
+
+def viewer(port, cookie, image, end, results):
+    """Fetches each new version, then loads it again as the img element does when its src changes"""
+    etag = None
+    shown = 0
+    while time.time() < end:
+        version = image.version
+        if version == shown:
+            time.sleep(0.002)
+            continue
+        path = '/%s/get_image_data?index=%s' % (image.identifier, version)
+        etag = get(port, cookie, path, etag, results)
+        get(port, cookie, path, etag, results)
+        shown = version
+
+
+def main():
+    viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    fps = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    logging.getLogger('remi').setLevel(logging.ERROR)
+    ViewersApp.log_message = lambda *args: None
+    print('%s viewers, %s images per second for %s s, %s cpus' % (viewers, fps, seconds, os.cpu_count()))
+    for mode in ('encode', 'cache'):
+        ViewersApp.mode, EncodeImage.encodings = mode, 0
+        server = remi.Server(ViewersApp, start=False, address='127.0.0.1', port=0, start_browser=False,
+                             multiple_instance=True, update_interval=0.1)
+        server.start()
+        port = server._sserver.socket.getsockname()[1]
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n')
+        page = sock.recv(65536).decode('utf-8')
+        sock.close()
+        session = re.search(r'remi_session=(\d+)', page).group(1)
+        app = remi.server.clients[int(session)]
+        cookie = 'remi_session=%s' % session
+        end = time.time() + seconds
+        results = []
+        threads = [threading.Thread(target=viewer, args=(port, cookie, app.image, end, results)) for i in range(viewers)]
+        for thread in threads:
+            thread.start()
+        app.produce(fps, seconds)
+        for thread in threads:
+            thread.join()
+        server.stop()
+        encodings = app.image.image_cache.encodings if mode == 'cache' else EncodeImage.encodings
+        latencies = sorted(r[0] for r in results) or [0]
+        print('%-6s %4d requests %4d encodings %7.1f MB sent   latency p50=%5.1fms p90=%5.1fms' % (
+                  mode, len(results), encodings, sum(r[1] for r in results) / 1e6,
+                  latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.9)] * 1000))
+
+
+if __name__ == '__main__':
+    main()
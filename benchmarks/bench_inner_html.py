@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Compares Tag.innerHTML with the former string concatenation, for a container
+with a growing number of children, and measures the page serialization as
+done by the page GET (list of chunks) against the page joined in one string.
+
+    python benchmarks/bench_inner_html.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def legacy_inner_html(tag, local_changed_widgets):
+    """Tag.innerHTML as it was before, one concatenation per child"""
+    ret = ''
+    for k in tag._render_children_list:
+        s = tag.children[k]
+        if isinstance(s, gui.Tag):
+            ret = ret + s.repr(local_changed_widgets)
+        else:
+            ret = ret + s
+    return ret
+
+
+def main():
+    for size in (1000, 10000, 30000):
+        container = gui.VBox(children=[gui.Label('row number %s' % i) for i in range(size)])
+        container.repr({})
+        number = max(1, 200000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_inner_html(container, {}), number=number, repeat=3)) / number
+        current = min(timeit.repeat(lambda: container.innerHTML({}), number=number, repeat=3)) / number
+        print('innerHTML %6s children  legacy %8.2f ms   join %8.2f ms' % (size, legacy * 1000, current * 1000))
+
+    page = gui.HTML()
+    page.add_child('head', gui.HEAD(title='bench'))
+    body = gui.BODY()
+    page.add_child('body', body)
+    body.append(gui.VBox(children=[gui.Label('row number %s' % i) for i in range(30000)]))
+    page.repr()
+    joined = min(timeit.repeat(lambda: page.repr().encode('utf-8'), number=10, repeat=3)) / 10
+    chunked = min(timeit.repeat(lambda: [chunk.encode('utf-8') for chunk in page.iter_repr()], number=10, repeat=3)) / 10
+    print('page with 30000 labels  joined %8.2f ms   chunks %8.2f ms' % (joined * 1000, chunked * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Times the lookups that map a widget or a value to its position:
+TableWidget.item_coords on the last cell of a table, ListView.onselection and
+ListView/DropDown.select_by_value of the last item (the first select_by_value
+of the ListView builds its index).
+
+    python benchmarks/bench_item_lookup.py [rows] [lookups]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def timed(lookups, function, *args):
+    t = time.perf_counter()
+    for i in range(lookups):
+        function(*args)
+    return (time.perf_counter() - t) / lookups * 1e6
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    values = ['item %s' % i for i in range(rows * 10)]
+
+    table = gui.TableWidget(rows, 10)
+    print('TableWidget %s x 10, item_coords:        %10.1f us' % (
+        rows, timed(lookups, table.item_coords, table.item_at(rows - 1, 9))))
+
+    listview = gui.ListView.new_from_list(values)
+    item = listview.children[list(listview.children.keys())[-1]]
+    print('ListView %s items, onselection:       %10.1f us' % (len(values), timed(lookups, listview.onselection, item)))
+    print('ListView %s items, first select:      %10.1f us' % (len(values), timed(1, listview.select_by_value, values[0])))
+    print('ListView %s items, select_by_value:   %10.1f us' % (len(values), timed(lookups, listview.select_by_value, values[-1])))
+
+    dropdown = gui.DropDown.new_from_list(values)
+    print('DropDown %s items, select_by_value:   %10.1f us' % (len(values), timed(lookups, dropdown.select_by_value, values[0])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Processing chain of the OpenCV toolbox fed by a source at F frames per second for D seconds,
+run synchronously in the thread of the source and by an OpencvPipeline with W workers:
+
+    source -> split -> first component  -> blur -----------------> add weighted
+                    -> second component -> canny -> dilate ----->
+
+Reports the frames accepted by the source and the frames getting out of the chain per second.
+Requires OpenCV and numpy.
+
+    python benchmarks/bench_opencv_pipeline.py [fps] [seconds] [workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'editor'))
+import numpy as np
+from widgets import toolbox_opencv as opencv
+
+
+class Output(opencv.OpencvAddWeighted):
+    """Counts the frames of which both the images got processed. Run synchronously, the
+    first image of a frame gets processed with the second image of the previous one too"""
+    outputs = 0
+    last_img2 = None
+
+    def process(self):
+        super(Output, self).process()
+        if self.img2 is not None and not self.img2 is self.last_img2:
+            self.last_img2 = self.img2
+            Output.outputs += 1
+
+
+def build_chain():
+    source = opencv.OpencvImage('')
+    split = opencv.OpencvSplit()
+    blur = opencv.OpencvBlurFilter(kernel_size=21)
+    canny = opencv.OpencvCanny()
+    dilate = opencv.OpencvDilateFilter(kernel_size=5)
+    output = Output()
+    source.on_new_image.do(split.on_new_image_listener)
+    split.on_new_image_first_component.do(blur.on_new_image_listener)
+    split.on_new_image_second_component.do(canny.on_new_image_listener)
+    canny.on_new_image.do(dilate.on_new_image_listener)
+    blur.on_new_image.do(output.on_new_image_1_listener)
+    dilate.on_new_image.do(output.on_new_image_2_listener)
+    return source
+
+
+def run(mode, frames, fps, seconds, workers):
+    source = build_chain()
+    pipeline = opencv.OpencvPipeline(source, max_workers=workers) if mode == 'pipeline' else None
+    Output.outputs = 0
+    pushed = 0
+    start = time.time()
+    next_time = start
+    while time.time() - start < seconds:
+        source.set_image_data(frames[pushed % len(frames)])
+        pushed += 1
+        next_time += 1.0 / fps
+        time.sleep(max(0, next_time - time.time()))
+    elapsed = time.time() - start
+    outputs = Output.outputs
+    if pipeline is not None:
+        pipeline.close()
+    print('%-9s source %5.1f frames/s, chain output %5.1f frames/s' % (mode, pushed / elapsed, outputs / elapsed))
+
+
+def main():
+    fps = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    frames = [np.random.randint(0, 256, (720, 1280, 3), dtype=np.uint8) for i in range(8)]
+    print('%s fps for %s s, 1280x720 frames, %s workers' % (fps, seconds, workers or 'cpu count'))
+    for mode in ('sync', 'pipeline'):
+        run(mode, frames, fps, seconds, workers)
+
+
+if __name__ == '__main__':
+    main()
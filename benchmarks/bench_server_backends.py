@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Load test of the server backends: opens N concurrent sessions (one App instance
+and one websocket each), then every session clicks a button whose callback
+updates a label. Reports the number of threads of the process and the
+latency between the callback message and the reception of the widget update.
+
+    python benchmarks/bench_server_backends.py [threading|asyncio] [sessions] [rounds]
+
+The client runs in the same process, in its own event loop thread.
+"""
+import os
+import re
+import sys
+import time
+import base64
+import struct
+import asyncio
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi
+import remi.gui as gui
+from remi.server import websocket_unmask
+
+
+class LoadApp(remi.App):
+    def main(self):
+        container = gui.VBox()
+        self.counter = 0
+        self.label = gui.Label('0')
+        self.button = gui.Button('click')
+        self.button.onclick.do(self.on_button_click)
+        container.append([self.label, self.button])
+        return container
+
+    def on_button_click(self, emitter):
+        self.counter += 1
+        self.label.set_text(str(self.counter))
+
+
+def frame(text):
+    mask = os.urandom(4)
+    payload = text.encode('utf-8')
+    head = bytearray([0x81])
+    if len(payload) <= 125:
+        head.append(0x80 | len(payload))
+    else:
+        head.append(0x80 | 126)
+        head += struct.pack('>H', len(payload))
+    return bytes(head) + mask + websocket_unmask(mask, payload)
+
+
+async def read_message(reader):
+    head = await reader.readexactly(2)
+    length = head[1] & 127
+    if length == 126:
+        length = struct.unpack('>H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('>Q', await reader.readexactly(8))[0]
+    return await reader.readexactly(length)
+
+
+async def open_session(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(('GET / HTTP/1.1\r\nHost: 127.0.0.1:%s\r\n\r\n' % port).encode())
+    page = (await reader.read()).decode('utf-8')
+    writer.close()
+    cookie = re.search(r'Set-Cookie: (remi_session=\d+)', page).group(1)
+    button_id = re.search(r'<button[^>]*id="([^"]+)"', page).group(1)
+    return cookie, button_id
+
+
+async def open_websocket(port, cookie):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(('GET / HTTP/1.1\r\nHost: 127.0.0.1:%s\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                  'Sec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\nCookie: %s\r\n\r\n' % (port, key, cookie)).encode())
+    await reader.readuntil(b'\r\n\r\n')
+    # full page refresh sent after handshake
+    await read_message(reader)
+    return reader, writer
+
+
+async def click(reader, writer, button_id):
+    t = time.time()
+    writer.write(frame('callback/%s/onclick/' % button_id))
+    while True:
+        msg = await read_message(reader)
+        if msg[:1] in (b'1', b'4', b'5'):
+            return time.time() - t
+
+
+async def run_client(port, sessions, rounds, peak_threads):
+    ids = []
+    for i in range(sessions):
+        ids.append(await open_session(port))
+    semaphore = asyncio.Semaphore(50)
+
+    async def connect(cookie):
+        async with semaphore:
+            return await open_websocket(port, cookie)
+    sockets = await asyncio.gather(*[connect(cookie) for cookie, button_id in ids])
+    peak_threads.append(threading.active_count())
+
+    latencies = []
+    for r in range(rounds):
+        latencies += await asyncio.gather(*[click(reader, writer, button_id) for (reader, writer), (cookie, button_id) in zip(sockets, ids)])
+        peak_threads.append(threading.active_count())
+    for reader, writer in sockets:
+        writer.close()
+    return latencies
+
+
+def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'asyncio'
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    logging.getLogger('remi').setLevel(logging.ERROR)
+    LoadApp.log_message = lambda *args: None
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError):
+        pass
+
+    server = remi.Server(LoadApp, start=False, address='127.0.0.1', port=0, start_browser=False,
+                         multiple_instance=True, update_interval=0, backend=backend)
+    server.start()
+    port = server._sserver.socket.getsockname()[1]
+
+    peak_threads = []
+    loop = asyncio.new_event_loop()
+    latencies = loop.run_until_complete(run_client(port, sessions, rounds, peak_threads))
+    server.stop()
+
+    latencies.sort()
+    print('backend=%s sessions=%s rounds=%s' % (backend, sessions, rounds))
+    print('threads: %s' % max(peak_threads))
+    print('callback latency p50=%.1fms p99=%.1fms max=%.1fms' % (
+        latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000, latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
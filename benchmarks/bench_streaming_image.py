@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+Live feed of 640x480 frames produced at F frames per second for D seconds, shown by
+a websocket client that takes C ms to show a frame, over a link of B KB/s, in two ways:
+    xhr:     the previous OpencvVideo scheme, a javascript message per frame makes the
+             browser request the frame, encoded by the http handler under the update_lock
+    stream:  StreamingImage, the frames encoded by its thread and pushed as binary messages
+Reports the frames shown by the client per second, their age when shown, and the time the
+producer waited for the update_lock (the gui updates and the callbacks wait the same while
+a frame gets encoded). OpenCV and PIL may not be available, the frames are encoded with zlib.
+
+    python benchmarks/bench_streaming_image.py [fps] [seconds] [client ms per frame] [KB/s]
+"""
+import os
+import re
+import sys
+import time
+import zlib
+import base64
+import socket
+import struct
+import asyncio
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi
+import remi.gui as gui
+from remi.server import websocket_unmask
+
+# about 50KB encoded, like a jpeg
+FRAME = os.urandom(50000) + bytes(bytearray(i * i // 7 % 256 for i in range(640 * 480 * 3 - 50000)))
+
+
+def encode(frame):
+    # the capture time, and the image
+    return frame[:8] + zlib.compress(frame[8:], 1)
+
+
+class XhrImage(gui.Image):
+    """The OpencvVideo scheme before StreamingImage"""
+    frame = None
+
+    def push_frame(self, app, frame):
+        with app.update_lock:
+            self.frame = frame
+            app.execute_javascript("""
+                var url = '/%(id)s/get_image_data?index=%(frame_index)s';
+                var xhr = new XMLHttpRequest();
+                """ % {'id': self.identifier, 'frame_index': str(time.time())})
+
+    def get_image_data(self, index=0):
+        gui.Image.set_image(self, '/%(id)s/get_image_data?index=%(frame_index)s' % {'id': self.identifier, 'frame_index': str(time.time())})
+        self._set_updated()
+        return [encode(self.frame), {'Content-type': 'image/png', 'Cache-Control': 'no-cache'}]
+
+
+class StreamImage(gui.StreamingImage):
+    def encode_frame(self, frame):
+        return encode(frame)
+
+
+class FeedApp(remi.App):
+    mode = 'stream'
+    fps = 30
+    seconds = 5
+    lock_wait = []
+
+    def main(self):
+        self.image = StreamImage() if self.mode == 'stream' else XhrImage()
+        self.start_button = gui.Button('start')
+        self.start_button.onclick.do(self.on_start)
+        return gui.VBox(children=[self.image, self.start_button])
+
+    def on_start(self, emitter):
+        producer = threading.Thread(target=self.produce)
+        producer.daemon = True
+        producer.start()
+
+    def produce(self):
+        interval = 1.0 / self.fps
+        next_time = time.time()
+        for i in range(int(self.fps * self.seconds)):
+            next_time += interval
+            time.sleep(max(0, next_time - time.time()))
+            t = time.time()
+            frame = struct.pack('>d', t) + FRAME
+            with self.update_lock:
+                FeedApp.lock_wait.append(time.time() - t)
+            if self.mode == 'stream':
+                self.image.push_frame(frame)
+            else:
+                self.image.push_frame(self, frame)
+
+
+def frame(text):
+    mask = os.urandom(4)
+    payload = text.encode('utf-8')
+    return bytes([0x81, 0x80 | len(payload)]) + mask + websocket_unmask(mask, payload)
+
+
+async def read_message(reader):
+    head = await reader.readexactly(2)
+    length = head[1] & 127
+    if length == 126:
+        length = struct.unpack('>H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('>Q', await reader.readexactly(8))[0]
+    return await reader.readexactly(length)
+
+
+class Link(object):
+    """Bandwidth shared by the data received"""
+
+    def __init__(self, bandwidth):
+        self.bandwidth = bandwidth
+        self.lock = asyncio.Lock()
+
+    async def transfer(self, size):
+        if self.bandwidth:
+            async with self.lock:
+                await asyncio.sleep(size / self.bandwidth)
+
+
+async def http_get(port, path, cookie, link=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(('GET %s HTTP/1.1\r\nHost: 127.0.0.1:%s\r\nCookie: %s\r\n\r\n' % (path, port, cookie)).encode())
+    data = await reader.read()
+    if link is not None:
+        await link.transfer(len(data))
+    writer.close()
+    return data
+
+
+async def run_client(port, seconds, frame_time, bandwidth):
+    """Reads the messages as a browser does, and shows the newest frame received"""
+    page = (await http_get(port, '/', '')).decode('utf-8')
+    cookie = re.search(r'Set-Cookie: (remi_session=\d+)', page).group(1)
+    button_id = re.search(r'<button[^>]*id="([^"]+)"', page).group(1)
+    link = Link(bandwidth)
+    # the data waits in the socket buffers while the link is busy
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2 ** 16)
+    writer.transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2 ** 16)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(('GET / HTTP/1.1\r\nHost: 127.0.0.1:%s\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                  'Sec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\nSec-WebSocket-Protocol: remi.native\r\n'
+                  'Cookie: %s\r\n\r\n' % (port, key, cookie)).encode())
+    await reader.readuntil(b'\r\n\r\n')
+    await read_message(reader)
+    writer.write(frame('callback/%s/onclick/' % button_id))
+    ages = []
+    latest = []
+    received = asyncio.Event()
+    end = time.time() + seconds + 1
+
+    def receive(data, identifier=None):
+        if latest and latest[0][1] is not None:
+            # dropped
+            writer.write(frame('frame_shown/' + latest[0][1]))
+        latest[:] = [(data, identifier)]
+        received.set()
+
+    async def request(path):
+        # the browser requests the frame, and shows it when received
+        response = await http_get(port, path, cookie, link)
+        receive(response[response.find(b'\r\n\r\n') + 4:])
+
+    async def show():
+        while True:
+            await received.wait()
+            received.clear()
+            data, identifier = latest.pop()
+            await asyncio.sleep(frame_time)
+            ages.append(time.time() - struct.unpack('>d', data[:8])[0])
+            if identifier is not None:
+                writer.write(frame('frame_shown/' + identifier))
+
+    shower = asyncio.ensure_future(show())
+    while time.time() < end:
+        try:
+            msg = await asyncio.wait_for(read_message(reader), end - time.time())
+            await link.transfer(len(msg))
+        except asyncio.TimeoutError:
+            break
+        if msg[:1] == b'6':
+            length = struct.unpack('>H', msg[1:3])[0]
+            identifier = msg[3:3 + length].decode('utf-8')
+            receive(msg[5 + length + len('image/jpeg'):], identifier)
+        elif msg[:1] == b'2':
+            url = re.search(r"url = '([^']+)'", msg.decode('utf-8'))
+            if url:
+                asyncio.ensure_future(request(url.group(1)))
+    shower.cancel()
+    writer.close()
+    return ages
+
+
+def main():
+    fps = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    frame_time = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0
+    bandwidth = float(sys.argv[4]) * 1000 if len(sys.argv) > 4 else 0
+    logging.getLogger('remi').setLevel(logging.ERROR)
+    FeedApp.log_message = lambda *args: None
+    t = time.perf_counter()
+    for i in range(20):
+        encode(FRAME)
+    print('%s fps for %s s, %s KB per frame encoded in %.1f ms, client %.0f ms per frame, link %s' % (
+        fps, seconds, len(encode(FRAME)) // 1000, (time.perf_counter() - t) / 20 * 1000, frame_time * 1000,
+        '%d KB/s' % (bandwidth / 1000) if bandwidth else 'unlimited'))
+    for mode in ('xhr', 'stream'):
+        FeedApp.mode, FeedApp.fps, FeedApp.seconds, FeedApp.lock_wait = mode, fps, seconds, []
+        server = remi.Server(FeedApp, start=False, address='127.0.0.1', port=0, start_browser=False,
+                             multiple_instance=True, update_interval=0.01)
+        server.start()
+        port = server._sserver.socket.getsockname()[1]
+        loop = asyncio.new_event_loop()
+        ages = sorted(loop.run_until_complete(run_client(port, seconds, frame_time, bandwidth))) or [0]
+        # the connections get closed
+        loop.run_until_complete(asyncio.sleep(0.5))
+        loop.close()
+        server.stop()
+        waits = sorted(FeedApp.lock_wait) or [0]
+        print('%-6s %5.1f frames/s shown, age p50=%6.0fms max=%6.0fms   update_lock wait p50=%.1fms max=%.1fms' % (
+            mode, len(ages) / seconds, ages[len(ages) // 2] * 1000, ages[-1] * 1000,
+            waits[len(waits) // 2] * 1000, waits[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
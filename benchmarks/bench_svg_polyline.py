@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Appends N points to an SvgPolyline of maxlen points, one at a time with add_coord
+and, if available, in blocks with add_coords, representing the polyline every
+R points as the gui update loop does.
+
+    python benchmarks/bench_svg_polyline.py [points] [maxlen] [points per update]
+"""
+import os
+import sys
+import math
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def run(label, maxlen, points, per_update, append):
+    root = gui.Svg(width=400, height=300)
+    polyline = gui.SvgPolyline(maxlen)
+    root.append(polyline)
+    root.repr()
+    xs = [i * 0.01 for i in range(per_update)]
+    ys = [math.sin(x) for x in xs]
+    t = time.perf_counter()
+    for i in range(points // per_update):
+        append(polyline, xs, ys)
+        root.repr({})
+    elapsed = time.perf_counter() - t
+    print('%-28s %8.2f s  %6.2f us/point' % (label, elapsed, elapsed / points * 1e6))
+
+
+def add_coord(polyline, xs, ys):
+    for x, y in zip(xs, ys):
+        polyline.add_coord(x, y)
+
+
+def add_coords(polyline, xs, ys):
+    polyline.add_coords(xs, ys)
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    maxlen = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    per_update = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    print('%s points, maxlen %s, update every %s points' % (points, maxlen, per_update))
+    run('add_coord', maxlen, points, per_update, add_coord)
+    if hasattr(gui.SvgPolyline, 'add_coords'):
+        run('add_coords', maxlen, points, per_update, add_coords)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Acquisition of S series at 100 samples per second for H hours, represented every
+100 ms as the gui update loop does, by a TimeSeriesChart following the last minute
+and by an SvgPolyline per series keeping the last minute of samples.
+Reports the time per sample and the bytes sent per update, then the time to
+decimate zoomed views of the whole acquisition from the summary and from the samples.
+
+    python benchmarks/bench_time_series_chart.py [hours] [series] [width]
+"""
+import os
+import sys
+import math
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+RATE = 100
+UPDATE = 10
+
+
+def update_bytes(changed_widgets):
+    return sum(len(op[-1] or '') for ops in changed_widgets.values() if isinstance(ops, list) for op in ops) + \
+        sum(len(html) for html in changed_widgets.values() if not isinstance(html, list))
+
+
+def run_chart(samples, names, width):
+    root = gui.VBox()
+    chart = gui.TimeSeriesChart(span=60.0, capacity=samples, width=width)
+    for name in names:
+        chart.add_series(name)
+    root.append(chart)
+    root.repr()
+    per_update = RATE // UPDATE
+    sent = 0
+    t = time.perf_counter()
+    for i in range(0, samples, per_update):
+        xs = [(i + j) / float(RATE) for j in range(per_update)]
+        for k, name in enumerate(names):
+            chart.add_samples(name, xs, [math.sin(x * (k + 1)) for x in xs])
+        changed_widgets = {}
+        root.repr(changed_widgets)
+        sent += update_bytes(changed_widgets)
+    elapsed = time.perf_counter() - t
+    print('%-24s %8.2f s  %6.2f us/sample  %8.0f bytes/update' % (
+        'TimeSeriesChart', elapsed, elapsed / samples / len(names) * 1e6, sent / float(samples // per_update)))
+    return chart
+
+
+def run_polylines(samples, names):
+    root = gui.Svg(width=400, height=300)
+    polylines = [gui.SvgPolyline(60 * RATE) for name in names]
+    root.append(polylines)
+    root.repr()
+    per_update = RATE // UPDATE
+    sent = 0
+    t = time.perf_counter()
+    for i in range(0, samples, per_update):
+        xs = [(i + j) / float(RATE) for j in range(per_update)]
+        for k, polyline in enumerate(polylines):
+            polyline.add_coords(xs, [math.sin(x * (k + 1)) for x in xs])
+        changed_widgets = {}
+        root.repr(changed_widgets)
+        sent += update_bytes(changed_widgets)
+    elapsed = time.perf_counter() - t
+    print('%-24s %8.2f s  %6.2f us/sample  %8.0f bytes/update' % (
+        'SvgPolyline (last 60 s)', elapsed, elapsed / samples / len(names) * 1e6, sent / float(samples // per_update)))
+
+
+def run_views(chart, width):
+    series = chart.series[list(chart.series.keys())[0]]
+    first, last = series.xs[0], series.xs[-1]
+    for fraction in (1.0, 0.1, 0.01):
+        x0 = first + (last - first) * (1 - fraction) / 2
+        bucket_width = (last - first) * fraction / width
+        t = time.perf_counter()
+        points = series.decimate(x0, bucket_width, width)
+        summary = time.perf_counter() - t
+        t = time.perf_counter()
+        lows, highs = {}, {}
+        for x, y in zip(series.xs, series.ys):
+            index = int((x - x0) // bucket_width)
+            if 0 <= index < width:
+                lows[index] = min(lows.get(index, y), y)
+                highs[index] = max(highs.get(index, y), y)
+        samples = time.perf_counter() - t
+        print('view of %5.1f%%: %8.2f ms from the summary, %8.2f ms from the samples, %d points' % (
+            fraction * 100, summary * 1000, samples * 1000, len(points) // 2))
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else 800
+    samples = int(hours * 3600 * RATE)
+    names = ['series %s' % i for i in range(count)]
+    print('%s series, %s samples each (%s h at %s Hz), update every %s ms, %s px' % (
+        count, samples, hours, RATE, 1000 // UPDATE, width))
+    chart = run_chart(samples, names, width)
+    run_polylines(samples, names)
+    run_views(chart, width)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Builds a tree of N nodes (fan-out F per level) eagerly, with a TreeItem per node,
+and lazily with a loader, then opens a path down to a leaf in the lazy tree.
+Reports time, memory and size of the initial page, and of the updates of the
+opened items.
+
+    python benchmarks/bench_tree_view.py [nodes] [fan-out] [page size]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def children_of(path, nodes, fan_out):
+    """Children of the node path (a tuple of indexes) of a complete tree of at most nodes nodes."""
+    # index of the node in breadth-first order
+    index = 0
+    level_start = 0
+    level_size = 1
+    for depth, i in enumerate(path):
+        level_start += level_size
+        index = index * fan_out + i
+        level_size *= fan_out
+    first = level_start + level_size + index * fan_out
+    return [path + (i,) for i in range(fan_out) if first + i < nodes]
+
+
+def build_eager(parent, path, nodes, fan_out):
+    for child in children_of(path, nodes, fan_out):
+        item = gui.TreeItem('node %s' % '.'.join(map(str, child)))
+        parent.append(item)
+        build_eager(item, child, nodes, fan_out)
+
+
+def measure(label, function):
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - t
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('%-40s %8.2f s %8.1f MB' % (label, elapsed, memory / 1e6))
+    return result
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    fan_out = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    page_size = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    sys.setrecursionlimit(10000)
+
+    def eager():
+        tree = gui.TreeView()
+        build_eager(tree, (), nodes, fan_out)
+        return tree, len(tree.repr())
+    tree, size = measure('eager tree, %s nodes' % nodes, eager)
+    print('%-40s %8.1f KB' % ('  initial page', size / 1e3))
+    del tree
+    gc.collect()
+
+    def loader(item):
+        return (gui.TreeItem('node %s' % '.'.join(map(str, child)), has_children=bool(children_of(child, nodes, fan_out)))
+                for child in children_of(item.path, nodes, fan_out))
+
+    def lazy():
+        tree = gui.TreeView(loader=loader, page_size=page_size)
+        root = gui.TreeItem('root', has_children=True)
+        root.path = ()
+        tree.append(root)
+        return tree, root, len(tree.repr())
+    tree, item, size = measure('lazy tree', lazy)
+    print('%-40s %8.1f KB' % ('  initial page', size / 1e3))
+
+    def open_path():
+        opened = 0
+        node = item
+        while node is not None:
+            node.onclick()
+            opened += 1
+            children = [c for c in node.sub_container.children.values() if not c is node.sub_container._more_item] \
+                if node.sub_container is not None else []
+            node = None
+            for child in children:
+                child.path = tuple(int(i) for i in child.get_text().split(' ')[1].split('.'))
+            if children:
+                node = children[-1]
+                if not node.attributes['has-subtree'] == 'true':
+                    node = None
+        changed = {}
+        tree.repr(changed)
+        return opened, sum(len(c) if isinstance(c, str) else len(repr(c)) for c in changed.values())
+    opened, size = measure('lazy tree, open a path', open_path)
+    print('%-40s %8.1f KB' % ('  update of %s opened items' % opened, size / 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Compares a ListView and a VirtualListView of N strings: the time to create and
+represent them, the memory they hold (traced in a second run), the size of the
+page and the bytes of the update sent when the list is scrolled.
+
+    python benchmarks/bench_virtual_list.py [rows]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+import remi.server as server
+
+
+def update_bytes(root):
+    changed_widgets = {}
+    root.repr(changed_widgets)
+    patches = [op for c in changed_widgets.values() if isinstance(c, list) for op in c]
+    updates = [(w.identifier, c) for w, c in changed_widgets.items() if not isinstance(c, list)]
+    size = 0
+    if patches:
+        size += len(server.encode_text(server.encode_patch_message(patches, server._PROTOCOL_NATIVE)))
+    if updates:
+        size += len(server.encode_text(server.encode_update_message(updates, server._PROTOCOL_NATIVE)))
+    return size
+
+
+def build(cls, items):
+    root = gui.VBox(children=[cls.new_from_list(items, height=480)])
+    return root, len(root.repr())
+
+
+def measure(cls, items):
+    gui.runtimeInstances.clear()
+    gc.collect()
+    t = time.perf_counter()
+    root, page = build(cls, items)
+    elapsed = time.perf_counter() - t
+    del root
+    gui.runtimeInstances.clear()
+    gc.collect()
+    tracemalloc.start()
+    root, page = build(cls, items)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    scroll = 0
+    view = list(root.children.values())[0]
+    if cls is gui.VirtualListView:
+        view.onscroll(24 * len(items) // 2, 480)
+        scroll = update_bytes(root)
+    del root, view
+    gc.collect()
+    return elapsed, memory, page, scroll
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    items = ['recipe number %s' % i for i in range(rows)]
+    print('%d rows' % rows)
+    print('%-16s %10s %12s %12s %14s' % ('widget', 'time', 'memory', 'page', 'scroll update'))
+    for cls in (gui.ListView, gui.VirtualListView):
+        elapsed, memory, page, scroll = measure(cls, items)
+        print('%-16s %8.2f s %9.1f MB %9.1f KB %12s B' % (cls.__name__, elapsed, memory / 1e6, page / 1e3, scroll or '-'))
+
+
+if __name__ == '__main__':
+    main()
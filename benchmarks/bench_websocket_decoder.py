@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Compares the websocket frame decoder of WebSocketsHandler.read_next_message
+with the former byte by byte unmasking loop, for different frame sizes.
+
+    python benchmarks/bench_websocket_decoder.py
+"""
+import os
+import sys
+import timeit
+import logging
+import struct
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.server as server
+
+
+def make_frame(payload, mask=b'\x11\x22\x33\x44'):
+    head = bytearray([0x81])
+    length = len(payload)
+    if length <= 125:
+        head.append(0x80 | length)
+    elif length <= 65535:
+        head.append(0x80 | 126)
+        head += struct.pack('>H', length)
+    else:
+        head.append(0x80 | 127)
+        head += struct.pack('>Q', length)
+    return bytes(head) + mask + server.websocket_unmask(mask, payload)
+
+
+def legacy_read(rfile):
+    """The decoder loop as it was before the bulk unmasking"""
+    decoded = ''
+    fin = 0
+    while fin == 0:
+        head = rfile.read(2)
+        fin = head[0] >> 7 & 1
+        is_masked = head[1] >> 7 & 1
+        length = head[1] & 127
+        if length == 126:
+            length = struct.unpack('>H', rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', rfile.read(8))[0]
+        masks = []
+        if is_masked:
+            masks = [byte for byte in rfile.read(4)]
+        frame_data = ''
+        for char in rfile.read(length):
+            if is_masked:
+                frame_data += chr(char ^ masks[len(frame_data) % 4])
+            else:
+                frame_data += chr(char)
+        decoded += frame_data
+    return server.from_websocket(decoded)
+
+
+def current_read(rfile):
+    ws = server.WebSocketsHandler.__new__(server.WebSocketsHandler)
+    ws._log = logging.getLogger('remi.server.ws')
+    ws.rfile = rfile
+    ws.on_message = lambda message: None
+    ws.read_next_message()
+
+
+def main():
+    for size, label in ((100, '100 B'), (10 * 1024, '10 KB'), (1024 * 1024, '1 MB')):
+        frame = make_frame(b'x' * size)
+        number = max(1, 2000000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_read(BytesIO(frame)), number=number, repeat=3)) / number
+        current = min(timeit.repeat(lambda: current_read(BytesIO(frame)), number=number, repeat=3)) / number
+        print('%-6s  legacy %10.1f us   current %10.1f us   speedup x%.1f' % (
+            label, legacy * 1e6, current * 1e6, legacy / current))
+
+
+if __name__ == '__main__':
+    main()
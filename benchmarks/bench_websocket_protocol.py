@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Compares the websocket payloads of the quoted (url encoded) and the native
+subprotocols on a realistic widget tree: the full page sent at connection,
+and an update cycle changing a hundred labels. Reports sizes, also after
+permessage-deflate compression, and encode times.
+
+    python benchmarks/bench_websocket_protocol.py
+"""
+import os
+import sys
+import timeit
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+import remi.server as server
+
+
+def build_tree():
+    root = gui.VBox(width='100%')
+    menu = gui.HBox()
+    for i in range(10):
+        menu.append(gui.Button('Menu "%s"' % i, style={'margin': '2px'}))
+    root.append(menu)
+    labels = []
+    form = gui.GridBox()
+    for i in range(100):
+        label = gui.Label('Process value n.%s = %.3f [°C]' % (i, i * 1.5))
+        labels.append(label)
+        form.append(label, 'label%s' % i)
+        form.append(gui.TextInput(hint='setpoint <%s>' % i), 'input%s' % i)
+    root.append(form)
+    root.append(gui.TableWidget(50, 5, use_title=True, editable=True))
+    root.append(gui.ListView.new_from_list(['recipe & step n.%s' % i for i in range(100)]))
+    svg = gui.Svg(width=300, height=200)
+    for i in range(20):
+        svg.append(gui.SvgCircle(i * 10, i * 5, 4))
+    root.append(svg)
+    return root, labels
+
+
+def measure(label, encode, number=20):
+    elapsed = min(timeit.repeat(encode, number=number, repeat=3)) / number
+    payload = encode()
+    raw = payload if isinstance(payload, bytes) else payload.encode('utf-8')
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    deflated = compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    print('%-28s %10d bytes  %9d deflated  %8.2f ms' % (label, len(raw), len(deflated), elapsed * 1000))
+
+
+def main():
+    root, labels = build_tree()
+    html = root.repr()
+    for i, label in enumerate(labels):
+        label.set_text('Process value n.%s = %.3f [°C]' % (i, i * 2.5))
+    changed = {}
+    root.repr(changed)
+    # the html of the changed widgets, as sent when they get replaced entirely
+    updates = [(str(widget.identifier), widget._backup_repr) for widget in changed]
+
+    for protocol in (server._PROTOCOL_QUOTED, server._PROTOCOL_NATIVE):
+        measure('page %s' % protocol, lambda: server.encode_show_window_message(root.identifier, html, protocol))
+    for protocol in (server._PROTOCOL_QUOTED, server._PROTOCOL_NATIVE):
+        measure('%s updates %s' % (len(updates), protocol), lambda: server.encode_update_message(updates, protocol))
+
+
+if __name__ == '__main__':
+    main()
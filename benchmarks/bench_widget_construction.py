@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Measures the construction time and the memory of 100k widgets, with the event
+connectors created lazily and with the former setup_event_methods, that
+inspected every instance and created all the connectors eagerly.
+
+    python benchmarks/bench_widget_construction.py [widgets]
+"""
+import os
+import sys
+import time
+import inspect
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import remi.gui as gui
+
+
+def legacy_setup_event_methods(self):
+    """setup_event_methods as it was before the per class resolution"""
+    def a_method_not_builtin(obj):
+        return hasattr(obj, '__is_event')
+    for (method_name, method) in inspect.getmembers(self, predicate=a_method_not_builtin):
+        _event_info = None
+        if hasattr(method, "_event_info"):
+            _event_info = method._event_info
+        e = gui.ClassEventConnector(self, method_name, getattr(method, 'event_method_bound', method))
+        e._event_info = _event_info
+        setattr(self, method_name, e)
+
+
+def build(count):
+    widgets = []
+    for i in range(count // 4):
+        widgets.append(gui.Label('label %s' % i))
+        widgets.append(gui.Button('button %s' % i))
+        widgets.append(gui.TextInput())
+        widgets.append(gui.HBox())
+    return widgets
+
+
+def measure(count):
+    """Returns the construction time, and the memory allocated (traced in a second run)"""
+    gui.runtimeInstances.clear()
+    t = time.perf_counter()
+    widgets = build(count)
+    elapsed = time.perf_counter() - t
+    del widgets
+    gui.runtimeInstances.clear()
+    tracemalloc.start()
+    widgets = build(count)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del widgets
+    return elapsed, memory
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lazy = measure(count)
+    setup_event_methods = gui.EventSource.setup_event_methods
+    gui.EventSource.setup_event_methods = legacy_setup_event_methods
+    legacy = measure(count)
+    gui.EventSource.setup_event_methods = setup_event_methods
+    print('%s widgets (Label, Button, TextInput, HBox)' % count)
+    print('legacy  %7.2f s  %8.1f MB' % (legacy[0], legacy[1] / 1e6))
+    print('lazy    %7.2f s  %8.1f MB' % (lazy[0], lazy[1] / 1e6))
+
+
+if __name__ == '__main__':
+    main()
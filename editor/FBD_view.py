@@ -311,7 +311,8 @@ class LinkView(gui.SvgPolyline, FBD_model.Link):
         return x+xs, y+ys
 
     def update_path(self, emitter=None):
-        self.attributes['points'] = ''
+        self.coordsX.clear()
+        self.coordsY.clear()
 
         xsource,ysource = self.get_absolute_node_position( self.source )
         w,h = self.source.get_size()
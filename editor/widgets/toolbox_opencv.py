@@ -2,7 +2,9 @@
 import remi
 import remi.gui as gui
 import cv2
-from threading import Timer, Thread
+from threading import Timer, Thread, Lock, local
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
 import traceback
 import time
 import math
@@ -14,12 +16,28 @@ sample_icon_data = base64.b64decode(b64encoded_sample_icon)
 sample_icon_data = np.fromstring(sample_icon_data, np.uint8)
 sample_icon_data = cv2.imdecode(sample_icon_data, cv2.IMREAD_COLOR) 
 
+#the pipeline and the frame of the stage running in the current thread, see OpencvPipeline
+_pipeline_context = local()
+
+
 # noinspection PyUnresolvedReferences
 class OpencvWidget(object):
+    image_events = ('on_new_image',)    #the events dispatching an image to the connected widgets
+    pipeline = None                     #the OpencvPipeline of which the widget is the source
+
     def _setup(self):
         #this must be called after the Widget super constructor
         self.on_new_image.do = self.do
 
+    def dispatch_image(self, event):
+        """ Triggers an image event. The listeners get called directly, or get scheduled
+            if the widget is the source or a stage of an OpencvPipeline.
+        """
+        pipeline = getattr(_pipeline_context, 'pipeline', None) or self.pipeline
+        if pipeline is None:
+            return event()
+        pipeline.dispatch(self, event)
+
     def do(self, callback, *userdata, **kwuserdata):
         #this method gets called when an event is connected, making it possible to execute the process chain directly, before the event triggers
         if hasattr(self.on_new_image.event_method_bound, '_js_code'):
@@ -38,6 +56,204 @@ class OpencvWidget(object):
         return ()
 
 
+class _PipelineImage(object):
+    """ The image of an emitter at a frame, given to the listeners in place of the emitter,
+        that meanwhile can process the next frame.
+    """
+    def __init__(self, emitter, img):
+        self.emitter = emitter
+        self.img = img
+
+    def __getattr__(self, name):
+        return getattr(self.emitter, name)
+
+
+class _PipelineStage(object):
+    """ The frames waiting to be processed by a widget of an OpencvPipeline """
+    MAX_PENDING_FRAMES = 4
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.inputs_count = 1       #the connections from the pipeline to the widget, see OpencvPipeline.compile
+        self.pending = {}           #frame: [(listener, emitter, params, kwuserdata), ...]
+        self.running = False
+        self.frame = None           #the frame being processed
+        self.last_frame = 0
+        self.processed_frames = 0
+        self.dropped_frames = 0
+
+    def add_input(self, frame, listener_input, alive=None):
+        """ Adds the input of a frame. The frames pending on a single input are limited to
+            the newest MAX_PENDING_FRAMES. With several inputs, a frame waits for the slower
+            ones while it is in the set alive, the frames processed or pending in the other stages.
+        """
+        if frame <= self.last_frame:
+            return
+        self.pending.setdefault(frame, []).append(listener_input)
+        if alive is None:
+            old_frames = sorted(self.pending)[:-self.MAX_PENDING_FRAMES]
+        else:
+            #an incomplete frame that no other stage is going to send can not be completed
+            old_frames = [f for f, inputs in self.pending.items()
+                          if len(inputs) < self.inputs_count and not f in alive]
+        for old in old_frames:
+            del self.pending[old]
+            self.dropped_frames += 1
+
+    def take(self):
+        """ Returns the newest frame received on all the inputs and its inputs, dropping the older ones """
+        ready = [frame for frame, inputs in self.pending.items() if len(inputs) >= self.inputs_count]
+        if not ready:
+            self.frame = None
+            return None
+        frame = max(ready)
+        inputs = self.pending.pop(frame)
+        for old in [f for f in self.pending if f < frame]:
+            del self.pending[old]
+            self.dropped_frames += 1
+        self.last_frame = self.frame = frame
+        return frame, inputs
+
+
+class OpencvPipeline(object):
+    """ Runs the processing chain connected to a source widget in a thread pool,
+        instead of running it in the thread of the source, one stage after the other.
+        The image events connections (see OpencvWidget.image_events) get compiled
+        in a DAG of the widgets at each frame, they can change while running.
+            - the stages of independent branches run in parallel, OpenCV releases the GIL
+            - the frames are pipelined: a stage processes a frame at a time, in order,
+              while the previous stage processes the next frame. The frames arriving
+              while a stage is busy wait for it, only the newest one is processed
+            - a stage with several connections from the pipeline, like the BinaryOperator
+              widgets, processes the frames received on all of them. A frame waits for the
+              slower connections as long as another stage is processing it or waiting for it
+            - the preview of a stage gets updated only if the widget is visible
+        The stages and the listeners of their events run out of the App update_lock,
+        the widgets take it to change their state (see OpencvImage.set_image_data).
+
+        Usage:
+            video = OpencvVideo()
+            OpencvPipeline(video)
+            video.on_new_image.do(threshold.on_new_image_listener)
+    """
+
+    def __init__(self, source, max_workers=None):
+        self.source = source
+        self.frames = 0
+        self.stages = {}    #widget: _PipelineStage
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or multiprocessing.cpu_count())
+        source.pipeline = self
+
+    def close(self):
+        if self.source.pipeline is self:
+            self.source.pipeline = None
+        self._executor.shutdown(wait=False)
+
+    def compile(self):
+        """ Returns the widgets connected to the source in topological order, with the
+            number of connections to each one. Raises ValueError if the connections form a cycle.
+        """
+        connections = {}
+        children = {}
+        to_visit = [self.source]
+        while to_visit:
+            widget = to_visit.pop()
+            if widget in children:
+                continue
+            children[widget] = []
+            for event_name in widget.image_events:
+                listener = getattr(widget, event_name).callback
+                child = getattr(listener, '__self__', None)
+                if isinstance(child, OpencvWidget):
+                    children[widget].append(child)
+                    connections[child] = connections.get(child, 0) + 1
+                    to_visit.append(child)
+        order = []
+        inputs = dict(connections)
+        ready = [self.source] if self.source not in inputs else []
+        while ready:
+            widget = ready.pop()
+            order.append(widget)
+            for child in children[widget]:
+                inputs[child] -= 1
+                if inputs[child] == 0:
+                    ready.append(child)
+        if len(order) < len(children):
+            raise ValueError('the image events connected to %s form a cycle' % self.source.identifier)
+        return order, connections
+
+    def dispatch(self, emitter, event):
+        frame = getattr(_pipeline_context, 'frame', None)
+        if getattr(_pipeline_context, 'pipeline', None) is not self:
+            if not emitter is self.source:
+                return event()
+            #a new frame of the source
+            order, connections = self.compile()
+            with self._lock:
+                self.frames += 1
+                frame = self.frames
+                for widget in order[1:]:
+                    self._stage(widget).inputs_count = connections[widget]
+        callback_params = event.event_method_bound() or ()
+        listener = event.callback
+        if listener is None:
+            return
+        params = callback_params + (event.userdata or ())
+        kwuserdata = event.kwuserdata or {}
+        widget = getattr(listener, '__self__', None)
+        if not isinstance(widget, OpencvWidget):
+            listener(emitter, *params, **kwuserdata)
+            return
+        with self._lock:
+            stage = self._stage(widget)
+            stage.add_input(frame, (listener, _PipelineImage(emitter, emitter.img), params, kwuserdata),
+                            self._alive_frames(stage) if stage.inputs_count > 1 else None)
+            if stage.running:
+                return
+            stage.running = True
+        self._executor.submit(self._run, stage)
+
+    def _alive_frames(self, stage):
+        """ The frames that can still reach the stage: processed or pending in the other
+            stages, and the newest one, that the source could be dispatching """
+        alive = set([self.frames])
+        for other in self.stages.values():
+            if not other is stage:
+                alive.update(other.pending)
+                alive.add(other.frame)
+        return alive
+
+    def _stage(self, widget):
+        if not widget in self.stages:
+            self.stages[widget] = _PipelineStage(widget)
+        return self.stages[widget]
+
+    def _run(self, stage):
+        while True:
+            with self._lock:
+                taken = stage.take()
+                if taken is None:
+                    stage.running = False
+                    return
+            frame, inputs = taken
+            _pipeline_context.pipeline = self
+            _pipeline_context.frame = frame
+            try:
+                on_new_images = getattr(stage.widget, 'on_new_images', None)
+                if on_new_images is None:
+                    for listener, emitter, params, kwuserdata in inputs:
+                        listener(emitter, *params, **kwuserdata)
+                else:
+                    on_new_images(inputs)
+                stage.processed_frames += 1
+            except Exception:
+                print(traceback.format_exc())
+            finally:
+                _pipeline_context.pipeline = None
+                _pipeline_context.frame = None
+
+
 class OpencvImage(gui.Image, OpencvWidget):
     """ OpencvImage widget.
         Allows to read an image from file.
@@ -63,6 +279,8 @@ class OpencvImage(gui.Image, OpencvWidget):
         kwargs['style'] = self.default_style
         kwargs['width'] = kwargs['style'].get('width', kwargs.get('width','200px'))
         kwargs['height'] = kwargs['style'].get('height', kwargs.get('height','180px'))
+        #the png of the current image, encoded once per image whatever the number of viewers
+        self.image_cache = gui.ImageEncodeCache(self.encode_png, 'image/png')
         super(OpencvImage, self).__init__(filename, *args, **kwargs)
         OpencvWidget._setup(self)
 
@@ -75,9 +293,21 @@ class OpencvImage(gui.Image, OpencvWidget):
         self.filename = filename
 
     def set_image_data(self, img):
+        app = None
+        if getattr(_pipeline_context, 'pipeline', None) is not None:
+            #a stage of a pipeline changes the widget state concurrently to the App representing it
+            app = self.app_instance or self.search_app_instance(self)
+        if app is None:
+            self._set_image_data(img)
+        else:
+            with app.update_lock:
+                self._set_image_data(img)
+        self.dispatch_image(self.on_new_image)
+
+    def _set_image_data(self, img):
         self.img = img
+        self.image_cache.set_image(img)
         self.update()
-        self.on_new_image()
 
     def search_app_instance(self, node):
         if issubclass(node.__class__, remi.server.App):
@@ -86,11 +316,23 @@ class OpencvImage(gui.Image, OpencvWidget):
             return None
         return self.search_app_instance(node.get_parent()) 
 
+    def is_visible(self):
+        """ Returns True if the widget is shown in the App page: neither it nor a parent is hidden """
+        node = self
+        while isinstance(node, gui.Tag):
+            if node.style.get('display') == 'none' or node.style.get('visibility') == 'hidden':
+                return False
+            node = node.get_parent()
+        return issubclass(node.__class__, remi.server.App)
+
     def update(self, *args):
+        if getattr(_pipeline_context, 'pipeline', None) is not None and not self.is_visible():
+            #in a pipeline the preview of a hidden widget gets updated by the frames after it is shown
+            return
         if self.app_instance==None:
             self.app_instance = self.search_app_instance(self)
             if self.app_instance==None:
-                self.attributes['src'] = "/%s/get_image_data?index=00"%self.identifier #gui.load_resource(self.filename)
+                self.attributes['src'] = "/%s/get_image_data?index=%s"%(self.identifier, self.image_cache.version) #gui.load_resource(self.filename)
                 return
         self.app_instance.execute_javascript("""
             url = '/%(id)s/get_image_data?index=%(frame_index)s';
@@ -106,20 +348,19 @@ class OpencvImage(gui.Image, OpencvWidget):
                 document.getElementById('%(id)s').src = imageUrl;
             }
             xhr.send();
-            """ % {'id': self.identifier, 'frame_index':str(time.time())})
+            """ % {'id': self.identifier, 'frame_index':self.image_cache.version})
+
+    def encode_png(self, img):
+        ret, png = cv2.imencode('.png', img)
+        if not ret:
+            raise ValueError('cannot encode the image as png')
+        return png.tobytes()
 
     def get_image_data(self, index=0):
-        gui.Image.set_image(self, '/%(id)s/get_image_data?index=%(frame_index)s'% {'id': self.identifier, 'frame_index':str(time.time())})
-        self._set_updated()
-        try:
-            ret, png = cv2.imencode('.png', self.img)
-            if ret:
-                headers = {'Content-type': 'image/png', 'Cache-Control':'no-cache'}
-                return [png.tostring(), headers]
-        except Exception:
-            pass
-            #print(traceback.format_exc())
-        return None, None
+        #the url of the current version, for the page reloads. It does not change until a new image is set
+        gui.Image.set_image(self, '/%(id)s/get_image_data?index=%(frame_index)s'% {'id': self.identifier, 'frame_index':self.image_cache.version})
+        #encoded by the image_cache thread pool, a request with the ETag of the current version gets a 304
+        return self.image_cache.response()
 
 
 class OpencvImRead(OpencvImage, OpencvWidget):
@@ -146,9 +387,12 @@ class OpencvImRead(OpencvImage, OpencvWidget):
         self.filename = filename
 
 
-class OpencvVideo(OpencvImage):
+class OpencvVideo(gui.StreamingImage, OpencvImage):
     """ OpencvVideo widget.
         Opens a video source and dispatches the image frame by generating on_new_image event.
+        The frames are streamed to the browser as binary websocket messages, encoded
+        out of the update lock.
+        With an OpencvPipeline, the processing chain runs in a thread pool.
         The event on_new_image can be connected to other Opencv widgets for further processing
     """
     icon = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAFoAAAAuCAYAAACoGw7VAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAKyAAACsgBvRoNowAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAXdSURBVHic7ZptTFNnFMf/z21rX1baQi0MBGojoesUJeJLNBhw6oddk5YuY2LMMjMSzLIYDCZLtsTEGbPpwvi0LQsSpgkpYRFDhpGYRVCnxCWObTi/YJ2ogKuDXspLwd7bPvsAmikKvaXlUuD3pcl9Oed//3l67rknD8ESMcXpdBqDweApIrWQ+U5xcbGM5/kMnucZsfcSQjYyDFNJKdUtGf0SWJY1MwzzPiHkHUqpiRDCUEqp2DiEEA2ARAB98ujLjF92795tk8lkVZTSXADJABhCJtbi099IWTIaQFlZmeLRo0fVAN6mlKbEIseiLx1Op9MoCEILgDUA1DFK0ye6wC8kWJbNFQThJoA8xM5kAIu4dNjt9g8opScBhFsqPJRSr5gchJDXAJgAkEVn9NGjR5mOjo5vQ6HQe4SQpDBv8wDYc/78+SticpWVlSn6+vqOE0IORaVGFxUVrQqFQvnRiBVj1AAOUUpXUUqfMAwj/P8kpZTg+fdWcPL49yMjI59fvnx5PJKkDofjzagYbbfbP5n8Gy5UgsFgcNWFCxfuRxqA4Xn+BKXUEk1VS0yF4Xm+/N69ex39/f03BUFwUEplUotaiMj9fr+/vLw8KT09PY9l2R+2bdsWGB4e/lGr1VYSQh7MJnhBTw/e6ukBAFxLS8PPmZkAgDvFdzCwZgAAkHUuC8v/XD7Lx5j/POuje3p6UF1dnVhaWppSU1PzUW9v7x+Dg4O/CYJgn3xJiCbN74eV42DlOKwYHX12fMgyBM7KgbNyGE+K6P0Sd0xp7wKBAFpbW+Wtra2JWVlZiXa7/cy6devGfD7fKZ1O9w0h5N9wg9dnZ6M+O3vK8byv8mYpO/6Yto92u92oqqoyaDQaQ0FBwadFRUUfcxz3u8FgOAngEiFE9ERrsRLWJ7jf70dLS4viwIEDxmPHju28evVqvc/nuz82NnaEUhpu07+oET3rcLvdqKysXH7w4MGMxsbGz7xeb9e+fftyYyFuIRHxJ/jg4CAaGhpUHo9HtX79elM0RS1EFvX0bi5ZMnqOWDJ6jpgXY1KLxYKSkhKkpaVBrY7u/D0QCODx48doa2vDlSuippxRRXKjLRYLKioq4HK50N3dHZMcKSkp2LlzJ6xWK6qrq2OSYyYkLx379+9HXV1dzEwGAI/HA5fLBavViuTk5JjlmQ5JjU5ISIBOp8ODB7OaXYUFpRSdnZ3IycmJea6XIanRK1eunBOTn+L1emEySdPyS146QqHQjNe0l7Sja2vXrHPxPI9ly5bNOk4kSG50OHCvc7hech1nj5wFl8pJLSci4sJoAOCVPLzpXjQfbkbbh20IqAJSSxJFxO2d2WyGw+Hwbdq0abyxsfFhNEVNx3jCONwb3eh9oxd5zXmwXbMBcTCsFWW0QqHA5s2bqcPh8JpMpod6vf5LmUx2rqmpqSJWAl8GZSj8ej9uvHsDt7ffxo6aHUjsS5xLCaIJy+jU1FSwLDtSWFjIA2jS6/XHCSF/Pz1vt9tjJnA6eBUP74qJcpLxVwby6/OhGFdIomUmXmk0wzDIycmhe/fuHUhPT/dptdpKhmHOEELG5lJgOIxrJ8uJbbKc/GKTWtIUphidlJSEXbt2jbAsO8YwzCW9Xv8FIeSWFOLEQGUT5aR9Tzs0Pg3MnWapJT2HHJjYZL127Vo4nU7OYrEMajSar5VK5WlCyOhMAeYLylElDP8YsL12O3T9OqnlTEGu0+k0tbW1AzKZrNVgMJwghHRILUoM8idyaIY02NqwFZm3MqWW80rkCoXisNForCOEDEktRgwkRKAeVmN122rkXswFCc3vPfVyQsh3UosQi3pYjdSuVOS78qEaUUktJywkn0eLQTmqhK5fh8LThfO+b36RuDCaCTLQerXId+XP6zo8HXFh9IbmDTA+NIIJxs1oZgpxYbSpO/63jcTvEokzorKiQ6HQRQDCjBe+gNlsztqyZUupzWbjo6FjJlQqlezu3bu/Ukp/EnMfwzBEEIT+2eT+D23+73+IM13aAAAAAElFTkSuQmCC"
@@ -172,7 +416,7 @@ class OpencvVideo(OpencvImage):
     def __init__(self, *args, **kwargs):
         self.framerate = 10
         self.video_source = 0
-        super(OpencvVideo, self).__init__("", *args, **kwargs)
+        super(OpencvVideo, self).__init__(*args, **kwargs)
         self.thread = Thread(target=self.update)
         self.thread.daemon = True
         self.thread.start()
@@ -180,6 +424,7 @@ class OpencvVideo(OpencvImage):
     def set_image_data(self, image_data_as_numpy_array):
         #oveloaded to avoid update
         self.img = image_data_as_numpy_array
+        self.image_cache.set_image(image_data_as_numpy_array)
 
     def search_app_instance(self, node):
         if issubclass(node.__class__, remi.server.App):
@@ -199,39 +444,26 @@ class OpencvVideo(OpencvImage):
                 self.app_instance = self.search_app_instance(self)
                 if self.app_instance==None:
                     continue
-
-            with self.app_instance.update_lock:
-                self.app_instance.execute_javascript("""
-                    var url = '/%(id)s/get_image_data?index=%(frame_index)s';
-                    var xhr = new XMLHttpRequest();
-                    xhr.open('GET', url, true);
-                    xhr.responseType = 'blob'
-                    xhr.onload = function(e){
-                        var urlCreator = window.URL || window.webkitURL;
-                        urlCreator.revokeObjectURL(document.getElementById('%(id)s').src);
-                        var imageUrl = urlCreator.createObjectURL(this.response);
-                        document.getElementById('%(id)s').src = imageUrl;
-                    }
-                    xhr.send();
-                    """ % {'id': self.identifier, 'frame_index':str(time.time())})
-                
-
-    def get_image_data(self, index=0):
-        gui.Image.set_image(self, '/%(id)s/get_image_data?index=%(frame_index)s'% {'id': self.identifier, 'frame_index':str(time.time())})
-        self._set_updated()
-        try:
-            ret, frame = self.capture.read()
-            if ret:
-                self.set_image_data(frame)
-                self.on_new_image()
-                ret, png = cv2.imencode('.png', frame)
-                if ret:
-                    headers = {'Content-type': 'image/png', 'Cache-Control':'no-cache'}
-                    # tostring is an alias to tobytes, which wasn't added till numpy 1.9
-                    return [png.tostring(), headers]
-        except Exception:
-            print(traceback.format_exc())
-        return None, None
+            try:
+                ret, frame = self.capture.read()
+                if not ret:
+                    continue
+                with self.app_instance.update_lock:
+                    self.set_image_data(frame)
+                    self.dispatch_image(self.on_new_image)
+                # encoded and sent by the StreamingImage encoder thread
+                self.push_frame(frame)
+            except Exception:
+                print(traceback.format_exc())
+
+    def encode_frame(self, frame):
+        extension, quality_flag = {'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+                                   'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY)}.get(self.image_format, ('.png', None))
+        params = [] if quality_flag is None else [quality_flag, int(self.quality)]
+        ret, data = cv2.imencode(extension, frame, params)
+        if not ret:
+            raise ValueError('cannot encode the frame as %s' % self.image_format)
+        return data.tobytes()
 
 
 class OpencvCrop(OpencvImage):
@@ -356,6 +588,8 @@ class OpencvSplit(OpencvImage):
         dispatch each one a single channel.
     """
     icon = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAFAAAABDCAYAAAALU4KYAAAAAXNSR0IArs4c6QAAAARnQU1BAACxjwv8YQUAAAAJcEhZcwAADsQAAA7EAZUrDhsAAAYtSURBVHhe7ZtLSBVfHMd/aklmqWRmLVwYBYEo6EpcuVFoZUm2lkAQdNlS6A+6qjY+iFBKMDQQBEsqNRNDekqJimgvHz3IZ5aWZVbm9/c/M111nvfOqXvn3g8Mc8445Pid3+v8zhS2b9++NQoipqenxcgZwsU5hJeoFhgREUH79+/ni25jamqKfv78yWOnLVAVEOK1trbyRbdx7NgxFhGEXNjPsCXg3Nwc9fT00J07d9Q3GuxYEvDr16909uxZyszMpFOnTlFRURFlZWVRaWkpLSwsiLuCE1MB19bWqLi4mC5evEi/fv0SV//n5s2bLKgSoIMRUwGvX79Ovb29YraVgYEBamhoELPgw1RAI/EUrNzjVkzLmIKCAvr+/buYBQeDg4NiZI6pBR46dEiMQmhhaoHd3d1UWVnJ4/DwcNq7dy+P3QZKNCVJ2rFASyuRvLw8PkO88+fP89htnD59mkUEjrpwCGOkCIjaMVhwXEBFPJyVw804JqCRWG4WMRQDfcRUwNHRUTHyDbdaoaGANTU1VFhYKGb6uD3OGaFbB547d47q6+vp27dvlJqaytf06kBPASsqKsQoONC0QHRgGhsbWTwrhIWFiVHwsUXAL1++UHV1NS0uLoor3gFRd+zY4crD02C2uPCZM2foypUr/EMFMxf2pLy8nM+RkZGUnp7OY7fR39+vdqg2WODy8nJQ9/a8YYOASBoTExNiJp/o6Gg6ePAgt8x2794trgYWGwR8+PChGMll+/btlJ2dzZtSJ0+epBMnTlBJSQnv30ZFRYm7AgNVQPTCnj17JmZyyc/P5x2+zdn7yJEjLCj6joGC+qTYulT6YXaBENu2bePEYUZKSgolJyeL2VYOHDhAGRkZYub/qAJ6u++Bb2rgkjhbqQeNxFOwco+/oAr448cPMbIOrA6HFeEU4uLixEifPXv2iJH/owpod3McFudNrJqfnxcjfWZnZ8XI/1EV2PzVgRGwOKsuu5kXL16IkT5W7nGCly9f0v37973yPgVVQDsdFW/FA3jo4eFhMdvK2NgYDQ0NiZkcVldXqampib+oaGtro7q6OlpZWRE/tYd9H1zH1zLjxo0bdPfuXf5DFGAFDx48oJaWFnFFDp8+faJLly7xS1J+/+vXr3V3JM2IWF8N/IcBLBCljBaJiYl83rlzJx09epQtUA/sIwPcg5JEC/yut2/f0qNHj7j2xPc1XV1dvAqS2VuEdTc3N9O7d+/ElT98/PiRkpKSLCUwzy9ebZuSk0Uu4u7MzAw/kJ0YbBdYWnt7O129elX3u0a07vDy7b5A22p4G/v+JggH+JQXbnrt2jXurCNkfP78WdyhzeTkJIcRO/xTAREyPnz4wD1IJyzw6dOndPnyZW65VVVVcaLA+h5WbgW4JcKKnUWF2g/EH6C3lFP6gQkJCfxgRpSVlfFZrx8IF0LLDDEQwsFaEC/RqIyJiaH4+Hg6fPgw/06r4QJfySIJIMb5UpIoYJ2ufM6ihWY/0CgxOAViDFpmsBRYBQRE+YA+JCwRSeTJkycc6NEVv337tqkgIyMj/G8+f/7cEfEAyiyrxbwqoOwOSEdHB3+gbmWrAN4AS4XgFy5c4GJXi8ePH3PZ4/TKZWlpiW7duiVmxqiq4aHhPlqHr6BMQSzyrPus8v79e64bEdtgqQoI9p2dnWzFMnj16pWlgl4VEOkbbqx1+AJcFP8twuoOnxZ4uVje1dbW0vj4OGdUuLcs8QBiHGK1WY9Art+ug/rLKRdDaYINLxTdekW/kyDR4WUZEY6HMju8BW/R6cYAhHMqWZgBr0TCM6ofpVrgvXv3LLWv/Bk8P7xID6kCoi5zAyiV3rx5I2YbkSYgzF9v3RloIPsj42shTUCULGZrz0AC2b+vr0/M/iBNwL8V6P8WKGdQe27+u6QJ6ERzwN9AUY/605Ow9Vhl2gBLS0vjM5Z7aCgYsWvXLj6jcDbKXoFKbGws5eTkqJZoywJhVVp1ouehYOG9BCTYEvAs4qVmYbfiGQctubAdjh8/zmej1B/o5Obm8v4QkGaBwUJIQB8JCegjIQF9RJqAgbD96QQhAX1EmoCyN6n8BWl1IJC5Z/EvQQ2oeJhUAYOBUBb2CaLfU+9XvFpkb1cAAAAASUVORK5CYII="
+    image_events = ('on_new_image', 'on_new_image_first_component', 'on_new_image_second_component', 'on_new_image_third_component')
+
     def __init__(self, *args, **kwargs):
         super(OpencvSplit, self).__init__("", *args, **kwargs)
         self.on_new_image_first_component.do = self.do_first
@@ -366,11 +600,11 @@ class OpencvSplit(OpencvImage):
         self.image_source = emitter
         self.set_image_data(emitter.img)
         if not self.on_new_image_first_component.callback is None:
-            self.on_new_image_first_component()
+            self.dispatch_image(self.on_new_image_first_component)
         if not self.on_new_image_second_component.callback is None:
-            self.on_new_image_second_component()
+            self.dispatch_image(self.on_new_image_second_component)
         if not self.on_new_image_third_component.callback is None:
-            self.on_new_image_third_component()
+            self.dispatch_image(self.on_new_image_third_component)
 
     def do_first(self, callback, *userdata, **kwuserdata):
         #this method gets called when an event is connected, making it possible to execute the process chain directly, before the event triggers
@@ -512,6 +746,20 @@ class BinaryOperator(object):
         except Exception:
             print(traceback.format_exc())
 
+    def on_new_images(self, inputs):
+        #in an OpencvPipeline, both the images of a frame are set before processing them once
+        try:
+            for listener, emitter, params, kwuserdata in inputs:
+                if getattr(listener, '__name__', None) == 'on_new_image_1_listener':
+                    self.img1 = emitter.img
+                elif getattr(listener, '__name__', None) == 'on_new_image_2_listener':
+                    self.img2 = emitter.img
+                else:
+                    listener(emitter, *params, **kwuserdata)
+            self.process()
+        except Exception:
+            print(traceback.format_exc())
+
 
 class OpencvBitwiseAnd(OpencvImage, BinaryOperator):
     """ OpencvBitwiseAnd widget.
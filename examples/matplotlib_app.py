@@ -17,13 +17,17 @@
      a specific method. The displayed image url points to "get_image_data" 
     Passing an additional parameter "update_index" we inform the browser 
      about an image change so forcing the image update.
+    The figure gets rendered at each redraw, the png is encoded once per
+     update_index by the ImageEncodeCache, whatever the number of viewers,
+     and the browser revalidating its copy gets a 304.
 """
 
 import io
-import time
-import threading
 import random
 
+import numpy
+import matplotlib.image
+
 import remi.gui as gui
 from remi import start, App
 
@@ -36,8 +40,7 @@ class MatplotImage(gui.Image):
 
     def __init__(self, **kwargs):
         super(MatplotImage, self).__init__("/%s/get_image_data?update_index=0" % id(self), **kwargs)
-        self._buf = None
-        self._buflock = threading.Lock()
+        self._image_cache = gui.ImageEncodeCache(self.encode_png, 'image/png')
 
         self._fig = Figure(figsize=(4, 4))
         self.ax = self._fig.add_subplot(111)
@@ -46,26 +49,21 @@ class MatplotImage(gui.Image):
 
     def redraw(self):
         canv = FigureCanvasAgg(self._fig)
-        buf = io.BytesIO()
-        canv.print_figure(buf, format='png')
-        with self._buflock:
-            if self._buf is not None:
-                self._buf.close()
-            self._buf = buf
+        canv.draw()
+        # a copy of the pixels, the figure can change while the png gets encoded
+        self._image_cache.set_image(numpy.array(canv.buffer_rgba()))
 
-        i = int(time.time() * 1e6)
-        self.attributes['src'] = "/%s/get_image_data?update_index=%d" % (id(self), i)
+        self.attributes['src'] = "/%s/get_image_data?update_index=%d" % (id(self), self._image_cache.version)
 
         super(MatplotImage, self).redraw()
 
-    def get_image_data(self, update_index):
-        with self._buflock:
-            if self._buf is None:
-                return None
-            self._buf.seek(0)
-            data = self._buf.read()
+    def encode_png(self, rgba):
+        buf = io.BytesIO()
+        matplotlib.image.imsave(buf, rgba, format='png')
+        return buf.getvalue()
 
-        return [data, {'Content-type': 'image/png'}]
+    def get_image_data(self, update_index):
+        return self._image_cache.response()
 
 
 class MyApp(App):
@@ -18,7 +18,6 @@ from remi import server
 import math
 from threading import Timer
 import random
-import collections
 
 
 class SvgComposedPoly(gui.SvgGroup):
@@ -52,20 +51,18 @@ class SvgComposedPoly(gui.SvgGroup):
     def scale(self, x_factor, y_factor):
         self.x_factor = x_factor/self.x_factor
         self.y_factor = y_factor/self.y_factor
-        self.plotData.attributes['points'] = "" 
-        tmpx = collections.deque()
-        tmpy = collections.deque()
+        tmpx = list(self.plotData.coordsX)
+        tmpy = list(self.plotData.coordsY)
 
         for c in self.circles_list:
             self.remove_child(c)
         self.circles_list = list()
 
-        while len(self.plotData.coordsX)>0:
-            tmpx.append( self.plotData.coordsX.popleft() )
-            tmpy.append( self.plotData.coordsY.popleft() )
+        self.plotData.coordsX.clear()
+        self.plotData.coordsY.clear()
 
-        while len(tmpx)>0:
-            self.add_coord(tmpx.popleft(), tmpy.popleft())
+        for x, y in zip(tmpx, tmpy):
+            self.add_coord(x, y)
             
         self.x_factor = x_factor
         self.y_factor = y_factor
@@ -12,12 +12,14 @@
    limitations under the License.
 """
 
+import io
 import os
 import sys
 import logging
 import functools
 import threading
 import collections
+import contextlib
 import inspect
 try:
     import html
@@ -27,6 +29,17 @@ except ImportError :
     escape = cgi.escape
 import mimetypes
 import base64
+import bisect
+import array
+import time
+import itertools
+import json
+import multiprocessing
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport, see _SharedEncoding
+    ThreadPoolExecutor = None
 try:
     # Python 2.6-2.7
     from HTMLParser import HTMLParser
@@ -43,7 +56,7 @@ except ImportError:
         import html
         unescape = html.unescape
 
-from .server import runtimeInstances
+from .server import runtimeInstances, encode_image_frame_message
 
 
 log = logging.getLogger('remi.gui')
@@ -115,20 +128,44 @@ class EventSource(object):
         self.setup_event_methods()
 
     def setup_event_methods(self):
-        def a_method_not_builtin(obj):
-            return hasattr(obj, '__is_event')
-        for (method_name, method) in inspect.getmembers(self, predicate=a_method_not_builtin):
-            # this is implicit in predicate
-            #if not hasattr(method, '__is_event'):
-            #    continue
-            
-            _event_info = None
-            if hasattr(method, "_event_info"):
-                _event_info = method._event_info
-
-            e = ClassEventConnector(self, method_name, method)
-            e._event_info = _event_info
-            setattr(self, method_name, e)
+        """ The event methods of the class get replaced by _EventMethodDescriptor instances.
+            This happens once per class, the ClassEventConnector of an event gets created
+            the first time the event is accessed on the instance (i.e. to connect a listener).
+        """
+        cls = type(self)
+        if '_event_methods_resolved' in cls.__dict__:
+            return
+        for klass in cls.__mro__:
+            for (method_name, method) in list(klass.__dict__.items()):
+                if hasattr(method, '__is_event') and not isinstance(method, _EventMethodDescriptor):
+                    setattr(klass, method_name, _EventMethodDescriptor(method_name, method))
+        cls._event_methods_resolved = True
+
+
+class _EventMethodDescriptor(object):
+    """ Replaces an event method in its class. When accessed on an instance, creates the
+        ClassEventConnector and stores it in the instance dictionary, that takes precedence
+        over this (non data) descriptor for the next accesses.
+        Accessed on the class or by means of super(), returns the event method.
+    """
+    def __init__(self, method_name, method):
+        self.method_name = method_name
+        self.method = method
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.method.__get__(None, owner)
+        method = self.method.__get__(instance, owner)
+        # the connector is created only if self is the attribute that a lookup on the instance resolves
+        for klass in type(instance).__mro__:
+            if self.method_name in klass.__dict__:
+                if not klass.__dict__[self.method_name] is self:
+                    return method
+                break
+        e = ClassEventConnector(instance, self.method_name, method)
+        e._event_info = getattr(self.method, '_event_info', None)
+        instance.__dict__[self.method_name] = e
+        return e
 
 
 class ClassEventConnector(object):
@@ -144,7 +181,10 @@ class ClassEventConnector(object):
         self.event_source_instance = event_source_instance
         self.event_name = event_name
         self.event_method_bound = event_method_bound
-        self.connect = self.do  # for compatibility reasons
+
+    def connect(self, callback, *userdata, **kwuserdata):
+        """ Same as do, for compatibility reasons """
+        return self.do(callback, *userdata, **kwuserdata)
 
     def do(self, callback, *userdata, **kwuserdata):
         """ The callback and userdata gets stored, and if there is some javascript to add
@@ -226,19 +266,107 @@ def editor_attribute_decorator(group, description, _type, additional_data):
     return add_annotation
 
 
+class _RenderChildrenList(object):
+    """The keys of the children in render order.
+    It behaves as a list, but the membership test and the removal are O(1): a removed key
+    leaves a hole, and the holes are compacted when they are more than the keys.
+    """
+    __slots__ = ('_keys', '_positions', '_holes')
+
+    _HOLE = object()
+
+    def __init__(self, keys=()):
+        self._keys = []
+        self._positions = {}
+        self._holes = 0
+        for key in keys:
+            self.append(key)
+
+    def __len__(self):
+        return len(self._keys) - self._holes
+
+    def __iter__(self):
+        if not self._holes:
+            return iter(self._keys)
+        hole = self._HOLE
+        return (key for key in self._keys if not key is hole)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __getitem__(self, index):
+        if self._holes and not index == -1:
+            self._compact()
+        # the trailing holes are removed, the last item is always a key
+        return self._keys[index]
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, key):
+        if key in self._positions:
+            self.remove(key)
+        self._positions[key] = len(self._keys)
+        self._keys.append(key)
+
+    def remove(self, key):
+        try:
+            position = self._positions.pop(key)
+        except KeyError:
+            raise ValueError('%r is not in list' % (key,))
+        keys = self._keys
+        if position == len(keys) - 1:
+            keys.pop()
+            while keys and keys[-1] is self._HOLE:
+                keys.pop()
+                self._holes -= 1
+            return
+        keys[position] = self._HOLE
+        self._holes += 1
+        if self._holes > len(self._positions):
+            self._compact()
+
+    def pop(self, index=-1):
+        key = self[index]
+        self.remove(key)
+        return key
+
+    def index(self, key):
+        if self._holes:
+            self._compact()
+        try:
+            return self._positions[key]
+        except KeyError:
+            raise ValueError('%r is not in list' % (key,))
+
+    def _compact(self):
+        hole = self._HOLE
+        self._keys = [key for key in self._keys if not key is hole]
+        self._positions = dict((key, position) for position, key in enumerate(self._keys))
+        self._holes = 0
+
+
 class _EventDictionary(dict, EventSource):
     """This dictionary allows to be notified if its content is changed.
     """
     changed = False
+    # the keys changed since the last align_version, None if there are not
+    changed_keys = None
     def __init__(self, *args, **kwargs):
         super(_EventDictionary, self).__init__(*args, **kwargs)
         EventSource.__init__(self, *args, **kwargs)
 
+    def _record_changed_keys(self, keys):
+        if self.changed_keys is None:
+            self.changed_keys = set()
+        self.changed_keys.update(keys)
+
     def __setitem__(self, key, value):
         if key in self:
             if self[key] == value:
                 return
         ret = super(_EventDictionary, self).__setitem__(key, value)
+        self._record_changed_keys((key,))
         self.onchange()
         return ret
 
@@ -246,6 +374,7 @@ class _EventDictionary(dict, EventSource):
         if key not in self:
             return
         ret = super(_EventDictionary, self).__delitem__(key)
+        self._record_changed_keys((key,))
         self.onchange()
         return ret
 
@@ -253,16 +382,19 @@ class _EventDictionary(dict, EventSource):
         if key not in self:
             return
         ret = super(_EventDictionary, self).pop(key, d)
+        self._record_changed_keys((key,))
         self.onchange()
         return ret
 
     def clear(self):
+        self._record_changed_keys(self.keys())
         ret = super(_EventDictionary, self).clear()
         self.onchange()
         return ret
 
     def update(self, d):
         ret = super(_EventDictionary, self).update(d)
+        self._record_changed_keys(d.keys())
         self.onchange()
         return ret
 
@@ -271,6 +403,7 @@ class _EventDictionary(dict, EventSource):
 
     def align_version(self):
         self.changed = False
+        self.changed_keys = None
 
     @decorate_event
     def onchange(self):
@@ -286,6 +419,15 @@ class Tag(object):
     but it is not necessarily graphically representable.
     """
 
+    # maximum number of children added or removed between two repr, to be patched by key
+    _CHILDREN_LOG_LENGTH = 64
+    # maximum number of changed children whose representation is replaced in the previous innerHTML
+    _SPLICE_LIMIT = 16
+    # nesting level of batch, and the notification to be sent to the parent at its end
+    # (None if there are not, otherwise the child_ignore_update of _need_update)
+    _batch_depth = 0
+    _batch_ignore_update = None
+
     def __init__(self, attributes=None, _type='', _class=None,  **kwargs):
         """
         Args:
@@ -297,10 +439,23 @@ class Tag(object):
         if attributes is None:
             attributes = {}
         self._parent = None
+        # True if this tag or any of its descendants changed since the last repr
+        self._dirty = True
+        # the children marked dirty since the last repr (None if there are none)
+        self._dirty_children = None
+        # the children added and removed since the last repr, as (added, key, child) entries
+        # (None if never represented or if the changes are too many to be patched)
+        self._children_log = None
+        # the offset of the innerHTML in _backup_repr (None if never represented)
+        self._inner_start = None
+        # the serialized attributes, see _repr_attributes (None if changed since the last repr)
+        self._attributes_repr = None
 
         self.kwargs = kwargs
 
-        self._render_children_list = []
+        self._render_children_list = _RenderChildrenList()
+        # the key of this tag in the children of its parent
+        self._parent_key = None
 
         self.children = _EventDictionary()
         self.attributes = _EventDictionary()  # properties as class id style
@@ -343,19 +498,34 @@ class Tag(object):
         self.attributes['id'] = new_identifier
         runtimeInstances[new_identifier] = self
 
-    def innerHTML(self, local_changed_widgets):
-        ret = ''
+    def _children_repr(self, local_changed_widgets, chunked=False):
+        """Yields the representation of the children, in render order.
+        If chunked is True the children are represented by means of iter_repr.
+        """
         for k in self._render_children_list:
             s = self.children[k]
             if isinstance(s, Tag):
-                ret = ret + s.repr(local_changed_widgets)
+                if chunked:
+                    for chunk in s.iter_repr(local_changed_widgets):
+                        yield chunk
+                else:
+                    yield s.repr(local_changed_widgets)
             elif isinstance(s, type('')):
-                ret = ret + s
+                yield s
             elif isinstance(s, type(u'')):
-                ret = ret + s.encode('utf-8')
+                yield s.encode('utf-8')
             else:
-                ret = ret + repr(s)
-        return ret
+                yield repr(s)
+
+    def innerHTML(self, local_changed_widgets):
+        return ''.join(self._children_repr(local_changed_widgets))
+
+    def iter_repr(self, changed_widgets=None):
+        """Yields the same representation of repr, in chunks.
+        The document tags (HTML, BODY) yield the representation of their children separately,
+        so that the page can be streamed to the client without joining it in a single string.
+        """
+        yield self.repr(changed_widgets)
 
     def repr(self, changed_widgets=None):
         """It is used to automatically represent the object to HTML format
@@ -367,36 +537,290 @@ class Tag(object):
         """
         if changed_widgets is None:
             changed_widgets = {}
+        if not self._dirty:
+            # nothing changed in this subtree, the previous representation is still valid
+            return self._backup_repr
+        self._dirty = False
+        dirty_children = self._dirty_children
+        self._dirty_children = None
+        children_changes = self._children_changes()
+        self._children_log = ()
         local_changed_widgets = {}
-        _innerHTML = self.innerHTML(local_changed_widgets)
+        _innerHTML = None
+        spliced = self._splice_repr(local_changed_widgets, dirty_children, children_changes)
+        if spliced is None:
+            _innerHTML = self.innerHTML(local_changed_widgets)
 
         if self._ischanged() or (len(local_changed_widgets) > 0):
-            self._backup_repr = ''.join(('<', self.type, ' ', self._repr_attributes, '>',
-                                        _innerHTML, '</', self.type, '>'))
-            # faster but unsupported before python3.6
-            # self._backup_repr = f'<{self.type} {self._repr_attributes}>{_innerHTML}</{self.type}>'
+            if spliced is None:
+                head = ''.join(('<', self.type, ' ', self._repr_attributes, '>'))
+                self._backup_repr = ''.join((head, _innerHTML, '</', self.type, '>'))
+                self._inner_start = len(head)
+                # faster but unsupported before python3.6
+                # self._backup_repr = f'<{self.type} {self._repr_attributes}>{_innerHTML}</{self.type}>'
+            elif self.attributes.changed or self.style.changed:
+                head = ''.join(('<', self.type, ' ', self._repr_attributes, '>'))
+                self._backup_repr = head + spliced[self._inner_start:]
+                self._inner_start = len(head)
+            else:
+                self._backup_repr = spliced
         if self._ischanged():
-            # if self changed, no matter about the children because will be updated the entire parent
-            # and so local_changed_widgets is not merged
-            changed_widgets[self] = self._backup_repr
+            patch = self._patch(_innerHTML, local_changed_widgets, children_changes)
+            if patch is None:
+                # if self changed, no matter about the children because will be updated the entire parent
+                # and so local_changed_widgets is not merged
+                changed_widgets[self] = self._backup_repr
+            else:
+                # the patch of self is applied before the updates of the children
+                if patch:
+                    changed_widgets[self] = patch
+                changed_widgets.update(local_changed_widgets)
             self._set_updated()
         else:
             changed_widgets.update(local_changed_widgets)
         return self._backup_repr
 
+    def _log_child(self, added, key, child):
+        """Records a child added or removed by add_child and remove_child,
+        so that the next repr patches only the affected children.
+        """
+        log = self._children_log
+        if log is None:
+            return
+        if not log:
+            self._children_log = [(added, key, child)]
+        elif len(log) < self._CHILDREN_LOG_LENGTH:
+            log.append((added, key, child))
+        else:
+            # too many changes, the element gets represented again
+            self._children_log = None
+
+    def _children_changes(self):
+        """Returns the children removed since the last repr and the (child, previous sibling) pairs
+        of the inserted ones, in order of position, or None if the changes are not described by
+        the log of add_child and remove_child.
+        """
+        log = self._children_log
+        if log is None:
+            return None
+        changed_keys = self.children.changed_keys
+        if not changed_keys:
+            return ((), ()) if not self.children.changed else None
+        if not changed_keys.issubset(set(key for added, key, child in log)):
+            # the children dictionary has been changed directly
+            return None
+        removed = []
+        inserted = {}
+        for added, key, child in log:
+            if not isinstance(child, Tag):
+                return None
+            if added:
+                inserted[child] = key
+            elif child in inserted:
+                del inserted[child]
+            else:
+                removed.append(child)
+        if not inserted:
+            return removed, ()
+        keys = self._render_children_list
+        if len(inserted) > 8:
+            positions = dict((key, index) for index, key in enumerate(keys))
+            position = positions.__getitem__
+        else:
+            # the children are mostly appended
+            position = lambda key: len(keys) - 1 if keys[-1] == key else keys.index(key)
+        positioned = []
+        for child, key in inserted.items():
+            index = position(key)
+            previous = self.children[keys[index - 1]] if index > 0 else None
+            if not (previous is None or isinstance(previous, Tag)):
+                # a text node can't be referenced
+                return None
+            positioned.append((index, child, previous))
+        positioned.sort(key=lambda item: item[0])
+        return removed, [(child, previous) for index, child, previous in positioned]
+
+    def _splice_repr(self, local_changed_widgets, dirty_children, children_changes):
+        """Returns the previous representation where only the changed children are replaced,
+        inserted and removed, or None if it has to be built again from all the children.
+        The opening tag is the previous one.
+        """
+        if self._inner_start is None or children_changes is None:
+            return None
+        removed, inserted = children_changes
+        if dirty_children and (removed or inserted):
+            moved = set(removed)
+            moved.update(child for child, previous in inserted)
+            dirty_children = [child for child in dirty_children if not child in moved]
+        if len(dirty_children or ()) + len(removed) + len(inserted) > self._SPLICE_LIMIT:
+            return None
+        html = self._backup_repr
+        # the removed children first, a child moved into a sibling would be found twice afterwards
+        for child in removed:
+            index = self._find_repr(html, self._inner_start, child)
+            if index < 0:
+                return None
+            html = html[:index] + html[index + len(child._backup_repr):]
+        for child in dirty_children or ():
+            index = self._find_repr(html, self._inner_start, child)
+            if index < 0:
+                return None
+            old = child._backup_repr
+            new = child.repr(local_changed_widgets)
+            if not new is old:
+                html = ''.join((html[:index], new, html[index + len(old):]))
+        for child, previous in inserted:
+            new = child.repr(local_changed_widgets)
+            if previous is None:
+                index = self._inner_start
+            else:
+                # the children are mostly appended, the previous sibling is searched from the end
+                index = self._find_repr(html, self._inner_start, previous, True)
+                if index < 0:
+                    return None
+                index += len(previous._backup_repr)
+            html = ''.join((html[:index], new, html[index:]))
+        return html
+
+    @staticmethod
+    def _find_repr(html, start, child, reverse=False):
+        """Returns the offset of the current representation of child in html, searched from start,
+        or -1. The opening tag up to the unique id is searched, then the whole
+        representation is compared.
+        """
+        child_html = child._backup_repr
+        if not child_html:
+            return -1
+        head_end = child._inner_start or len(child_html)
+        # the attributes after the id can be long, as the points of a polyline
+        id_end = child_html.find('id="%s"' % child.identifier, 0, head_end)
+        head = child_html[:id_end + len(child.identifier) + 5 if id_end >= 0 else head_end]
+        index = html.rfind(head, start) if reverse else html.find(head, start)
+        if index < 0 or not html.startswith(child_html, index):
+            return -1
+        return index
+
+    def _patch(self, inner_html, local_changed_widgets, children_changes):
+        """Returns the list of operations that update the client side element from its previous
+        representation, or None if the element has to be replaced entirely.
+        The operations are tuples (op, identifier, args...) where op is one of
+            'a' set-attr (name, value), 'd' del-attr (name), 's' set-style (name, value or None),
+            't' set-text (html), 'i' insert-child (previous sibling identifier or None, html),
+            'r' remove-child (child identifier)
+        The children are inserted and removed by key, so that the client creates or deletes only the
+        affected nodes. The entries of the inserted children and of their descendants are removed
+        from local_changed_widgets.
+        """
+        if self._inner_start is None:
+            # never represented before
+            return None
+        identifier = self.identifier
+        changed_attributes = self.attributes.changed_keys or ()
+        if 'id' in changed_attributes or 'style' in changed_attributes:
+            return None
+        ops = []
+        for key in changed_attributes:
+            if key in self.attributes:
+                value = self.attributes[key]
+                ops.append(('a', identifier, key, None if value is None else '%s' % value))
+            else:
+                ops.append(('d', identifier, key))
+        if self.style.changed_keys:
+            if 'style' in self.attributes:
+                return None
+            for key in self.style.changed_keys:
+                ops.append(('s', identifier, key, self.style.get(key, None)))
+
+        if self.children.changed:
+            if children_changes is None:
+                if any(isinstance(child, Tag) for child in self.children.values()):
+                    return None
+                ops.append(('t', identifier, inner_html))
+            else:
+                removed, inserted = children_changes
+                for child in removed:
+                    ops.append(('r', identifier, child.identifier))
+                for child, previous in inserted:
+                    ops.append(('i', identifier, None if previous is None else previous.identifier,
+                                child._backup_repr))
+                if inserted:
+                    # the inserted html already contains the changes of the subtrees
+                    inserted_children = set(child for child, previous in inserted)
+                    for widget in list(local_changed_widgets):
+                        node = widget
+                        while node is not None and not node is self:
+                            if node in inserted_children:
+                                del local_changed_widgets[widget]
+                                break
+                            node = node._parent
+
+        size = sum(len(op[-1] or '') + len(identifier) + 12 for op in ops)
+        if size >= len(self._backup_repr):
+            return None
+        return ops
+
+    def _lazy_attribute_changed(self, key, value):
+        """Notifies the change of the attribute key, whose value is an object serialized when
+        represented. Assigning the same object again would not be noticed by the attributes,
+        and the change gets notified at most once per repr.
+        """
+        if not self.attributes.get(key, None) is value:
+            self.attributes[key] = value
+            return
+        if self._dirty and key in (self.attributes.changed_keys or ()):
+            # already notified, the value gets serialized at the next repr
+            return
+        self.attributes._record_changed_keys((key,))
+        self.attributes.onchange()
+
     def _need_update(self, emitter=None, child_ignore_update=False):
         # if there is an emitter, it means self is the actual changed widget
         if not emitter is None:
+            if not emitter is self.children:
+                # serialized again at the next repr
+                self._attributes_repr = None
+            self._set_dirty()
+        if self._batch_depth:
+            # the parent gets notified once, at the end of the batch
+            if self._batch_ignore_update is None:
+                self._batch_ignore_update = child_ignore_update
+            else:
+                self._batch_ignore_update = self._batch_ignore_update and child_ignore_update
+            return
+        if self.refresh_enabled:
+            if self.get_parent():
+                self.get_parent()._need_update(child_ignore_update = (self.ignore_update or child_ignore_update))
+
+    @property
+    def _repr_attributes(self):
+        """The attributes and the style as they appear in the opening tag.
+        They are serialized when represented, and kept until the next change.
+        """
+        if self._attributes_repr is None:
             tmp = dict(self.attributes)
             if len(self.style):
                 tmp['style'] = jsonize(self.style)
             else:
                 tmp.pop('style', None)
-            self._repr_attributes = ' '.join('%s="%s"' % (k, v) if v is not None else k for k, v in
+            self._attributes_repr = ' '.join('%s="%s"' % (k, v) if v is not None else k for k, v in
                                              tmp.items())
-        if self.refresh_enabled:
-            if self.get_parent():
-                self.get_parent()._need_update(child_ignore_update = (self.ignore_update or child_ignore_update))
+        return self._attributes_repr
+
+    def _set_dirty(self):
+        """Marks the path from this tag up to the root, so that repr visits only
+        the changed subtrees and reuses _backup_repr for the others.
+        The marking is independent of refresh_enabled, a change is never lost.
+        """
+        tag = self
+        while isinstance(tag, Tag) and not tag._dirty:
+            tag._dirty = True
+            parent = tag._parent
+            if isinstance(parent, Tag):
+                if parent._dirty_children is None:
+                    # a dict keeps the order of the changes
+                    parent._dirty_children = {}
+                parent._dirty_children[tag] = None
+            tag = parent
 
     def _ischanged(self):
         return self.children.changed or self.attributes.changed or self.style.changed
@@ -406,6 +830,39 @@ class Tag(object):
         self.attributes.align_version()
         self.style.align_version()
 
+    @contextlib.contextmanager
+    def batch(self):
+        """ Groups the changes of this tag and of its descendants:
+            the parent widgets are notified once, at the end of the block, and the changes
+            are sent to the client in a single update.
+            The App.update_lock is held during the block, so that the gui update can't
+                send a part of the changes.
+
+            Usage:
+                with widget.batch():
+                    for item in items:
+                        widget.append(item)
+        """
+        app = self._parent
+        while isinstance(app, Tag):
+            app = app._parent
+        lock = getattr(app, 'update_lock', None)
+        if lock is not None:
+            lock.acquire()
+        try:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._batch_ignore_update is not None:
+                    child_ignore_update = self._batch_ignore_update
+                    self._batch_ignore_update = None
+                    self._need_update(child_ignore_update=child_ignore_update)
+        finally:
+            if lock is not None:
+                lock.release()
+
     def disable_refresh(self):
         """ Prevents the parent widgets to be notified about an update. 
             This is required to improve performances in case of widgets updated 
@@ -465,12 +922,25 @@ class Tag(object):
         if hasattr(value, 'attributes'):
             value.attributes['data-parent-widget'] = self.identifier
             value._parent = self
+            value._parent_key = key
 
+        moved = False
         if key in self.children:
+            if self.children[key] == value:
+                if self._render_children_list[-1] == key:
+                    # already the last child, nothing changes
+                    return
+                # the same content moved to the end, the dictionary would not notice it
+                moved = True
             self._render_children_list.remove(key)
+            self._log_child(False, key, self.children[key])
         self._render_children_list.append(key)
+        self._log_child(True, key, value)
 
         self.children[key] = value
+        if moved:
+            self.children._record_changed_keys((key,))
+            self.children.onchange()
 
     def get_child(self, key):
         """Returns the child identified by 'key'
@@ -491,22 +961,34 @@ class Tag(object):
         for k in list(self.children.keys()):
             self.remove_child(self.children[k])
 
+    def _child_key(self, child):
+        """Returns the key of the child instance, or None if it is not a child of the Tag.
+        """
+        key = getattr(child, '_parent_key', None)
+        if key is not None and self.children.get(key, None) is child:
+            return key
+        if not (child in self.children.values() and hasattr(child, 'identifier')):
+            return None
+        # the children dictionary has been changed directly
+        for k in self.children.keys():
+            if hasattr(self.children[k], 'identifier'):
+                if self.children[k].identifier == child.identifier:
+                    return k
+        return None
+
     def remove_child(self, child):
         """Removes a child instance from the Tag's children.
 
         Args:
             child (Tag): The child to be removed.
         """
-        if child in self.children.values() and hasattr(child, 'identifier'):
-            for k in self.children.keys():
-                if hasattr(self.children[k], 'identifier'):
-                    if self.children[k].identifier == child.identifier:
-                        if k in self._render_children_list:
-                            self._render_children_list.remove(k)
-                        self.children.pop(k)
-                        # when the child is removed we stop the iteration
-                        # this implies that a child replication should not be allowed
-                        break
+        k = self._child_key(child)
+        if k is None:
+            return
+        if k in self._render_children_list:
+            self._render_children_list.remove(k)
+        self._log_child(False, k, self.children[k])
+        self.children.pop(k)
 
 
 class Widget(Tag, EventSource):
@@ -1320,11 +1802,15 @@ class HTML(Tag):
             changed_widgets (dict): A dictionary containing a collection of tags that have to be updated.
                 The tag that have to be updated is the key, and the value is its textual repr.
         """
-        if changed_widgets is None:
-            changed_widgets = {}
+        return ''.join(self.iter_repr(changed_widgets))
+
+    def iter_repr(self, changed_widgets=None):
         local_changed_widgets = {}
         self._set_updated()
-        return ''.join(('<', self.type, '>\n', self.innerHTML(local_changed_widgets), '\n</', self.type, '>'))
+        yield '<' + self.type + '>\n'
+        for chunk in self._children_repr(local_changed_widgets, chunked=True):
+            yield chunk
+        yield '\n</' + self.type + '>'
 
 
 class HEAD(Tag):
@@ -1365,30 +1851,265 @@ class HEAD(Tag):
 
                 var Remi = function() {
                 this._pendingSendMessages = [];
+                this._pendingUpdates = [];
+                this._updatesFrame = null;
                 this._ws = null;
                 this._comTimeout = null;
                 this._failedConnections = 0;
                 this._openSocket();
                 };
 
-                // from http://stackoverflow.com/questions/5515869/string-length-in-bytes-in-javascript
-                // using UTF8 strings I noticed that the javascript .length of a string returned less
-                // characters than they actually were
+                // the javascript .length of a string counts UTF-16 units,
+                // the server expects the length of the UTF-8 encoded string
                 Remi.prototype._byteLength = function(str) {
                     // returns the byte length of an utf8 string
-                    return str.length;
+                    var length = str.length;
+                    for (var i = 0; i < str.length; i++) {
+                        var code = str.charCodeAt(i);
+                        if (code < 0x80) continue;
+                        if (code < 0x800) {
+                            length += 1;
+                        } else if (code >= 0xD800 && code <= 0xDBFF && i + 1 < str.length &&
+                                   str.charCodeAt(i + 1) >= 0xDC00 && str.charCodeAt(i + 1) <= 0xDFFF) {
+                            /*surrogate pair, two units encoded in four bytes*/
+                            length += 2;
+                            i++;
+                        } else {
+                            /*lone surrogates are sent as U+FFFD, three bytes as well*/
+                            length += 2;
+                        }
+                    }
+                    return length;
                 };
 
                 Remi.prototype._paramPacketize = function (ps){
-                    var ret = '';
+                    var fields = [];
                     for (var pkey in ps) {
-                        if( ret.length>0 )ret = ret + '|';
                         var pstring = pkey+'='+ps[pkey];
-                        var pstring_length = this._byteLength(pstring);
-                        pstring = pstring_length+'|'+pstring;
-                        ret = ret + pstring;
+                        fields.push(this._byteLength(pstring)+'|'+pstring);
+                    }
+                    return fields.join('|');
+                };
+
+                Remi.prototype._updateWidget = function(idElem, content){
+                    var elem = document.getElementById(idElem);
+                    /*the widget can be gone, replaced by the update of a parent*/
+                    if( elem===null ) return;
+                    try{
+                        elem.insertAdjacentHTML('afterend',content);
+                        elem.parentElement.removeChild(elem);
+                    }catch(e){
+                        /*Microsoft EDGE doesn't support insertAdjacentHTML for SVGElement*/
+                        var ns = document.createElementNS("http://www.w3.org/2000/svg",'tmp');
+                        ns.innerHTML = content;
+                        elem.parentElement.replaceChild(ns.firstChild, elem);
+                        console.debug(e.message);
+                    }
+                };
+
+                Remi.prototype._unescapeHTML = function(value){
+                    if( value===null ) return '';
+                    if( value.indexOf('&')<0 ) return value;
+                    var textarea = document.createElement('textarea');
+                    textarea.innerHTML = value;
+                    return textarea.value;
+                };
+
+                /*patch operation [op, id, args...], applied without replacing the element*/
+                Remi.prototype._patchWidget = function(op){
+                    var elem = document.getElementById(op[1]);
+                    if( elem===null ) return;
+                    switch( op[0] ){
+                    case 'a': /*set-attr name,value*/
+                        var value = this._unescapeHTML(op[3]);
+                        elem.setAttribute(op[2], value);
+                        /*the attributes that only set the initial state of form elements*/
+                        if( op[2]=='value' ) elem.value = value;
+                        else if( op[2]=='checked' ) elem.checked = true;
+                        else if( op[2]=='selected' ) elem.selected = true;
+                        break;
+                    case 'd': /*del-attr name*/
+                        elem.removeAttribute(op[2]);
+                        if( op[2]=='checked' ) elem.checked = false;
+                        else if( op[2]=='selected' ) elem.selected = false;
+                        break;
+                    case 's': /*set-style name,value (null removes the property)*/
+                        if( op[3]===null ){
+                            elem.style.removeProperty(op[2]);
+                        }else{
+                            var value = this._unescapeHTML(op[3]);
+                            var important = /\\s*!important\\s*$/i;
+                            elem.style.setProperty(op[2], value.replace(important, ''), important.test(value) ? 'important' : '');
+                        }
+                        break;
+                    case 't': /*set-text html*/
+                        elem.innerHTML = op[2];
+                        if( elem.tagName=='TEXTAREA' ) elem.value = elem.defaultValue;
+                        break;
+                    case 'i': /*insert-child previous sibling id (null for the first child),html*/
+                        /*the rows of a table are children of its implicit tbody*/
+                        var container = (elem.tagName=='TABLE' && elem.tBodies.length>0) ? elem.tBodies[0] : elem;
+                        var previous = op[2]===null ? null : document.getElementById(op[2]);
+                        if( previous!==null && previous.parentNode!==container ){
+                            /*a stale copy, in a container to be replaced by an update of the same cycle,
+                              precedes the child in the document: it is searched among the children, mostly appended*/
+                            previous = container.lastElementChild;
+                            while( previous!==null && previous.id!=op[2] ) previous = previous.previousElementSibling;
+                        }
+                        if( previous!==null ){
+                            previous.insertAdjacentHTML('afterend', op[3]);
+                        }else{
+                            container.insertAdjacentHTML(op[2]===null ? 'afterbegin' : 'beforeend', op[3]);
+                        }
+                        break;
+                    case 'r': /*remove-child id*/
+                        var child = document.getElementById(op[2]);
+                        if( child!==null && child!==elem && elem.contains(child) ) child.parentNode.removeChild(child);
+                        break;
+                    }
+                };
+
+                /*widget updates are collected and applied all together in the next animation frame.
+                  An update is [id, html] for a replaced widget or [null, op] for a patch operation*/
+                Remi.prototype._scheduleUpdates = function(updates){
+                    Array.prototype.push.apply(this._pendingUpdates, updates);
+                    if( document.hidden || !window.requestAnimationFrame ){
+                        /*animation frames are not fired for hidden pages*/
+                        this._flushUpdates();
+                        return;
+                    }
+                    if( this._updatesFrame===null ){
+                        var self = this;
+                        this._updatesFrame = window.requestAnimationFrame(function(){
+                            self._updatesFrame = null;
+                            self._flushUpdates();
+                        });
+                    }
+                };
+
+                Remi.prototype._flushUpdates = function(){
+                    if( this._updatesFrame!==null ){
+                        window.cancelAnimationFrame(this._updatesFrame);
+                        this._updatesFrame = null;
+                    }
+                    if( this._pendingUpdates.length==0 )
+                        return;
+                    var updates = this._pendingUpdates;
+                    this._pendingUpdates = [];
+
+                    var focusedElement=-1;
+                    var caretStart=-1;
+                    var caretEnd=-1;
+                    if (document.activeElement)
+                    {
+                        focusedElement = document.activeElement.id;
+                        try{
+                            caretStart = document.activeElement.selectionStart;
+                            caretEnd = document.activeElement.selectionEnd;
+                        }catch(e){console.debug(e.message);}
+                    }
+
+                    for(var i=0; i<updates.length; i++){
+                        if( updates[i][0]===null ){
+                            try{
+                                this._patchWidget(updates[i][1]);
+                            }catch(e){console.debug(e.message);}
+                        }else{
+                            try{
+                                this._updateWidget(updates[i][0], updates[i][1]);
+                            }catch(e){console.debug(e.message);}
+                        }
+                    }
+
+                    var elemToFocus = document.getElementById(focusedElement);
+                    if( elemToFocus != null ){
+                        elemToFocus.focus();
+                        try{
+                            elemToFocus = document.getElementById(focusedElement);
+                            if(caretStart>-1 && caretEnd>-1) elemToFocus.setSelectionRange(caretStart, caretEnd);
+                        }catch(e){console.debug(e.message);}
+                    }
+                    this._drawCharts();
+                };
+
+                Remi.prototype._isNative = function(){
+                    return this._ws !== null && this._ws.protocol == 'remi.native';
+                };
+
+                Remi.prototype._decodeContent = function(content){
+                    return this._isNative() ? content : decodeURIComponent(content);
+                };
+
+                Remi.prototype._encodeMessage = function(message){
+                    return this._isNative() ? message : encodeURIComponent(message);
+                };
+
+                /*binary update batch: '4' followed by (uint16 id length, id, uint32 html length, html)*/
+                Remi.prototype._onBinaryMessage = function(buffer){
+                    var data = new Uint8Array(buffer);
+                    var view = new DataView(buffer);
+                    if( data[0]==54 /*'6'*/ ){
+                        /*image frame: (uint16 id length, id, uint16 mimetype length, mimetype, image data)*/
+                        var decoder = new TextDecoder('utf-8');
+                        var length = view.getUint16(1);
+                        var idElem = decoder.decode(data.subarray(3, 3+length));
+                        var pos = 3+length;
+                        length = view.getUint16(pos);
+                        var mimetype = decoder.decode(data.subarray(pos+2, pos+2+length));
+                        this._showImageFrame(idElem, new Blob([data.subarray(pos+2+length)], {type: mimetype}));
+                        return;
+                    }
+                    if( data[0]!=52 /*'4'*/ ){
+                        console.debug('unknown binary message type ' + data[0]);
+                        return;
                     }
-                    return ret;
+                    var decoder = new TextDecoder('utf-8');
+                    var updates = [];
+                    var pos = 1;
+                    while( pos < data.length ){
+                        var length = view.getUint16(pos);
+                        pos += 2;
+                        var idElem = decoder.decode(data.subarray(pos, pos+length));
+                        pos += length;
+                        length = view.getUint32(pos);
+                        pos += 4;
+                        updates.push([idElem, decoder.decode(data.subarray(pos, pos+length))]);
+                        pos += length;
+                    }
+                    this._scheduleUpdates(updates);
+                };
+
+                /*StreamingImage frame, the frames received while the previous one is decoded are dropped but the newest.
+                  the server sends the next frames once told that the frame has been shown, or dropped*/
+                Remi.prototype._showImageFrame = function(idElem, frame){
+                    var elem = document.getElementById(idElem);
+                    if( elem===null ){
+                        this._frameShown(idElem);
+                        return;
+                    }
+                    if( elem._decoding ){
+                        if( elem._nextFrame ) this._frameShown(idElem);
+                        elem._nextFrame = frame;
+                        return;
+                    }
+                    var self = this;
+                    var url = (typeof frame==='string') ? frame : URL.createObjectURL(frame);
+                    elem._decoding = true;
+                    elem.onload = elem.onerror = function(){
+                        if( elem._frameUrl ) URL.revokeObjectURL(elem._frameUrl);
+                        elem._frameUrl = (typeof frame==='string') ? null : url;
+                        elem._decoding = false;
+                        self._frameShown(idElem);
+                        var next = elem._nextFrame;
+                        elem._nextFrame = null;
+                        if( next ) self._showImageFrame(idElem, next);
+                    };
+                    elem.src = url;
+                };
+
+                Remi.prototype._frameShown = function(idElem){
+                    if( this._ws!==null && this._ws.readyState==1 )
+                        this._ws.send(this._encodeMessage('frame_shown/' + idElem));
                 };
 
                 Remi.prototype._openSocket = function(){
@@ -1399,7 +2120,9 @@ class HEAD(Tag):
 
                     var self = this;
                     try{
-                        this._ws = new WebSocket(ws_wss + '://%(host)s/');
+                        /*the native protocol sends raw utf-8 text, the quoted one url encoded text*/
+                        this._ws = new WebSocket(ws_wss + '://%(host)s/', ['remi.native', 'remi.quoted']);
+                        this._ws.binaryType = 'arraybuffer';
                         console.debug('opening websocket');
 
                         this._ws.onopen = function(evt){
@@ -1415,7 +2138,7 @@ class HEAD(Tag):
                                 self._failedConnections = 0;
 
                                 while(self._pendingSendMessages.length>0){
-                                    self._ws.send(self._pendingSendMessages.shift()); /*without checking ack*/
+                                    self._ws.send(self._encodeMessage(self._pendingSendMessages.shift())); /*without checking ack*/
                                 }
                             }
                             else{
@@ -1426,53 +2149,50 @@ class HEAD(Tag):
                         this._ws.onmessage = function(evt){
                             var received_msg = evt.data;
 
+                            if( received_msg instanceof ArrayBuffer ){
+                                self._onBinaryMessage(received_msg);
+                                return;
+                            }
+
                             if( received_msg[0]=='0' ){ /*show_window*/
+                                /*pending widget updates are superseded by the whole body*/
+                                self._pendingUpdates = [];
                                 var index = received_msg.indexOf(',')+1;
                                 /*var idRootNodeWidget = received_msg.substr(0,index-1);*/
                                 var content = received_msg.substr(index,received_msg.length-index);
 
-                                document.body.innerHTML = decodeURIComponent(content);
+                                document.body.innerHTML = self._decodeContent(content);
+                                self._drawCharts();
                             }else if( received_msg[0]=='1' ){ /*update_widget*/
-                                var focusedElement=-1;
-                                var caretStart=-1;
-                                var caretEnd=-1;
-                                if (document.activeElement)
-                                {
-                                    focusedElement = document.activeElement.id;
-                                    try{
-                                        caretStart = document.activeElement.selectionStart;
-                                        caretEnd = document.activeElement.selectionEnd;
-                                    }catch(e){console.debug(e.message);}
-                                }
                                 var index = received_msg.indexOf(',')+1;
                                 var idElem = received_msg.substr(1,index-2);
                                 var content = received_msg.substr(index,received_msg.length-index);
-
-                                var elem = document.getElementById(idElem);
-                                try{
-                                    elem.insertAdjacentHTML('afterend',decodeURIComponent(content));
-                                    elem.parentElement.removeChild(elem);
-                                }catch(e){
-                                    /*Microsoft EDGE doesn't support insertAdjacentHTML for SVGElement*/
-                                    var ns = document.createElementNS("http://www.w3.org/2000/svg",'tmp');
-                                    ns.innerHTML = decodeURIComponent(content);
-                                    elem.parentElement.replaceChild(ns.firstChild, elem);
-                                    console.debug(e.message);
+                                self._scheduleUpdates([[idElem, self._decodeContent(content)]]);
+                            }else if( received_msg[0]=='4' ){ /*update_widgets batch id,html;id,html;...*/
+                                var items = received_msg.substr(1,received_msg.length-1).split(';');
+                                var updates = [];
+                                for(var i=0; i<items.length; i++){
+                                    var index = items[i].indexOf(',');
+                                    updates.push([decodeURIComponent(items[i].substr(0,index)), decodeURIComponent(items[i].substr(index+1))]);
                                 }
-
-                                var elemToFocus = document.getElementById(focusedElement);
-                                if( elemToFocus != null ){
-                                    elemToFocus.focus();
-                                    try{
-                                        elemToFocus = document.getElementById(focusedElement);
-                                        if(caretStart>-1 && caretEnd>-1) elemToFocus.setSelectionRange(caretStart, caretEnd);
-                                    }catch(e){console.debug(e.message);}
+                                self._scheduleUpdates(updates);
+                            }else if( received_msg[0]=='5' ){ /*patch, json array of operations*/
+                                var ops = JSON.parse(received_msg.substr(1,received_msg.length-1));
+                                var updates = [];
+                                for(var i=0; i<ops.length; i++){
+                                    updates.push([null, ops[i]]);
                                 }
+                                self._scheduleUpdates(updates);
                             }else if( received_msg[0]=='2' ){ /*javascript*/
+                                /*the code may rely on the updated widgets*/
+                                self._flushUpdates();
                                 var content = received_msg.substr(1,received_msg.length-1);
                                 try{
                                     eval(content);
                                 }catch(e){console.debug(e.message);};
+                            }else if( received_msg[0]=='6' ){ /*image frame id,mimetype,base64 data*/
+                                var fields = received_msg.substr(1,received_msg.length-1).split(',');
+                                self._showImageFrame(fields[0], 'data:' + fields[1] + ';base64,' + fields[2]);
                             }else if( received_msg[0]=='3' ){ /*ack*/
                                 self._pendingSendMessages.shift() /*remove the oldest*/
                                 if(self._comTimeout!==null)
@@ -1537,11 +2257,11 @@ class HEAD(Tag):
                 Remi.prototype.sendCallbackParam = function (widgetID,functionName,params /*a dictionary of name:value*/){
                     var paramStr = '';
                     if(params!==null) paramStr=this._paramPacketize(params);
-                    var message = encodeURIComponent(unescape('callback' + '/' + widgetID+'/'+functionName + '/' + paramStr));
+                    var message = 'callback' + '/' + widgetID+'/'+functionName + '/' + paramStr;
                     this._pendingSendMessages.push(message);
                     if( this._pendingSendMessages.length < %(max_pending_messages)s ){
                         if (this._ws !== null && this._ws.readyState == 1)
-                            this._ws.send(message);
+                            this._ws.send(this._encodeMessage(message));
                             if(this._comTimeout===null)
                                 this._comTimeout = setTimeout(this._checkTimeout, %(messaging_timeout)s);
                     }else{
@@ -1603,6 +2323,167 @@ class HEAD(Tag):
                     xhr.send(fd);
                 };
 
+                /*TimeSeriesChart: canvas elements drawn from the data-view and data-append attributes*/
+                Remi.prototype._drawCharts = function(){
+                    var charts = document.getElementsByClassName('TimeSeriesChart');
+                    for(var i=0; i<charts.length; i++){
+                        try{
+                            this._updateChart(charts[i]);
+                        }catch(e){console.debug(e.message);}
+                    }
+                };
+
+                Remi.prototype._updateChart = function(canvas){
+                    var chart = canvas._chart;
+                    if( chart===undefined ){
+                        chart = canvas._chart = {viewText: null, appendText: null, viewSeq: null, seq: 0, resync: null, local: false, timer: null};
+                        this._bindChart(canvas, chart);
+                    }
+                    var changed = false;
+                    var text = canvas.getAttribute('data-view');
+                    if( text!==null && text!==chart.viewText ){
+                        chart.viewText = text;
+                        var view = JSON.parse(text);
+                        chart.viewSeq = view.seq;
+                        chart.seq = view.append;
+                        chart.x0 = view.x[0];
+                        chart.x1 = view.x[1];
+                        chart.follow = view.follow;
+                        chart.buckets = view.buckets;
+                        chart.series = view.series;
+                        chart.local = false;
+                        changed = true;
+                    }
+                    text = canvas.getAttribute('data-append');
+                    if( text!==null && text!==chart.appendText && chart.viewSeq!==null ){
+                        chart.appendText = text;
+                        var append = JSON.parse(text);
+                        if( append.view==chart.viewSeq && append.seq==chart.seq+1 ){
+                            chart.seq = append.seq;
+                            if( !chart.local ){
+                                chart.x0 = append.x[0];
+                                chart.x1 = append.x[1];
+                            }
+                            for(var s=0; s<chart.series.length && s<append.p.length; s++){
+                                var points = chart.series[s].p;
+                                Array.prototype.push.apply(points, append.p[s]);
+                                /*the points scrolled out of the range are dropped*/
+                                var drop = 0;
+                                while( drop<points.length && points[drop]<append.x[0] ) drop += 2;
+                                if( drop>0 ) points.splice(0, drop);
+                            }
+                            changed = true;
+                        }else if( append.view>chart.viewSeq || (append.view==chart.viewSeq && append.seq>chart.seq+1) ){
+                            /*some data got lost, e.g. the element has been replaced: the view is requested again*/
+                            if( chart.resync!==chart.viewSeq ){
+                                chart.resync = chart.viewSeq;
+                                this._sendChartRange(canvas, chart, chart.follow);
+                            }
+                        }
+                    }
+                    if( changed || canvas.width!=canvas.clientWidth || canvas.height!=canvas.clientHeight ){
+                        this._drawChart(canvas, chart);
+                    }
+                };
+
+                Remi.prototype._drawChart = function(canvas, chart){
+                    var width = canvas.clientWidth;
+                    var height = canvas.clientHeight;
+                    if( canvas.width!=width || canvas.height!=height ){
+                        canvas.width = width;
+                        canvas.height = height;
+                    }
+                    if( chart.viewSeq!==null && width>0 && chart.buckets!=width && chart.requestedWidth!=width ){
+                        /*the view gets decimated to the width in pixels*/
+                        chart.requestedWidth = width;
+                        this._sendChartRange(canvas, chart, chart.follow);
+                    }
+                    var ctx = canvas.getContext('2d');
+                    ctx.clearRect(0, 0, width, height);
+                    if( !chart.series ) return;
+                    var x0 = chart.x0, x1 = chart.x1;
+                    var ymin = Infinity, ymax = -Infinity;
+                    for(var s=0; s<chart.series.length; s++){
+                        var points = chart.series[s].p;
+                        for(var i=0; i<points.length; i+=2){
+                            if( points[i]<x0 || points[i]>x1 ) continue;
+                            if( points[i+1]<ymin ) ymin = points[i+1];
+                            if( points[i+1]>ymax ) ymax = points[i+1];
+                        }
+                    }
+                    if( ymin>ymax ) return;
+                    if( ymin==ymax ){ ymin -= 1; ymax += 1; }
+                    var margin = 12;
+                    var sx = width/(x1-x0);
+                    var sy = (height-2*margin)/(ymax-ymin);
+                    for(var s=0; s<chart.series.length; s++){
+                        var points = chart.series[s].p;
+                        ctx.strokeStyle = chart.series[s].color;
+                        ctx.lineWidth = chart.series[s].width;
+                        ctx.beginPath();
+                        for(var i=0; i<points.length; i+=2){
+                            var x = (points[i]-x0)*sx;
+                            var y = height-margin-(points[i+1]-ymin)*sy;
+                            if( i==0 ) ctx.moveTo(x, y); else ctx.lineTo(x, y);
+                        }
+                        ctx.stroke();
+                    }
+                    ctx.fillStyle = '#666';
+                    ctx.font = '10px sans-serif';
+                    ctx.fillText(ymax.toPrecision(4), 2, margin-2);
+                    ctx.fillText(ymin.toPrecision(4), 2, height-2);
+                };
+
+                Remi.prototype._sendChartRange = function(canvas, chart, follow){
+                    var params={};
+                    params['x0'] = chart.x0;
+                    params['x1'] = chart.x1;
+                    params['follow'] = follow ? '1' : '0';
+                    params['width'] = Math.max(1, canvas.clientWidth);
+                    this.sendCallbackParam(canvas.id, 'onrangechange', params);
+                };
+
+                Remi.prototype._bindChart = function(canvas, chart){
+                    var self = this;
+                    var rangeChanged = function(){
+                        /*redrawn at once from the points available, decimated again by the server*/
+                        chart.local = true;
+                        self._drawChart(canvas, chart);
+                        if( chart.timer!==null ) clearTimeout(chart.timer);
+                        chart.timer = setTimeout(function(){
+                            chart.timer = null;
+                            self._sendChartRange(canvas, chart, false);
+                        }, 150);
+                    };
+                    canvas.addEventListener('wheel', function(e){
+                        e.preventDefault();
+                        var factor = e.deltaY>0 ? 1.25 : 0.8;
+                        var rect = canvas.getBoundingClientRect();
+                        var x = chart.x0 + (e.clientX-rect.left)/rect.width*(chart.x1-chart.x0);
+                        chart.x0 = x - (x-chart.x0)*factor;
+                        chart.x1 = x + (chart.x1-x)*factor;
+                        rangeChanged();
+                    });
+                    canvas.addEventListener('mousedown', function(e){
+                        chart.drag = e.clientX;
+                    });
+                    canvas.addEventListener('mousemove', function(e){
+                        if( !chart.drag ) return;
+                        var dx = (chart.drag-e.clientX)/canvas.clientWidth*(chart.x1-chart.x0);
+                        chart.drag = e.clientX;
+                        chart.x0 += dx;
+                        chart.x1 += dx;
+                        rangeChanged();
+                    });
+                    canvas.addEventListener('mouseup', function(e){ chart.drag = null; });
+                    canvas.addEventListener('mouseleave', function(e){ chart.drag = null; });
+                    canvas.addEventListener('dblclick', function(e){
+                        if( chart.timer!==null ) clearTimeout(chart.timer);
+                        chart.timer = null;
+                        self._sendChartRange(canvas, chart, true);
+                    });
+                };
+
                 window.onerror = function(message, source, lineno, colno, error) {
                     var params={};params['message']=message;
                     params['source']=source;
@@ -1614,6 +2495,8 @@ class HEAD(Tag):
                 };
                 
                 window.remi = new Remi();
+                window.addEventListener('load', function(){ remi._drawCharts(); });
+                window.addEventListener('resize', function(){ remi._drawCharts(); });
 
                 </script>""" % {'host':net_interface_ip,
                                 'max_pending_messages':pending_messages_queue_length,
@@ -1658,6 +2541,15 @@ class BODY(Container):
 
         self.append(loading_container)
 
+    def iter_repr(self, changed_widgets=None):
+        # the root widget has the App as parent, and so the body is not notified about its changes.
+        # The body is represented from scratch here, in order to serve the actual page.
+        local_changed_widgets = {}
+        yield ''.join(('<', self.type, ' ', self._repr_attributes, '>'))
+        for chunk in self._children_repr(local_changed_widgets, chunked=True):
+            yield chunk
+        yield '</' + self.type + '>'
+
     @decorate_set_on_listener("(self, emitter)")
     @decorate_event_js("""remi.sendCallback('%(emitter_identifier)s','%(event_name)s');""")
     def onload(self):
@@ -2063,7 +2955,7 @@ class TabBox(Container):
         self.container_tab_titles.onselection.do(self.on_tab_selection)
         super(TabBox, self).append(self.container_tab_titles, "_container_tab_titles")
         self.selected_widget_key = None
-        self.tab_keys_ordered_list = []
+        self.tab_keys_ordered_list = _RenderChildrenList()
 
     def resize_tab_titles(self):
         nch=len(self.container_tab_titles.children.values())
@@ -2097,12 +2989,7 @@ class TabBox(Container):
             self.on_tab_selection(None, self.selected_widget_key)
 
     def remove_child(self, widget):
-        key = None
-        for k in self.children.keys():
-            if hasattr(self.children[k], "identifier"):
-                if self.children[k].identifier == widget.identifier:
-                    key = k
-                    break
+        key = self._child_key(widget)
         if key:
             self.tab_keys_ordered_list.remove(key)
             self.container_tab_titles.remove_child(self.container_tab_titles.children[key])
@@ -2126,10 +3013,9 @@ class TabBox(Container):
         return (self.selected_widget_key,)
 
     def select_by_widget(self, widget):
-        for k in self.children.keys():
-            if self.children[k] is widget:
-                self.on_tab_selection(None, k)
-                return
+        key = self._child_key(widget)
+        if key is not None and self.children[key] is widget:
+            self.on_tab_selection(None, key)
 
     def select_by_key(self, key):
         self.on_tab_selection(None, key)
@@ -2202,6 +3088,47 @@ class _MixinTextualWidget(object):
         return unescape(self.get_child('text'))
 
 
+class _MixinValueIndex(object):
+    """Reverse index value -> key of the items of a selection widget, that allows to select
+    an item by value without scanning the children. The index is built at the first lookup and
+    kept up to date by add_child and remove_child, a missing value rebuilds it once. The items notify the change of their value
+    to the parent by means of _value_changed.
+    """
+    _value_index = None
+
+    def _item_value(self, item):
+        return item.get_value()
+
+    def _index_item(self, key, item):
+        if self._value_index is not None:
+            # as in a linear search, the last item with the value is the one selected
+            self._value_index[self._item_value(item)] = key
+
+    def _unindex_item(self, key, item):
+        if self._value_index is not None and self._value_index.get(self._item_value(item), None) == key:
+            # an item with the same value could precede it, it is found rebuilding the index
+            self._value_index = None
+
+    def _value_changed(self):
+        self._value_index = None
+
+    def _key_of_value(self, value):
+        """Returns the key of the last item with the value, or None.
+        """
+        for rebuild in (False, True):
+            if rebuild or self._value_index is None:
+                self._value_index = {}
+                for key in self.children.keys():
+                    self._index_item(key, self.children[key])
+            key = self._value_index.get(value, None)
+            if key is None:
+                continue
+            # the children dictionary could have been changed directly
+            if key in self.children and self._item_value(self.children[key]) == value:
+                return key
+        return None
+
+
 class Button(Widget, _MixinTextualWidget):
     """The Button widget. Have to be used in conjunction with its event onclick.
         Use Widget.onclick.connect in order to register the listener.
@@ -2572,7 +3499,7 @@ class InputDialog(GenericDialog):
         return (self.inputText.get_text(),)
 
 
-class ListView(Container):
+class ListView(Container, _MixinValueIndex):
     """List widget it can contain ListItems. Add items to it by using the standard append(item, key) function or
     generate a filled list from a string list by means of the function new_from_list. Use the list in conjunction of
     its onselection event. Register a listener with ListView.onselection.connect.
@@ -2626,26 +3553,37 @@ class ListView(Container):
             value.attributes['selected'] = False
         return keys
 
+    def add_child(self, key, value):
+        if not type(value) in (list, tuple, dict) and key in self.children:
+            self._unindex_item(key, self.children[key])
+        super(ListView, self).add_child(key, value)
+        if not type(value) in (list, tuple, dict):
+            self._index_item(key, value)
+
+    def remove_child(self, child):
+        key = self._child_key(child)
+        if key is not None:
+            self._unindex_item(key, child)
+        super(ListView, self).remove_child(child)
+
     def empty(self):
         """Removes all children from the list"""
         self._selected_item = None
         self._selected_key = None
         super(ListView, self).empty()
+        self._value_index = None
 
     @decorate_set_on_listener("(self,emitter,selectedKey)")
     @decorate_event
     def onselection(self, widget):
         """Called when a new item gets selected in the list."""
-        self._selected_key = None
-        for k in self.children:
-            if self.children[k] == widget:  # widget is the selected ListItem
-                self._selected_key = k
-                if (self._selected_item is not None) and self._selectable:
-                    self._selected_item.attributes['selected'] = False
-                self._selected_item = self.children[self._selected_key]
-                if self._selectable:
-                    self._selected_item.attributes['selected'] = True
-                break
+        self._selected_key = self._child_key(widget)  # widget is the selected ListItem
+        if self._selected_key is not None:
+            if (self._selected_item is not None) and self._selectable:
+                self._selected_item.attributes['selected'] = False
+            self._selected_item = self.children[self._selected_key]
+            if self._selectable:
+                self._selected_item.attributes['selected'] = True
         return (self._selected_key,)
 
     def get_item(self):
@@ -2677,10 +3615,11 @@ class ListView(Container):
         Args:
             key (str): The unique string identifier of the item that have to be selected.
         """
+        # only the selected item has to be deselected
+        if self._selected_item is not None:
+            self._selected_item.attributes['selected'] = False
         self._selected_key = None
         self._selected_item = None
-        for item in self.children.values():
-            item.attributes['selected'] = False
 
         if key in self.children:
             self.children[key].attributes['selected'] = True
@@ -2692,19 +3631,12 @@ class ListView(Container):
 
     def select_by_value(self, value):
         """Selects an item by the text content of the child.
+        In case of more items with the same text content, the last one is selected.
 
         Args:
             value (str): Text content of the item that have to be selected.
         """
-        self._selected_key = None
-        self._selected_item = None
-        for k in self.children:
-            item = self.children[k]
-            item.attributes['selected'] = False
-            if value == item.get_value():
-                self._selected_key = k
-                self._selected_item = item
-                self._selected_item.attributes['selected'] = True
+        self.select_by_key(self._key_of_value(value))
 
 
 class ListItem(Widget, _MixinTextualWidget):
@@ -2725,6 +3657,11 @@ class ListItem(Widget, _MixinTextualWidget):
         self.type = 'li'
         self.set_text(text)
 
+    def set_text(self, text):
+        super(ListItem, self).set_text(text)
+        if isinstance(self.get_parent(), _MixinValueIndex):
+            self.get_parent()._value_changed()
+
     def get_value(self):
         """
         Returns:
@@ -2733,7 +3670,224 @@ class ListItem(Widget, _MixinTextualWidget):
         return self.get_text()
 
 
-class DropDown(Container):
+class VirtualListView(Container):
+    """List widget for long sequences of strings, that represents only the rows in view.
+    The data is a sequence, or a function data(start, stop) that returns the values of the rows
+    from start to stop (in this case the length parameter is required, an int or a function).
+    Only the visible rows, plus overscan rows above and below, are represented by ListItems,
+    the others are replaced by two spacers of the same height. The rows get updated when the
+    list is scrolled, the client sends the scroll position by means of the onscroll event.
+    The rows have fixed height, and are identified by their index in the data, that is the key
+    of the onselection event and of select_by_key.
+    """
+
+    EVENT_ONSCROLL = 'onscroll'
+
+    # rows represented if the height of the list is unknown
+    DEFAULT_VISIBLE_ROWS = 30
+
+    def __init__(self, data=(), length=None, item_height=24, overscan=10, selectable=True, *args, **kwargs):
+        """
+        Args:
+            data (sequence, or function): The values of the rows, or a function data(start, stop)
+                that returns them.
+            length (int, or function): The number of rows, required if data is a function.
+            item_height (int): The height of a row in pixels.
+            overscan (int): The number of rows represented above and below the visible ones.
+            selectable (bool): If True the selected row gets highlighted.
+            kwargs: See Container.__init__()
+        """
+        super(VirtualListView, self).__init__(*args, **kwargs)
+        self.type = 'ul'
+        self.item_height = item_height
+        self.overscan = overscan
+        self._selectable = selectable
+        self._selected_key = None
+        self._scroll_top = 0
+        self._client_height = None
+        # the (start, stop) of the represented rows
+        self._window = None
+        self._rows = []
+        self._data = data
+        self._data_length = length
+
+        spacer_style = {'height': '0px', 'padding': '0px', 'margin': '0px', 'border': 'none'}
+        self._top = Widget(_type='li', style=spacer_style)
+        self._bottom = Widget(_type='li', style=spacer_style)
+        self.append(self._top, 'top')
+        self.append(self._bottom, 'bottom')
+
+        # the scroll position is sent at most every 50ms
+        self.attributes[self.EVENT_ONSCROLL] = \
+            "var elem=this;if(!elem._remiScrollPending){elem._remiScrollPending=true;" \
+            "setTimeout(function(){elem._remiScrollPending=false;var params={};" \
+            "params['scroll_top']=elem.scrollTop;params['client_height']=elem.clientHeight;" \
+            "remi.sendCallbackParam('%(id)s','%(evt)s',params);},50);}" % {
+                'id': self.identifier, 'evt': self.EVENT_ONSCROLL}
+        self._update_window()
+
+    @classmethod
+    def new_from_list(cls, items, **kwargs):
+        """Creates the VirtualListView of a string list.
+
+        Args:
+            items (list): list of strings to fill the widget with.
+        """
+        return cls(data=items, **kwargs)
+
+    def set_data(self, data, length=None):
+        """Replaces the data of the list, the selection is cleared.
+
+        Args:
+            data (sequence, or function): The values of the rows, or a function data(start, stop)
+                that returns them.
+            length (int, or function): The number of rows, required if data is a function.
+        """
+        self._data = data
+        self._data_length = length
+        self._selected_key = None
+        self._update_window(True)
+
+    def refresh(self):
+        """Represents again the rows in view, to be called when the data gets changed."""
+        if self._selected_key is not None and self._selected_key >= self._length():
+            self._selected_key = None
+        self._update_window(True)
+
+    def _length(self):
+        if self._data_length is None:
+            return len(self._data)
+        if callable(self._data_length):
+            return self._data_length()
+        return self._data_length
+
+    def _fetch(self, start, stop):
+        if callable(self._data):
+            return list(self._data(start, stop))
+        return list(self._data[start:stop])
+
+    def _visible_rows(self):
+        height = self._client_height
+        if height is None:
+            height = self.style.get('height', '')
+            if not height.endswith('px'):
+                return self.DEFAULT_VISIBLE_ROWS
+            height = float(height[:-2])
+        return max(1, -int(-height // self.item_height))
+
+    def _update_window(self, force=False):
+        count = self._length()
+        visible = self._visible_rows()
+        first = max(0, min(self._scroll_top // self.item_height, count - visible))
+        start = max(0, first - self.overscan)
+        stop = min(count, first + visible + self.overscan)
+        if self._window == (start, stop) and not force:
+            return
+        self._window = (start, stop)
+        values = self._fetch(start, stop)
+        with self.batch():
+            size = visible + 2 * self.overscan
+            if len(self._rows) < size:
+                # the bottom spacer follows the rows
+                self.remove_child(self._bottom)
+                while len(self._rows) < size:
+                    row = ListItem('', style={'height': '%spx' % self.item_height, 'box-sizing': 'border-box',
+                                              'overflow': 'hidden', 'white-space': 'nowrap'})
+                    row.onclick.connect(self.onselection)
+                    row.attributes['selected'] = False
+                    row._row_index = None
+                    self.append(row, 'row%s' % len(self._rows))
+                    self._rows.append(row)
+                self.append(self._bottom, 'bottom')
+            for i, row in enumerate(self._rows):
+                if i < len(values):
+                    row._row_index = start + i
+                    row.set_text('%s' % values[i])
+                    row.attributes['selected'] = self._selectable and row._row_index == self._selected_key
+                    row.style.pop('display', None)
+                else:
+                    row._row_index = None
+                    row.style['display'] = 'none'
+            self._top.style['height'] = '%spx' % (start * self.item_height)
+            self._bottom.style['height'] = '%spx' % (max(0, count - start - len(values)) * self.item_height)
+
+    @decorate_set_on_listener("(self, emitter, scroll_top, client_height)")
+    @decorate_event
+    def onscroll(self, scroll_top, client_height):
+        """Called when the list gets scrolled. The rows in view get represented.
+
+        Args:
+            scroll_top (int): the scroll position in pixels
+            client_height (int): the visible height of the list in pixels
+        """
+        self._scroll_top = max(0, int(float(scroll_top)))
+        self._client_height = int(float(client_height)) or None
+        self._update_window()
+        return (self._scroll_top, self._client_height)
+
+    @decorate_set_on_listener("(self,emitter,selectedKey)")
+    @decorate_event
+    def onselection(self, widget):
+        """Called when a new item gets selected in the list."""
+        self.select_by_key(getattr(widget, '_row_index', None))
+        return (self._selected_key,)
+
+    def get_item(self):
+        """
+        Returns:
+            ListItem: The selected item, if it is represented, or None
+        """
+        for row in self._rows:
+            if self._selected_key is not None and row._row_index == self._selected_key:
+                return row
+        return None
+
+    def get_value(self):
+        """
+        Returns:
+            str: The value of the selected item or None
+        """
+        if self._selected_key is None:
+            return None
+        return self._fetch(self._selected_key, self._selected_key + 1)[0]
+
+    def get_key(self):
+        """
+        Returns:
+            int: The index of the selected item or None if no item is selected.
+        """
+        return self._selected_key
+
+    def select_by_key(self, key):
+        """Selects an item by its index.
+
+        Args:
+            key (int): The index of the item that have to be selected.
+        """
+        self._selected_key = key if key is not None and 0 <= key < self._length() else None
+        for row in self._rows:
+            row.attributes['selected'] = self._selectable and self._selected_key is not None and \
+                row._row_index == self._selected_key
+
+    def set_value(self, value):
+        self.select_by_value(value)
+
+    def select_by_value(self, value):
+        """Selects the first item with the given value.
+
+        Args:
+            value (str): Value of the item that have to be selected.
+        """
+        count = self._length()
+        for start in range(0, count, 1000):
+            for i, item in enumerate(self._fetch(start, min(count, start + 1000))):
+                if item == value:
+                    self.select_by_key(start + i)
+                    return
+        self.select_by_key(None)
+
+
+class DropDown(Container, _MixinValueIndex):
     """Drop down selection widget. Implements the onchange(value) event. Register a listener for its selection change
     by means of the function DropDown.onchange.connect.
     """
@@ -2773,10 +3927,27 @@ class DropDown(Container):
             self.select_by_value(value.value)
         return keys
 
+    def add_child(self, key, value):
+        if not type(value) in (list, tuple, dict) and key in self.children:
+            self._unindex_item(key, self.children[key])
+        super(DropDown, self).add_child(key, value)
+        if not type(value) in (list, tuple, dict):
+            self._index_item(key, value)
+
+    def remove_child(self, child):
+        key = self._child_key(child)
+        if key is not None:
+            self._unindex_item(key, child)
+        super(DropDown, self).remove_child(child)
+
     def empty(self):
         self._selected_item = None
         self._selected_key = None
         super(DropDown, self).empty()
+        self._value_index = None
+
+    def _item_value(self, item):
+        return item.value
 
     def select_by_key(self, key):
         """Selects an item by its unique string identifier.
@@ -2784,9 +3955,9 @@ class DropDown(Container):
         Args:
             key (str): Unique string identifier of the DropDownItem that have to be selected.
         """
-        for item in self.children.values():
-            if 'selected' in item.attributes:
-                del item.attributes['selected']
+        # only the selected item has to be deselected
+        if self._selected_item is not None and 'selected' in self._selected_item.attributes:
+            del self._selected_item.attributes['selected']
         self.children[key].attributes['selected'] = 'selected'
         self._selected_key = key
         self._selected_item = self.children[key]
@@ -2800,18 +3971,15 @@ class DropDown(Container):
         Args:
             value (str): Textual content of the DropDownItem that have to be selected.
         """
-        self._selected_key = None
-        self._selected_item = None
-        for k in self.children:
-            item = self.children[k]
-            if item.value == value:
-                item.attributes['selected'] = 'selected'
-                self._selected_key = k
-                self._selected_item = item
-                log.debug('dropdown selected item with value %s' % value)
-            else:
-                if 'selected' in item.attributes:
-                    del item.attributes['selected']
+        key = self._key_of_value(value)
+        if key is None:
+            if self._selected_item is not None and 'selected' in self._selected_item.attributes:
+                del self._selected_item.attributes['selected']
+            self._selected_key = None
+            self._selected_item = None
+            return
+        self.select_by_key(key)
+        log.debug('dropdown selected item with value %s' % value)
 
     def get_item(self):
         """
@@ -2854,7 +4022,10 @@ class DropDownItem(Widget, _MixinTextualWidget):
         By default it corresponds to the displayed text, unsless it is changes.''', str, {})
     def value(self): return unescape(self.attributes.get('value', '').replace('&nbsp;', ' '))
     @value.setter
-    def value(self, value): self.attributes['value'] = escape(value.replace('&nbsp;', ' '), quote=False)
+    def value(self, value):
+        self.attributes['value'] = escape(value.replace('&nbsp;', ' '), quote=False)
+        if isinstance(self.get_parent(), _MixinValueIndex):
+            self.get_parent()._value_changed()
 
     def __init__(self, text='', *args, **kwargs):
         """
@@ -2914,6 +4085,196 @@ class Image(Widget):
         self.attributes['src'] = image
 
 
+class StreamingImage(Image):
+    """Image showing a live feed, whose frames are pushed to the clients as binary websocket
+    messages instead of being requested by the browser.
+    The frames get encoded by a thread of the widget, out of the App.update_lock. When the frames
+    are pushed faster than they can be encoded, only the newest one is, and a slow client gets
+    only the newest frame queued for it.
+    """
+    # seconds of inactivity after which the encoder thread ends, it starts again at the next frame
+    ENCODER_IDLE_TIMEOUT = 5.0
+
+    def __init__(self, image_format='jpeg', quality=80, *args, **kwargs):
+        """
+        Args:
+            image_format (str): format of the frames sent, 'jpeg', 'webp' or 'png'.
+            quality (int): quality of the encoding, from 0 to 100, for the lossy formats.
+            kwargs: See Widget.__init__()
+        """
+        super(StreamingImage, self).__init__('', *args, **kwargs)
+        self.image_format = image_format
+        self.quality = quality
+        # count of frames encoded, and of frames replaced by a newer one before being encoded
+        self.encoded_frames = 0
+        self.dropped_frames = 0
+        self._frame = None
+        self._frame_condition = threading.Condition()
+        self._encoder = None
+
+    def push_frame(self, frame):
+        """Sends a frame to the clients, without waiting for its encoding.
+
+        Args:
+            frame: the image already encoded in image_format (bytes), or an image
+                that encode_frame encodes.
+        """
+        with self._frame_condition:
+            if self._frame is not None:
+                self.dropped_frames += 1
+            self._frame = frame
+            if self._encoder is None:
+                self._encoder = threading.Thread(target=self._encode_frames)
+                self._encoder.daemon = True
+                self._encoder.start()
+            self._frame_condition.notify()
+
+    def encode_frame(self, frame):
+        """Returns the frame encoded in image_format, as bytes. It gets called by the encoder thread.
+        The bytes are returned as they are, the other frames are expected to be PIL images.
+        Subclasses encode their own image types, like the numpy arrays of OpenCV.
+        """
+        if isinstance(frame, (bytes, bytearray)):
+            return bytes(frame)
+        buffer = io.BytesIO()
+        frame.save(buffer, format=self.image_format.upper(), quality=self.quality)
+        return buffer.getvalue()
+
+    def _encode_frames(self):
+        while True:
+            with self._frame_condition:
+                if self._frame is None:
+                    self._frame_condition.wait(self.ENCODER_IDLE_TIMEOUT)
+                if self._frame is None:
+                    self._encoder = None
+                    return
+                frame, self._frame = self._frame, None
+            try:
+                data = self.encode_frame(frame)
+            except Exception:
+                log.error('StreamingImage: error encoding a frame', exc_info=True)
+                continue
+            self.encoded_frames += 1
+            self._send_frame(data)
+
+    def _send_frame(self, data):
+        app = self._parent
+        while isinstance(app, Tag):
+            app = app._parent
+        if app is None or not hasattr(app, '_send_spontaneous_websocket_message'):
+            # not shown
+            return
+        app._send_spontaneous_websocket_message(
+            encode_image_frame_message(self.identifier, 'image/%s' % self.image_format, data))
+
+
+_image_encoding_executor = None
+_image_encoding_executor_lock = threading.Lock()
+
+
+def _image_encoding_pool():
+    """The threads encoding the images of the ImageEncodeCache instances, one per cpu"""
+    global _image_encoding_executor
+    with _image_encoding_executor_lock:
+        if _image_encoding_executor is None:
+            _image_encoding_executor = ThreadPoolExecutor(max_workers=multiprocessing.cpu_count())
+        return _image_encoding_executor
+
+
+class _SharedEncoding(object):
+    """Stands for the Future of the encoding where concurrent.futures is not available:
+    the first requester encodes the image, the others wait for its result.
+    """
+
+    def __init__(self, encode, image):
+        self._encode = encode
+        self._image = image
+        self._lock = threading.Lock()
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def result(self):
+        with self._lock:
+            if not self._done:
+                try:
+                    self._value = self._encode(self._image)
+                except Exception as e:
+                    self._error = e
+                self._done = True
+                self._image = None
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class ImageEncodeCache(object):
+    """Encoded bytes of the current version of an image, for the endpoints serving it (get_image_data).
+    The image gets encoded once per version, when first requested, by a thread pool sized to the
+    cpu count; the requests arriving meanwhile wait for the same encoding. The responses carry
+    the version as ETag, the server answers 304 to the requests whose If-None-Match matches it.
+
+    Example:
+        def set_image_data(self, img):
+            self.image_cache.set_image(img)
+            self.attributes['src'] = '/%s/get_image_data?version=%s' % (self.identifier, self.image_cache.version)
+
+        def get_image_data(self, version=0):
+            return self.image_cache.response()
+    """
+
+    def __init__(self, encode, mimetype='image/png'):
+        """
+        Args:
+            encode (function): called with an image, returns its encoded bytes.
+                It runs in the thread pool, out of the App.update_lock.
+            mimetype (str): Content-type of the encoded bytes.
+        """
+        self.encode = encode
+        self.mimetype = mimetype
+        # incremented by set_image
+        self.version = 0
+        # count of encodings done
+        self.encodings = 0
+        # distinguishes the versions of this cache from the ones of a previous run, in the browser cache
+        self._etag_prefix = '%x-%x' % (id(self), int(time.time() * 1000))
+        self._image = None
+        self._encoding = None
+        self._lock = threading.Lock()
+
+    def set_image(self, image):
+        """Sets the image of a new version. It gets encoded only when requested."""
+        with self._lock:
+            self._image = image
+            self._encoding = None
+            self.version += 1
+
+    def get_etag(self):
+        return '"%s-%s"' % (self._etag_prefix, self.version)
+
+    def _encode(self, image):
+        data = self.encode(image)
+        self.encodings += 1
+        return data
+
+    def response(self):
+        """Returns [content, headers] for a get_image_data method, or [None, None] without image.
+        The content is a function returning the encoded bytes, that the server calls after
+        checking the If-None-Match header of the request, out of the App.update_lock.
+        """
+        with self._lock:
+            if self._image is None:
+                return [None, None]
+            if self._encoding is None:
+                if ThreadPoolExecutor is None:
+                    self._encoding = _SharedEncoding(self._encode, self._image)
+                else:
+                    self._encoding = _image_encoding_pool().submit(self._encode, self._image)
+            encoding = self._encoding
+            etag = self.get_etag()
+        return [encoding.result, {'Content-type': self.mimetype, 'Cache-Control': 'no-cache', 'ETag': etag}]
+
+
 class Table(Container):
     """
     table widget - it will contains TableRow
@@ -3062,11 +4423,15 @@ class TableWidget(Table):
         Args:
             table_item (TableItem): an item instance
         """
-        for row_key in self.children.keys():
-            for item_key in self.children[row_key].children.keys():
-                if self.children[row_key].children[item_key] == table_item:
-                    return (int(row_key), int(item_key))
-        return None
+        # the item and its row know their keys, kept up to date by add_child and remove_child
+        row = table_item.get_parent()
+        if not isinstance(row, Tag):
+            return None
+        item_key = row._child_key(table_item)
+        row_key = self._child_key(row)
+        if item_key is None or row_key is None:
+            return None
+        return (int(row_key), int(item_key))
 
     def set_row_count(self, count):
         """Sets the table row count.
@@ -3130,6 +4495,351 @@ class TableWidget(Table):
         return (item, new_value, row, column)
 
 
+class DataTable(Table):
+    """
+    Table widget whose data is kept in a columnar model, and represented one page at a time.
+    The columns are sequences of the same length: lists, array.array or numpy arrays.
+    Only the rows of the current page are represented by TableRow widgets, that are reused when
+    the page, the sort order or the filter changes. The sort permutations and the text index used
+    by the filter are cached, and invalidated when the data changes.
+    The row and column coordinates of the events are the ones of the model.
+    """
+
+    # number of filter results kept in cache
+    FILTER_CACHE_LENGTH = 8
+
+    def __init__(self, columns=(), titles=None, page_size=50, editable=False, *args, **kwargs):
+        """
+        Args:
+            columns (list): list of columns, each column is a sequence of values (list, array, numpy array).
+            titles (list): list of strings, the titles of the columns (None for no title row).
+            page_size (int): number of rows represented in a page.
+            editable (bool): if True the cells can be edited, the changes are stored in the model.
+            kwargs: See Container.__init__()
+        """
+        super(DataTable, self).__init__(*args, **kwargs)
+        self.page_size = page_size
+        self._editable = editable
+        self._rows = []
+        self._title_row = None
+        self.set_data(columns, titles)
+
+    @property
+    def row_count(self):
+        """The number of rows of the model."""
+        return len(self._columns[0]) if self._columns else 0
+
+    @property
+    def column_count(self):
+        return len(self._columns)
+
+    @property
+    def page(self):
+        return self._page
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self._get_view()) // self.page_size))
+
+    def set_data(self, columns, titles=None):
+        """Replaces the model, the page, sort and filter are reset.
+
+        Args:
+            columns (list): list of columns, each column is a sequence of values (list, array, numpy array).
+            titles (list): list of strings, the titles of the columns (None for no title row).
+        """
+        self._columns = list(columns)
+        if not self._columns and titles:
+            self._columns = [[] for title in titles]
+        self._page = 0
+        self._sort_column = None
+        self._sort_reverse = False
+        self._filter_text = ''
+        self._filter_columns = None
+        self._invalidate()
+        with self.batch():
+            for row in self._rows:
+                self.remove_child(row)
+            if self._title_row is not None:
+                self.remove_child(self._title_row)
+            self._rows = []
+            self._title_row = None
+            if titles:
+                self._title_row = TableRow()
+                for column, title in enumerate(titles):
+                    item = TableTitle(title)
+                    self._title_row.append(item, str(column))
+                    item.onclick.do(self._on_title_click, column)
+                self.append(self._title_row, 'title')
+            for i in range(self.page_size):
+                row = TableRow()
+                row._data_row = None
+                for column in range(len(self._columns)):
+                    item = TableEditableItem() if self._editable else TableItem()
+                    item._data_column = column
+                    row.append(item, str(column))
+                    if self._editable:
+                        item.onchange.connect(self._on_item_edited, i, column)
+                self.append(row, 'row%s' % i)
+                self._rows.append(row)
+            self._update_page()
+
+    def refresh(self):
+        """Invalidates the caches and represents again the page, to be called when the
+        columns get changed without using set_cell or append_row.
+        """
+        self._invalidate()
+        self._update_page()
+
+    def _invalidate(self, column=None):
+        if column is None:
+            self._sort_cache = {}
+        else:
+            self._sort_cache.pop(column, None)
+        self._text_indexes = {}
+        self._filter_cache = {}
+        self._view = None
+
+    def get_cell(self, row, column):
+        """Returns the value at the row, column coordinates of the model."""
+        return self._columns[column][row]
+
+    def set_cell(self, row, column, value):
+        """Sets the value at the row, column coordinates of the model.
+        The value gets converted to the type of the previous one, raises ValueError
+        or TypeError if it is not possible.
+        """
+        data = self._columns[column]
+        old = data[row]
+        if old is not None and not isinstance(value, type(old)):
+            value = type(old)(value)
+        data[row] = value
+        self._invalidate(column)
+        self._update_page()
+
+    def append_row(self, values):
+        """Appends a row to the model. The columns must support append (lists and arrays).
+
+        Args:
+            values (iterable): the values of the row, one per column.
+        """
+        values = list(values)
+        if len(values) != len(self._columns):
+            raise ValueError("the row has %s values, the columns are %s" % (len(values), len(self._columns)))
+        for data, value in zip(self._columns, values):
+            if not hasattr(data, 'append'):
+                raise TypeError("the column of type %s can not be extended" % type(data).__name__)
+        for data, value in zip(self._columns, values):
+            data.append(value)
+        self._invalidate()
+        self._update_page()
+
+    def set_page(self, page):
+        """Shows the page at the given zero based index, limited to the available pages."""
+        self._page = max(0, min(page, self.page_count - 1))
+        self._update_page()
+
+    def next_page(self):
+        self.set_page(self._page + 1)
+
+    def previous_page(self):
+        self.set_page(self._page - 1)
+
+    def sort_by(self, column, reverse=False):
+        """Sorts the rows by the values of a column. None restores the model order.
+
+        Args:
+            column (int): the column index, or None.
+            reverse (bool): if True the order is descending.
+        """
+        self._sort_column = column
+        self._sort_reverse = reverse
+        self._view = None
+        if self._title_row is not None:
+            for c, item in self._title_row.children.items():
+                if int(c) == column:
+                    item.attributes['data-sort'] = 'descending' if reverse else 'ascending'
+                else:
+                    item.attributes.pop('data-sort')
+        self.set_page(0)
+
+    def set_filter(self, text, columns=None):
+        """Shows only the rows that contain the text, case insensitive.
+
+        Args:
+            text (str): the text to be found, an empty string removes the filter.
+            columns (list): the indexes of the columns to search in, None for all the columns.
+        """
+        self._filter_text = text.lower()
+        self._filter_columns = None if columns is None else tuple(columns)
+        self._view = None
+        self.set_page(0)
+
+    def _sort_permutation(self, column):
+        permutation = self._sort_cache.get(column, None)
+        if permutation is None:
+            data = self._columns[column]
+            permutation = None
+            try:
+                if hasattr(data, 'argsort'):
+                    # numpy array
+                    permutation = data.argsort(kind='stable').tolist()
+                else:
+                    permutation = sorted(range(len(data)), key=data.__getitem__)
+            except TypeError:
+                # None and values of different types, None first and the values grouped by type
+                permutation = sorted(range(len(data)), key=lambda row: self._sort_key(data[row]))
+            self._sort_cache[column] = permutation
+        return permutation
+
+    @staticmethod
+    def _sort_key(value):
+        if value is None:
+            return (0, '', 0)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (1, '', value)
+        return (2, type(value).__name__, value)
+
+    def _text_index(self, columns):
+        """Returns the text of the rows, lower case, joined in a single string, and the offsets
+        at which the rows start, followed by the length of the text.
+        """
+        index = self._text_indexes.get(columns, None)
+        if index is None:
+            data = [self._columns[c] for c in columns]
+            rows = ['\x1f'.join('%s' % column[r] for column in data).lower() + '\n'
+                    for r in range(self.row_count)]
+            offsets = []
+            offset = 0
+            for row in rows:
+                offsets.append(offset)
+                offset += len(row)
+            offsets.append(offset)
+            index = (''.join(rows), offsets)
+            self._text_indexes[columns] = index
+        return index
+
+    def _filter_rows(self, text, columns):
+        key = (text, columns)
+        rows = self._filter_cache.get(key, None)
+        if rows is None:
+            full_text, offsets = self._text_index(columns)
+            # the text extended while typing matches a subset of the rows of a cached shorter text
+            previous = None
+            for (cached_text, cached_columns), cached_rows in self._filter_cache.items():
+                if cached_columns == columns and text.startswith(cached_text) and \
+                        (previous is None or len(cached_text) > len(previous[0])):
+                    previous = (cached_text, cached_rows)
+            rows = []
+            # the separators can't be part of a match
+            if not ('\x1f' in text or '\n' in text):
+                if previous is not None:
+                    rows = [row for row in previous[1] if full_text.find(text, offsets[row], offsets[row + 1]) >= 0]
+                else:
+                    position = full_text.find(text)
+                    while position >= 0:
+                        row = bisect.bisect_right(offsets, position) - 1
+                        rows.append(row)
+                        position = full_text.find(text, offsets[row + 1])
+            if len(self._filter_cache) >= self.FILTER_CACHE_LENGTH:
+                self._filter_cache.clear()
+            self._filter_cache[key] = rows
+        return rows
+
+    def _get_view(self):
+        """Returns the model indexes of the rows to be shown, in order."""
+        if self._view is None:
+            rows = None
+            if self._filter_text:
+                columns = self._filter_columns
+                if columns is None:
+                    columns = tuple(range(len(self._columns)))
+                rows = self._filter_rows(self._filter_text, columns)
+            if self._sort_column is not None:
+                permutation = self._sort_permutation(self._sort_column)
+                if self._sort_reverse:
+                    permutation = permutation[::-1]
+                if rows is not None:
+                    shown = set(rows)
+                    permutation = [row for row in permutation if row in shown]
+                rows = permutation
+            if rows is None:
+                rows = range(self.row_count)
+            self._view = rows
+        return self._view
+
+    def _update_page(self):
+        view = self._get_view()
+        self._page = max(0, min(self._page, self.page_count - 1))
+        start = self._page * self.page_size
+        rows = view[start:start + self.page_size]
+        with self.batch():
+            for i, row in enumerate(self._rows):
+                if i < len(rows):
+                    row._data_row = rows[i]
+                    for column, data in enumerate(self._columns):
+                        row.children[str(column)].set_text('%s' % data[row._data_row])
+                    row.style.pop('display', None)
+                else:
+                    row._data_row = None
+                    row.style['display'] = 'none'
+
+    def item_coords(self, table_item):
+        """Returns table_item's (row, column) coordinates in the model.
+        Returns None in case of item not found.
+
+        Args:
+            table_item (TableItem): an item instance
+        """
+        row = table_item.get_parent()
+        if getattr(row, '_data_row', None) is None or not row.get_parent() is self:
+            return None
+        return (row._data_row, table_item._data_column)
+
+    def _on_title_click(self, emitter, column):
+        self.on_column_title_click(column)
+
+    def _on_item_edited(self, item, new_value, index, column):
+        row = self._rows[index]._data_row
+        if row is None:
+            return
+        data = self._columns[column]
+        try:
+            self.set_cell(row, column, new_value)
+        except (TypeError, ValueError):
+            # not valid for the column type, the previous value is restored
+            item.set_text('%s' % data[row])
+            return
+        self.on_item_changed(item, new_value, row, column)
+
+    @decorate_set_on_listener("(self, emitter, column)")
+    @decorate_event
+    def on_column_title_click(self, column):
+        """Called when a column title gets clicked. The rows get sorted by the column,
+        in descending order if they were already sorted ascending by it.
+
+        Args:
+            emitter (DataTable): The emitter of the event.
+            column (int): column index.
+        """
+        self.sort_by(column, self._sort_column == column and not self._sort_reverse)
+        return (column, )
+
+    @decorate_set_on_listener("(self, emitter, item, new_value, row, column)")
+    @decorate_event
+    def on_item_changed(self, item, new_value, row, column):
+        """Event for the item change, the value is already stored in the model.
+
+        Args:
+            emitter (DataTable): The emitter of the event.
+            item (TableEditableItem): The TableEditableItem instance.
+            new_value (str): New text content.
+            row (int): row index in the model.
+            column (int): column index.
+        """
+        return (item, new_value, row, column)
+
+
 class TableRow(Container):
     """
     row widget for the Table - it will contains TableItem
@@ -3697,7 +5407,21 @@ class GenericObject(Widget):
 
 
 class FileFolderNavigator(GridBox):
-    """FileFolderNavigator widget."""
+    """FileFolderNavigator widget.
+    The directories are listed by means of os.scandir, and the listings are cached, shared by the
+    instances, until the modification time of the directory changes. A directory whose listing
+    takes more than LISTING_TIMEOUT seconds is listed in background, and shown when the listing is
+    complete. The items are shown page_size at a time, the last item of the page shows the next one.
+    """
+
+    # seconds waited for the listing of a directory, before completing it in background
+    LISTING_TIMEOUT = 0.3
+    # number of directory listings kept in cache
+    LISTING_CACHE_LENGTH = 32
+
+    # directory -> (modification time, sorted list of (name, is_folder))
+    _listing_cache = collections.OrderedDict()
+    _listing_cache_lock = threading.Lock()
 
     @property
     @editor_attribute_decorator("WidgetSpecific", '''Defines wether it is possible to select multiple items.''', bool, {})
@@ -3709,9 +5433,7 @@ class FileFolderNavigator(GridBox):
     @editor_attribute_decorator("WidgetSpecific", '''Defines the actual navigator location.''', str, {})
     def selection_folder(self): return self._selection_folder
     @selection_folder.setter
-    def selection_folder(self, value): 
-        # fixme: we should use full paths and not all this chdir stuff
-        self.chdir(value)  # move to actual working directory
+    def selection_folder(self, value): self.chdir(value)
 
     @property
     @editor_attribute_decorator("WidgetSpecific", '''Defines if files are selectable.''', bool, {})
@@ -3725,7 +5447,7 @@ class FileFolderNavigator(GridBox):
     @allow_folder_selection.setter
     def allow_folder_selection(self, value): self._allow_folder_selection = value
 
-    def __init__(self, multiple_selection = False, selection_folder = ".", allow_file_selection = True, allow_folder_selection = False, **kwargs):
+    def __init__(self, multiple_selection = False, selection_folder = ".", allow_file_selection = True, allow_folder_selection = False, page_size = 500, **kwargs):
         super(FileFolderNavigator, self).__init__(**kwargs)
 
         self.css_grid_template_columns = "30px auto 30px"
@@ -3735,8 +5457,14 @@ class FileFolderNavigator(GridBox):
         self.multiple_selection = multiple_selection
         self.allow_file_selection = allow_file_selection
         self.allow_folder_selection = allow_folder_selection
+        self.page_size = page_size
         self.selectionlist = []
         self.currDir = ''
+        self._last_valid_path = ''
+        # incremented at each chdir, a listing completed in background is shown if it is still the last one
+        self._listing_id = 0
+        self._entries = []
+        self._moreItem = None
         self.controlBack = Button('Up')
         self.controlBack.onclick.connect(self.dir_go_back)
         self.controlGo = Button('Go >>')
@@ -3761,89 +5489,167 @@ class FileFolderNavigator(GridBox):
             self.selectionlist.append(self.currDir)
         return self.selectionlist
 
-    def populate_folder_items(self, directory):
-        def _sort_files(a, b):
-            if os.path.isfile(a) and os.path.isdir(b):
-                return 1
-            elif os.path.isfile(b) and os.path.isdir(a):
-                return -1
-            else:
+    @classmethod
+    def _list_directory(cls, directory):
+        """Returns the content of the directory as a list of (name, is_folder), the folders first,
+        sorted by name ignoring the case and the leading dot.
+        """
+        stat = os.stat(directory)
+        mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)
+        with cls._listing_cache_lock:
+            cached = cls._listing_cache.pop(directory, None)
+            if cached is not None and cached[0] == mtime:
+                cls._listing_cache[directory] = cached
+                return cached[1]
+
+        if hasattr(os, 'scandir'):
+            entries = []
+            for entry in os.scandir(directory):
                 try:
-                    if a[0] == '.':
-                        a = a[1:]
-                    if b[0] == '.':
-                        b = b[1:]
-                    return (1 if a.lower() > b.lower() else -1)
-                except (IndexError, ValueError):
-                    return (1 if a > b else -1)
+                    # the type is known from the directory listing on most platforms
+                    is_folder = not entry.is_file()
+                except OSError:
+                    is_folder = True
+                entries.append((entry.name, is_folder))
+        else:
+            entries = [(name, not os.path.isfile(os.path.join(directory, name))) for name in os.listdir(directory)]
+        entries.sort(key=lambda entry: (not entry[1], (entry[0][1:] if entry[0][:1] == '.' else entry[0]).lower(), entry[0]))
 
-        log.debug("FileFolderNavigator - populate_folder_items")
+        with cls._listing_cache_lock:
+            cls._listing_cache[directory] = (mtime, entries)
+            while len(cls._listing_cache) > cls.LISTING_CACHE_LENGTH:
+                cls._listing_cache.popitem(last=False)
+        return entries
 
-        if pyLessThan3:
+    def populate_folder_items(self, directory):
+        log.debug("FileFolderNavigator - populate_folder_items")
+        if pyLessThan3 and isinstance(directory, str):
             directory = directory.decode('utf-8')
+        self._show_entries(directory, self._list_directory(directory))
 
-        l = os.listdir(directory)
-        l.sort(key=functools.cmp_to_key(_sort_files))
-
+    def _show_entries(self, directory, entries):
         # used to restore a valid path after a wrong edit in the path editor
         self._last_valid_path = directory
+        self._entries = [entry for entry in entries if entry[1] or self.allow_file_selection]
+        self.folderItems = []
+        self._moreItem = None
         # we remove the container avoiding graphic update adding items
         # this speeds up the navigation
         self.remove_child(self.itemContainer)
         # creation of a new instance of a itemContainer
         self.itemContainer = Container(width='100%', height='100%')
         self.itemContainer.style.update({'overflow-y': 'scroll', 'overflow-x': 'hidden'})
-
-        for i in l:
-            full_path = os.path.join(directory, i)
-            is_folder = not os.path.isfile(full_path)
-            if (not is_folder) and (not self.allow_file_selection):
-                continue
-            fi = FileFolderItem(full_path, i, is_folder)
-            fi.onclick.connect(self.on_folder_item_click)  # navigation purpose
-            fi.onselection.connect(self.on_folder_item_selected)  # selection purpose
-            self.folderItems.append(fi)
-            self.itemContainer.append(fi)
+        self.append_page()
         self.append(self.itemContainer, key='items')  # replace the old widget
 
+    def append_page(self):
+        """Shows the next page_size items of the directory.
+        """
+        with self.itemContainer.batch():
+            if self._moreItem is not None:
+                self.itemContainer.remove_child(self._moreItem)
+                self._moreItem = None
+            start = len(self.folderItems)
+            stop = start + self.page_size if self.page_size else len(self._entries)
+            for name, is_folder in self._entries[start:stop]:
+                fi = FileFolderItem(os.path.join(self._last_valid_path, name), name, is_folder)
+                fi.onclick.connect(self.on_folder_item_click)  # navigation purpose
+                fi.onselection.connect(self.on_folder_item_selected)  # selection purpose
+                self.folderItems.append(fi)
+                self.itemContainer.append(fi)
+            if stop < len(self._entries):
+                self._moreItem = Label('... %s more' % (len(self._entries) - stop), _class='FileFolderItemMore')
+                self._moreItem.onclick.connect(self._on_more_click)
+                self.itemContainer.append(self._moreItem)
+
+    def _on_more_click(self, emitter):
+        self.append_page()
+
     def dir_go_back(self, widget):
-        curpath = os.getcwd()  # backup the path
         try:
-            os.chdir(self.pathEditor.get_text())
-            os.chdir('..')
-            self.chdir(os.getcwd())
+            self.chdir(os.path.dirname(os.path.abspath(self.pathEditor.get_text())))
         except Exception as e:
             self.pathEditor.set_text(self._last_valid_path)
             log.error('error changing directory', exc_info=True)
-        os.chdir(curpath)  # restore the path
 
     def dir_go(self, widget):
         # when the GO button is pressed, it is supposed that the pathEditor is changed
-        curpath = os.getcwd()  # backup the path
         try:
-            os.chdir(self.pathEditor.get_text())
-            self.chdir(os.getcwd())
+            self.chdir(self.pathEditor.get_text())
         except Exception as e:
             log.error('error going to directory', exc_info=True)
             self.pathEditor.set_text(self._last_valid_path)
-        os.chdir(curpath)  # restore the path
 
     def chdir(self, directory):
-        self._selection_folder = directory
-        curpath = os.getcwd()  # backup the path
+        """Shows the content of the directory. Relative paths are relative to the working directory
+        of the process, that is not changed.
+        Raises OSError if the directory can't be listed within LISTING_TIMEOUT, otherwise the listing
+        is completed in background.
+        """
+        if pyLessThan3 and isinstance(directory, str):
+            directory = directory.decode('utf-8')
+        directory = os.path.abspath(directory)
         log.debug("FileFolderNavigator - chdir: %s" % directory)
-        for c in self.folderItems:
-            self.itemContainer.remove_child(c)  # remove the file and folders from the view
-        self.folderItems = []
+        self._listing_id += 1
+        listing_id = self._listing_id
+        listing = {}
+        listed = threading.Event()
+        # decides who shows the listing, this thread or the listing one
+        lock = threading.Lock()
+
+        def list_directory():
+            try:
+                listing['entries'] = self._list_directory(directory)
+            except Exception as e:
+                listing['error'] = e
+            with lock:
+                listed.set()
+                background = listing.get('background', False)
+            if background:
+                self._show_background_listing(listing_id, directory, listing)
+
+        thread = threading.Thread(target=list_directory)
+        thread.daemon = True
+        thread.start()
+        listed.wait(self.LISTING_TIMEOUT)
+        with lock:
+            if not listed.is_set():
+                # shown before the listing, that waits for the lock
+                listing['background'] = True
+                self._show_listing_in_progress(directory)
+                return
+        if 'error' in listing:
+            raise listing['error']
+        with self.batch():
+            self._set_folder(directory)
+            self._show_entries(directory, listing['entries'])
+
+    def _set_folder(self, directory):
+        self._selection_folder = directory
         self.selectionlist = []  # reset selected file list
-        os.chdir(directory)
-        directory = os.getcwd()
-        self.disable_refresh()
-        self.populate_folder_items(directory)
-        self.enable_refresh()
         self.pathEditor.set_text(directory)
         self.currDir = directory
-        os.chdir(curpath)  # restore the path
+
+    def _show_listing_in_progress(self, directory):
+        with self.batch():
+            self._set_folder(directory)
+            self.folderItems = []
+            self._entries = []
+            self._moreItem = None
+            self.itemContainer.empty()
+            self.itemContainer.append(Label('listing %s ...' % directory, _class='FileFolderItemMore'))
+
+    def _show_background_listing(self, listing_id, directory, listing):
+        with self.batch():
+            if listing_id != self._listing_id:
+                # another directory has been selected meanwhile
+                return
+            if 'error' in listing:
+                log.error('error listing directory %s: %s' % (directory, listing['error']))
+                self.itemContainer.empty()
+                self.itemContainer.append(Label(str(listing['error']), _class='FileFolderItemMore'))
+                return
+            self._show_entries(directory, listing['entries'])
 
     @decorate_set_on_listener("(self, emitter, selected_item, selection_list)")
     @decorate_event
@@ -3864,7 +5670,7 @@ class FileFolderNavigator(GridBox):
             folderitem.set_selected(True)
         log.debug("FileFolderNavigator - on_folder_item_click")
         # when an item is clicked it is added to the file selection list
-        f = os.path.join(self.pathEditor.get_text(), folderitem.get_text())
+        f = folderitem.path_and_filename
         if f in self.selectionlist:
             self.selectionlist.remove(f)
         else:
@@ -3879,9 +5685,8 @@ class FileFolderNavigator(GridBox):
         """
         log.debug("FileFolderNavigator - on_folder_item_dblclick")
         # when an item is clicked two time
-        f = os.path.join(self.pathEditor.get_text(), folderitem.get_text())
-        if not os.path.isfile(f):
-            self.chdir(f)
+        if folderitem.isFolder:
+            self.chdir(folderitem.path_and_filename)
         return (folderitem, )
 
     def get_selected_filefolders(self):
@@ -4010,42 +5815,200 @@ class MenuItem(Container, _MixinTextualWidget):
         return ()
 
 
+def _tree_node_with(node, name):
+    """Returns the nearest node, from node up to the root of the tree, whose attribute name is not None.
+    """
+    while isinstance(node, (TreeView, TreeItem)):
+        if getattr(node, name, None) is not None:
+            return node
+        node = node.get_parent()
+    return None
+
+
 class TreeView(Container):
-    """TreeView widget can contain TreeItem."""
+    """TreeView widget can contain TreeItem.
+
+    The tree can be built lazily: a TreeItem created with has_children=True has no children until it
+    gets opened the first time, then its children are obtained from the loader, a function loader(item)
+    that returns an iterable of TreeItems or strings. The loader is the one of the nearest TreeItem or
+    TreeView, from the opened item up to the root.
+    The items of long lists are appended page_size at a time, the last item of the page loads the next one.
+    The subtrees loaded by a loader can be evicted, when collapsed since more than evict_timeout seconds,
+    to bound the memory. The eviction is done when an item of the tree gets clicked, or by calling
+    evict_collapsed, for example from App.idle.
+    """
 
-    def __init__(self, *args, **kwargs):
+    # text of the item that loads the next page of a list
+    MORE_ITEMS_TEXT = '...'
+
+    def __init__(self, children=None, loader=None, page_size=None, evict_timeout=None, *args, **kwargs):
         """
         Args:
+            children (Widget, or iterable of Widgets): See Container.__init__()
+            loader (function): function loader(item) that returns the children of a TreeItem
+                created with has_children=True.
+            page_size (int): number of items appended at a time by append_items. None for all the items.
+            evict_timeout (float): seconds after which a collapsed subtree obtained from the loader is evicted.
+                None for no eviction.
             kwargs: See Container.__init__()
         """
-        super(TreeView, self).__init__(*args, **kwargs)
+        self._loader = loader
+        self.page_size = page_size
+        self.evict_timeout = evict_timeout
+        self._pending_items = None
+        self._pending_page_size = None
+        # first item of the next page
+        self._next_item = None
+        self._more_item = None
+        # items collapsed, and their collapse time, in case of eviction
+        self._collapsed_items = {}
+        super(TreeView, self).__init__(children, *args, **kwargs)
         self.type = 'ul'
 
+    def append_items(self, items, page_size=None):
+        """Appends the items of an iterable, a page at a time. The iterable is consumed one page at a time,
+        and the last item of the page loads the next one.
+
+        Args:
+            items (iterable): TreeItems or strings.
+            page_size (int): number of items of a page, if None the page_size of the tree is used.
+        """
+        if page_size is None:
+            node = _tree_node_with(self, 'page_size')
+            page_size = node.page_size if node is not None else None
+        self._pending_items = iter(items)
+        self._pending_page_size = page_size
+        self._next_item = None
+        self.append_page()
+
+    def append_page(self):
+        """Appends the next page of the items given to append_items.
+
+        Returns:
+            int: the number of items appended.
+        """
+        if self._pending_items is None:
+            return 0
+        count = 0
+        with self.batch():
+            if self._more_item is not None:
+                self.remove_child(self._more_item)
+            page_size = self._pending_page_size
+            items = self._pending_items if not page_size else itertools.islice(self._pending_items, page_size + 1)
+            if self._next_item is not None:
+                items = itertools.chain((self._next_item,), items)
+            self._next_item = None
+            for item in items:
+                if page_size and count == page_size:
+                    # there is a next page
+                    self._next_item = item
+                    break
+                if not isinstance(item, Widget):
+                    item = TreeItem(item)
+                self.append(item)
+                count += 1
+            if self._next_item is None:
+                self._pending_items = None
+                self._more_item = None
+                return count
+            if self._more_item is None:
+                self._more_item = TreeItem(self.MORE_ITEMS_TEXT)
+                self._more_item.add_class('TreeItemMore')
+                self._more_item.onclick.do(self._on_more_click, js_stop_propagation=True)
+            self.append(self._more_item)
+        return count
+
+    def _on_more_click(self, emitter):
+        self.append_page()
+
+    def _item_collapsed(self, item):
+        self._collapsed_items[item] = time.time()
+
+    def _item_opened(self, item):
+        self._collapsed_items.pop(item, None)
+
+    def evict_collapsed(self, timeout=None):
+        """Evicts the subtrees, obtained from the loader, collapsed since more than timeout seconds.
+        They get loaded again the next time they are opened.
+
+        Args:
+            timeout (float): if None, the evict_timeout of the tree is used.
+
+        Returns:
+            int: the number of evicted subtrees.
+        """
+        if timeout is None:
+            timeout = self.evict_timeout
+        if timeout is None or not self._collapsed_items:
+            return 0
+        now = time.time()
+        expired = [item for item, t in self._collapsed_items.items() if now - t >= timeout]
+        for item in expired:
+            del self._collapsed_items[item]
+            item.unload_children()
+        return len(expired)
+
 
 class TreeItem(Container, _MixinTextualWidget):
-    """TreeItem widget can contain other TreeItem."""
+    """TreeItem widget can contain other TreeItem.
+    A TreeItem created with has_children=True gets its children from the loader the first time it
+    is opened (see TreeView).
+    """
 
-    def __init__(self, text='', *args, **kwargs):
+    def __init__(self, text='', has_children=False, loader=None, *args, **kwargs):
         """
         Args:
             text (str):
+            has_children (bool): the children are loaded when the item is opened the first time.
+            loader (function): function loader(item) that returns the children of the items of the subtree,
+                if None the loader of the parent items or TreeView is used. Implies has_children.
             kwargs: See Widget.__init__()
         """
         super(TreeItem, self).__init__(*args, **kwargs)
         self.sub_container = None
+        self._loader = loader
+        self._lazy = has_children or loader is not None
         self.type = 'li'
         self.set_text(text)
         self.treeopen = False
         self.attributes['treeopen'] = 'false'
-        self.attributes['has-subtree'] = 'false'
+        self.attributes['has-subtree'] = 'true' if self._lazy else 'false'
         self.onclick.do(None, js_stop_propagation=True)
         
-    def append(self, value, key=''):
+    def _get_sub_container(self):
         if self.sub_container is None:
             self.attributes['has-subtree'] = 'true'
             self.sub_container = TreeView()
             super(TreeItem, self).append(self.sub_container, key='subcontainer')
-        return self.sub_container.append(value, key=key)
+        return self.sub_container
+
+    def append(self, value, key=''):
+        return self._get_sub_container().append(value, key=key)
+
+    def append_items(self, items, page_size=None):
+        """Appends the items of an iterable, a page at a time. See TreeView.append_items.
+        """
+        self._get_sub_container().append_items(items, page_size)
+
+    def load_children(self):
+        """Loads the children from the loader, if the item has been created with has_children=True
+        and they are not loaded yet. Called when the item is opened.
+        """
+        if not self._lazy or self.sub_container is not None:
+            return
+        node = _tree_node_with(self, '_loader')
+        if node is None:
+            return
+        self.append_items(node._loader(self))
+
+    def unload_children(self):
+        """Removes the subtree, if it has been obtained from the loader. It is loaded again
+        the next time the item is opened.
+        """
+        if not self._lazy or self.sub_container is None:
+            return
+        self.remove_child(self.sub_container)
+        self.sub_container = None
 
     @decorate_set_on_listener("(self, emitter)")
     @decorate_event_js("remi.sendCallback('%(emitter_identifier)s','%(event_name)s');")
@@ -4053,8 +6016,16 @@ class TreeItem(Container, _MixinTextualWidget):
         self.treeopen = not self.treeopen
         if self.treeopen:
             self.attributes['treeopen'] = 'true'
+            self.load_children()
         else:
             self.attributes['treeopen'] = 'false'
+        tree = _tree_node_with(self, 'evict_timeout')
+        if tree is not None:
+            if self._lazy and not self.treeopen:
+                tree._item_collapsed(self)
+            else:
+                tree._item_opened(self)
+            tree.evict_collapsed()
         return super(TreeItem, self).onclick()
 
 
@@ -4780,32 +6751,203 @@ class SvgLine(Widget, _MixinSvgStroke, _MixinTransformable):
         self.attr_y2 = y2
 
 
+class _RingBuffer(object):
+    """Sequence of numbers of fixed capacity, stored in an array: once full, appending a value
+    overwrites the oldest one. It supports the operations of a collections.deque used by
+    the previous implementation (append, extend, popleft, clear, len, indexing, iteration).
+    A capacity of 0 means no limit.
+    """
+
+    def __init__(self, capacity=0, typecode='d'):
+        self.maxlen = capacity
+        self._typecode = typecode
+        self._data = array.array(typecode)
+        # index of the oldest value, when full
+        self._start = 0
+        # number of values appended, and number of the other changes, to follow the buffer incrementally
+        self.appended_count = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        data = self._data
+        if self._start == 0:
+            return iter(data)
+        return itertools.chain(data[self._start:], data[:self._start])
+
+    def __getitem__(self, index):
+        length = len(self._data)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('ring buffer index out of range')
+        index += self._start
+        return self._data[index - length if index >= length else index]
+
+    def tail(self, count):
+        """Returns an array of the last count values.
+        """
+        count = min(count, len(self._data))
+        if not count:
+            return array.array(self._typecode)
+        stop = self._start or len(self._data)
+        if count <= stop:
+            return self._data[stop - count:stop]
+        return self._data[len(self._data) - (count - stop):] + self._data[:stop]
+
+    def slice(self, start, stop):
+        """Returns an array of the values from index start to index stop (excluded).
+        """
+        length = len(self._data)
+        start, stop = max(0, start), min(stop, length)
+        if start >= stop:
+            return array.array(self._typecode)
+        start += self._start
+        stop += self._start
+        if stop <= length:
+            return self._data[start:stop]
+        if start >= length:
+            return self._data[start - length:stop - length]
+        return self._data[start:] + self._data[:stop - length]
+
+    def append(self, value):
+        self.appended_count += 1
+        if not self.maxlen or len(self._data) < self.maxlen:
+            self._data.append(value)
+            return
+        self._data[self._start] = value
+        self._start = (self._start + 1) % self.maxlen
+
+    def extend(self, values):
+        values = array.array(self._typecode, values)
+        self.appended_count += len(values)
+        if not self.maxlen:
+            self._data.extend(values)
+            return
+        if len(values) >= self.maxlen:
+            self._data = values[len(values) - self.maxlen:]
+            self._start = 0
+            return
+        free = self.maxlen - len(self._data)
+        if free > 0:
+            self._data.extend(values[:free])
+            values = values[free:]
+        # the remaining values overwrite the oldest ones, in at most two slices
+        while len(values):
+            count = min(len(values), self.maxlen - self._start)
+            self._data[self._start:self._start + count] = values[:count]
+            self._start = (self._start + count) % self.maxlen
+            values = values[count:]
+
+    def popleft(self):
+        if not len(self._data):
+            raise IndexError('pop from an empty ring buffer')
+        value = self[0]
+        self.version += 1
+        if self._start:
+            self._data = array.array(self._typecode, self)
+            self._start = 0
+        del self._data[0]
+        return value
+
+    def clear(self):
+        self._data = array.array(self._typecode)
+        self._start = 0
+        self.version += 1
+
+
+class _SvgPoints(object):
+    """Value of the points attribute of SvgPolyline, serialized from the coordinates when represented.
+    The text of each point is kept, so that only the points appended since the previous
+    serialization get formatted.
+    """
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.ys = ys
+        self._text = None
+        self._tokens = collections.deque()
+        # appended_count and versions of the coordinates represented by the tokens
+        self._state = None
+        self._serialized = ''
+
+    def __str__(self):
+        if self._text is None:
+            xs, ys = self.xs, self.ys
+            state = (xs.appended_count, ys.appended_count, xs.version, ys.version)
+            previous = self._state
+            tokens = self._tokens
+            if previous is not None and previous[2:] == state[2:] and previous[0] == previous[1] and \
+                    state[0] == state[1] and state[0] - previous[0] < len(xs):
+                # only values appended to both the coordinates, the text of the dropped points is cut
+                count = state[0] - previous[0]
+                new_tokens = ['%s,%s' % point for point in zip(xs.tail(count), ys.tail(count))]
+                cut = 0
+                for i in range(len(tokens) + count - len(xs)):
+                    cut += len(tokens.popleft()) + 1
+                text = self._serialized[cut:]
+                tokens.extend(new_tokens)
+                if new_tokens:
+                    text = ' '.join([text] + new_tokens) if text else ' '.join(new_tokens)
+            else:
+                tokens.clear()
+                tokens.extend(['%s,%s' % point for point in zip(xs, ys)])
+                text = ' '.join(tokens)
+            self._serialized = text
+            self._state = state
+            self._text = text
+        return self._text
+
+
 class SvgPolyline(Widget, _MixinSvgStroke, _MixinSvgFill, _MixinTransformable):
+    """Polyline whose coordinates are kept in two ring buffers of maxlen values, coordsX and coordsY.
+    The points attribute is serialized from the coordinates only when the polyline is represented.
+    """
     @property
     @editor_attribute_decorator("WidgetSpecific",'''Defines the maximum values count.''', int, {'possible_values': '', 'min': 0, 'max': 65535, 'default': 0, 'step': 1})
     def maxlen(self): return self.__maxlen
     @maxlen.setter
     def maxlen(self, value): 
         self.__maxlen = int(value)
-        self.coordsX = collections.deque(maxlen=self.__maxlen)
-        self.coordsY = collections.deque(maxlen=self.__maxlen)
+        coordsX = _RingBuffer(self.__maxlen)
+        coordsY = _RingBuffer(self.__maxlen)
+        if hasattr(self, 'coordsX'):
+            # the last maxlen points are kept
+            count = self.__maxlen or len(self.coordsX)
+            coordsX.extend(self.coordsX.tail(count))
+            coordsY.extend(self.coordsY.tail(count))
+        self.coordsX, self.coordsY = coordsX, coordsY
+        self._points = _SvgPoints(self.coordsX, self.coordsY)
+        self._points_changed()
 
     def __init__(self, _maxlen=1000, *args, **kwargs):
         self.__maxlen = 0
         super(SvgPolyline, self).__init__(*args, **kwargs)
         self.type = 'polyline'
-        self.maxlen = _maxlen  # no limit
-        self.attributes['points'] = ''
+        self.maxlen = _maxlen  # 0 for no limit
         self.attributes['vector-effect'] = 'non-scaling-stroke'
 
+    def _points_changed(self):
+        self._points._text = None
+        self._lazy_attribute_changed('points', self._points)
+
     def add_coord(self, x, y):
-        if len(self.coordsX) == self.maxlen:
-            spacepos = self.attributes['points'].find(' ')
-            if spacepos > 0:
-                self.attributes['points'] = self.attributes['points'][spacepos + 1:]
         self.coordsX.append(x)
         self.coordsY.append(y)
-        self.attributes['points'] += "%s,%s " % (x, y)
+        self._points_changed()
+
+    def add_coords(self, xs, ys):
+        """Adds the coordinates of more points, faster than calling add_coord for each one.
+
+        Args:
+            xs (iterable): x coordinates of the points.
+            ys (iterable): y coordinates of the points, as many as the xs.
+        """
+        self.coordsX.extend(xs)
+        self.coordsY.extend(ys)
+        self._points_changed()
 
 
 class SvgPolygon(SvgPolyline, _MixinSvgStroke, _MixinSvgFill, _MixinTransformable):
@@ -4883,3 +7025,346 @@ class SvgPath(Widget, _MixinSvgStroke, _MixinSvgFill, _MixinTransformable):
         self.attributes['d'] = self.attributes['d'] + "A %(rx)s %(ry)s, %(x-axis-rotation)s, %(large-arc-flag)s, %(sweep-flag)s, %(x)s %(y)s"%{'x':x,
             'y': y, 'rx': rx, 'ry': ry, 'x-axis-rotation': x_axis_rotation, 'large-arc-flag': large_arc_flag, 'sweep-flag': sweep_flag}
 
+
+
+def _ring_bisect(ring, value):
+    """Returns the index where value would be inserted in the sorted _RingBuffer ring, before the equal values.
+    """
+    low, high = 0, len(ring)
+    while low < high:
+        middle = (low + high) // 2
+        if ring[middle] < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class _LazyAttribute(object):
+    """Attribute value produced by the function serialize when represented, and kept until text is reset.
+    """
+
+    def __init__(self, serialize):
+        self.serialize = serialize
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            self.text = self.serialize()
+        return self.text
+
+
+class _TimeSeries(object):
+    """Samples of a series of TimeSeriesChart, kept in ring buffers, and their multi-resolution summary:
+    the level k stores the first x, the minimum and the maximum of each block of FANOUT**(k+1) consecutive samples.
+    A range gets decimated from the coarsest level having at least two blocks per bucket, so that the
+    values read are proportional to the buckets count and not to the samples in the range.
+    """
+    FANOUT = 16
+
+    def __init__(self, capacity, color, width):
+        self.color = color
+        self.width = width
+        self.xs = _RingBuffer(capacity)
+        self.ys = _RingBuffer(capacity)
+        # (xs, mins, maxs) of the complete blocks, and [x, min, max, count] of the block being summarized, per level
+        self.levels = []
+        self._blocks = []
+        size = self.FANOUT
+        while size <= capacity:
+            length = capacity // size + 1
+            self.levels.append((_RingBuffer(length), _RingBuffer(length), _RingBuffer(length)))
+            self._blocks.append(None)
+            size *= self.FANOUT
+        # [bucket index, min, max] of the bucket being filled, while the chart follows the samples
+        self.live = None
+
+    def append(self, x, y):
+        self.xs.append(x)
+        self.ys.append(y)
+        low = high = y
+        for level, block in enumerate(self._blocks):
+            if block is None:
+                block = self._blocks[level] = [x, low, high, 0]
+            else:
+                if low < block[1]:
+                    block[1] = low
+                if high > block[2]:
+                    block[2] = high
+            block[3] += 1
+            if block[3] < self.FANOUT:
+                return
+            # the complete block is a sample of the next level
+            xs, mins, maxs = self.levels[level]
+            xs.append(block[0])
+            mins.append(block[1])
+            maxs.append(block[2])
+            self._blocks[level] = None
+            x, low, high = block[0], block[1], block[2]
+
+    def decimate(self, x0, bucket_width, buckets):
+        """Returns the flat list x, y, x, y... of the minimum and the maximum of the samples in each one
+        of the buckets that split the range starting at x0, the x being the center of the bucket.
+        The empty buckets are skipped.
+        """
+        xs, ys = self.xs, self.ys
+        start = _ring_bisect(xs, x0)
+        stop = _ring_bisect(xs, x0 + bucket_width * buckets)
+        # the edges follow the rounding of the bucket index
+        while start > 0 and (xs[start - 1] - x0) // bucket_width >= 0:
+            start -= 1
+        while stop < len(xs) and (xs[stop] - x0) // bucket_width < buckets:
+            stop += 1
+        # absolute index of the oldest sample kept
+        offset = xs.appended_count - len(xs)
+        lows = [float('inf')] * buckets
+        highs = [float('-inf')] * buckets
+
+        def accumulate(x_values, low_values, high_values):
+            for x, low, high in zip(x_values, low_values, high_values):
+                index = int((x - x0) // bucket_width)
+                if 0 <= index < buckets:
+                    if low < lows[index]:
+                        lows[index] = low
+                    if high > highs[index]:
+                        highs[index] = high
+
+        def summarize(level, begin, end):
+            # accumulates the samples from the absolute index begin to end, reading the blocks of the
+            # level that lay in a single bucket, and the finer levels for the others
+            if level < 0:
+                values = ys.slice(begin - offset, end - offset)
+                accumulate(xs.slice(begin - offset, end - offset), values, values)
+                return
+            size = self.FANOUT ** (level + 1)
+            level_xs, mins, maxs = self.levels[level]
+            level_offset = level_xs.appended_count - len(level_xs)
+            first = max(-(-begin // size), level_offset)
+            last = min(end // size, level_xs.appended_count)
+            if first >= last:
+                summarize(level - 1, begin, end)
+                return
+            summarize(level - 1, begin, first * size)
+            block_xs = level_xs.slice(first - level_offset, last - level_offset)
+            block_mins = mins.slice(first - level_offset, last - level_offset)
+            block_maxs = maxs.slice(first - level_offset, last - level_offset)
+            single = 0
+            for block, x in enumerate(block_xs):
+                # the last sample of the block is in the same bucket as the first one
+                if int((x - x0) // bucket_width) != int((xs[(first + block + 1) * size - 1 - offset] - x0) // bucket_width):
+                    accumulate(block_xs[single:block], block_mins[single:block], block_maxs[single:block])
+                    summarize(level - 1, (first + block) * size, (first + block + 1) * size)
+                    single = block + 1
+            accumulate(block_xs[single:], block_mins[single:], block_maxs[single:])
+            summarize(level - 1, last * size, end)
+
+        # the coarsest level having at least two blocks per bucket
+        level, size = -1, self.FANOUT
+        while level + 1 < len(self.levels) and (stop - start) // size >= 2 * buckets:
+            level += 1
+            size *= self.FANOUT
+        summarize(level, offset + start, offset + stop)
+
+        points = []
+        for index, (low, high) in enumerate(zip(lows, highs)):
+            if low <= high:
+                x = x0 + (index + 0.5) * bucket_width
+                points.extend((x, low) if low == high else (x, low, x, high))
+        return points
+
+
+class TimeSeriesChart(Widget):
+    """Chart of time series drawn on a canvas, suited to long acquisitions at high rates.
+    The samples are kept in ring buffers of the given capacity per series, and only the minimum and
+    the maximum per pixel column get sent to the client. While the chart follows the latest samples
+    over the span, the buckets completed since the previous update are the only data sent.
+    The user zooms with the mouse wheel and pans dragging the chart, a double click follows the
+    latest samples again: each view is decimated from a summary of the samples.
+    The x values have to be increasing, typically they are timestamps in seconds.
+    """
+    COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f')
+
+    def __init__(self, span=60.0, capacity=360000, *args, **kwargs):
+        """
+        Args:
+            span (float): width of the x range shown while following the latest samples.
+            capacity (int): count of samples kept per series, the oldest ones get dropped.
+        """
+        super(TimeSeriesChart, self).__init__(*args, **kwargs)
+        self.type = 'canvas'
+        self.span = float(span)
+        self.capacity = capacity
+        width = self.style.get('width', '')
+        # count of buckets of the decimation, the client sends its width in pixels
+        self.buckets = max(1, from_pix(width)) if width.endswith('px') else 800
+        self.series = collections.OrderedDict()
+        self._following = True
+        self._range = (0.0, self.span)
+        # while following, the bucket width and the index of the latest bucket being filled
+        self._bucket_width = self.span / self.buckets
+        self._bucket = None
+        self._view_seq = 0
+        self._view_text = None
+        self._reset_pending = True
+        # sequence number and points per series of the data appended since the previous serialization
+        self._append_seq = 0
+        self._appended = []
+        self._view = _LazyAttribute(self._serialize_view)
+        self._append = _LazyAttribute(self._serialize_append)
+        self.attributes['data-view'] = self._view
+        self.attributes['data-append'] = self._append
+
+    def add_series(self, name, color=None, width=1):
+        """Adds a series, drawn as a line of the given color and width in pixels.
+        """
+        if color is None:
+            color = self.COLORS[len(self.series) % len(self.COLORS)]
+        self.series[name] = _TimeSeries(self.capacity, color, width)
+        self._reset_view()
+
+    def remove_series(self, name):
+        del self.series[name]
+        self._reset_view()
+
+    def add_sample(self, name, x, y):
+        self.add_samples(name, (x,), (y,))
+
+    def add_samples(self, name, xs, ys):
+        """Adds samples to a series, faster than calling add_sample for each one.
+
+        Args:
+            name (str): name of the series.
+            xs (iterable): increasing x values of the samples.
+            ys (iterable): y values of the samples, as many as the xs.
+        """
+        series = self.series[name]
+        if not self._following or self._reset_pending:
+            # the view gets decimated again at the next repr
+            for x, y in zip(xs, ys):
+                series.append(x, y)
+            return
+        bucket_width = self._bucket_width
+        live = series.live
+        points = []
+        for x, y in zip(xs, ys):
+            series.append(x, y)
+            index = int(x // bucket_width)
+            if live is None or index > live[0]:
+                if live is not None:
+                    center = (live[0] + 0.5) * bucket_width
+                    points.extend((center, live[1]) if live[1] == live[2] else (center, live[1], center, live[2]))
+                live = [index, y, y]
+            elif index == live[0]:
+                if y < live[1]:
+                    live[1] = y
+                if y > live[2]:
+                    live[2] = y
+        series.live = live
+        if live is not None and (self._bucket is None or live[0] > self._bucket):
+            self._bucket = live[0]
+        if points:
+            if self._append.text is not None:
+                # the previous points have been serialized, they get replaced
+                self._append_seq += 1
+                self._appended = [[] for s in self.series]
+                self._append.text = None
+            appended = self._appended[list(self.series.keys()).index(name)]
+            appended.extend(points)
+            if len(appended) > 4 * self.buckets:
+                # more than a whole view appended and not represented, the view is decimated again instead
+                self._appended = [[] for s in self.series]
+                self._reset_view()
+                return
+            self._lazy_attribute_changed('data-append', self._append)
+
+    def set_range(self, x0, x1):
+        """Shows the x range from x0 to x1. If x1 is beyond the latest sample, the chart
+        follows the samples over the span x1 - x0.
+        """
+        latest = self._latest()
+        if latest is not None and x1 >= latest:
+            self.follow(x1 - x0)
+            return
+        self._following = False
+        self._range = (float(x0), float(x1))
+        self._reset_view()
+
+    def follow(self, span=None):
+        """Shows the latest samples over the span (the current one if None), as they get added.
+        """
+        if span is not None:
+            self.span = float(span)
+        self._following = True
+        self._reset_view()
+
+    def get_range(self):
+        """Returns the x range shown, (x0, x1)."""
+        self._apply_reset()
+        if self._following:
+            x1 = (self._bucket or 0) * self._bucket_width
+            return (x1 - self.span, x1)
+        return self._range
+
+    def _latest(self):
+        return max([series.xs[-1] for series in self.series.values() if len(series.xs)] or [None])
+
+    def _reset_view(self):
+        self._reset_pending = True
+        self._view.text = None
+        self._lazy_attribute_changed('data-view', self._view)
+
+    def _apply_reset(self):
+        """Decimates the view again, when the range, the buckets count or the series changed.
+        """
+        if not self._reset_pending:
+            return
+        self._reset_pending = False
+        self._view_seq += 1
+        self._append_seq += 1
+        self._appended = [[] for s in self.series]
+        self._append.text = None
+        if self._following:
+            bucket_width = self._bucket_width = self.span / self.buckets
+            latest = self._latest()
+            self._bucket = None if latest is None else int(latest // bucket_width)
+            x1 = (self._bucket or 0) * bucket_width
+            x0 = x1 - self.span
+            for series in self.series.values():
+                series.live = None
+                if len(series.xs) and int(series.xs[-1] // bucket_width) == self._bucket:
+                    # the bucket being filled is sent when complete
+                    values = series.ys.slice(_ring_bisect(series.xs, x1), len(series.ys))
+                    series.live = [self._bucket, min(values), max(values)]
+        else:
+            x0, x1 = self._range
+            bucket_width = (x1 - x0) / self.buckets
+        view = {'seq': self._view_seq, 'append': self._append_seq, 'x': [x0, x1], 'follow': int(self._following),
+                'buckets': self.buckets,
+                'series': [{'name': '%s' % name, 'color': series.color, 'width': series.width,
+                            'p': series.decimate(x0, bucket_width, self.buckets)}
+                           for name, series in self.series.items()]}
+        self._view_text = escape(json.dumps(view, separators=(',', ':')), quote=True)
+
+    def _serialize_view(self):
+        self._apply_reset()
+        return self._view_text
+
+    def _serialize_append(self):
+        self._apply_reset()
+        x0, x1 = self.get_range()
+        append = {'view': self._view_seq, 'seq': self._append_seq, 'x': [x0, x1], 'p': self._appended}
+        return escape(json.dumps(append, separators=(',', ':')), quote=True)
+
+    @decorate_set_on_listener("(self, emitter, x0, x1)")
+    @decorate_event
+    def onrangechange(self, x0, x1, follow, width):
+        """Called when the user zooms or pans the chart, or double clicks it to follow the latest
+        samples again. The client sends its width in pixels, the count of buckets of the view.
+        """
+        self.buckets = max(1, int(float(width)))
+        x0, x1 = float(x0), float(x1)
+        if follow in ('1', 'true'):
+            self.follow(x1 - x0)
+        else:
+            self.set_range(x0, x1)
+        return self.get_range()
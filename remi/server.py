@@ -29,6 +29,8 @@ import mimetypes
 import webbrowser
 import struct
 import base64
+import json
+import contextlib
 import hashlib
 import sys
 import threading
@@ -49,6 +51,8 @@ except ImportError:
     from urllib.parse import parse_qs
 import cgi
 import weakref
+import collections
+import itertools
 
 import zlib
 
@@ -69,6 +73,18 @@ pyLessThan3 = sys.version_info < (3,)
 _MSG_ACK = '3'
 _MSG_JS = '2'
 _MSG_UPDATE = '1'
+_MSG_SHOW_WINDOW = '0'
+_MSG_UPDATE_BATCH = '4'
+_MSG_PATCH = '5'
+_MSG_IMAGE_FRAME = '6'
+# sent by the client when it has shown or dropped an image frame: frame_shown/widget identifier
+_MSG_FRAME_SHOWN = 'frame_shown/'
+
+# websocket subprotocols, negotiated at handshake
+# url encoded payloads, also used with clients that do not negotiate a subprotocol
+_PROTOCOL_QUOTED = 'remi.quoted'
+# raw utf-8 text frames, and binary frames with length prefixed fields for update batches
+_PROTOCOL_NATIVE = 'remi.native'
 
 
 def to_websocket(data):
@@ -85,12 +101,135 @@ def from_websocket(data):
     return unquote(data, encoding='utf-8')
 
 
+def encode_show_window_message(root_identifier, html, protocol):
+    if protocol == _PROTOCOL_NATIVE:
+        return _MSG_SHOW_WINDOW + root_identifier + ',' + html
+    return _MSG_SHOW_WINDOW + root_identifier + ',' + to_websocket(html)
+
+
+def encode_image_frame_message(identifier, mimetype, data):
+    """ Encodes an encoded image (bytes) shown by the StreamingImage widget identifier.
+
+        Returns:
+            bytes: '6' followed by (uint16 id length, id, uint16 mimetype length, mimetype, image data),
+                sent as a binary frame. Python 2 sends text frames only, there the message is
+                '6' id,mimetype,base64 image data
+    """
+    if pyLessThan3:
+        return _MSG_IMAGE_FRAME + identifier + ',' + mimetype + ',' + base64.b64encode(data)
+    identifier = encode_text(identifier)
+    mimetype = encode_text(mimetype)
+    return encode_text(_MSG_IMAGE_FRAME) + struct.pack('>H', len(identifier)) + identifier + \
+        struct.pack('>H', len(mimetype)) + mimetype + bytes(data)
+
+
+def _image_frame_key(identifier):
+    # key of the image frames of a widget in the outbound queue
+    return (_MSG_IMAGE_FRAME, identifier)
+
+
+def encode_update_message(updates, protocol):
+    """ Encodes the widgets updates for the given websocket subprotocol.
+
+        Args:
+            updates (list): list of (identifier, html) tuples
+            protocol (str): _PROTOCOL_NATIVE or _PROTOCOL_QUOTED
+
+        Returns:
+            str or bytes: the message. The native batch message is binary, formatted as
+                '4' followed by (uint16 id length, id, uint32 html length, html) for each widget,
+                with big endian lengths of the utf-8 encoded fields
+    """
+    if len(updates) == 1:
+        identifier, html = updates[0]
+        if protocol == _PROTOCOL_NATIVE:
+            return _MSG_UPDATE + identifier + ',' + html
+        return _MSG_UPDATE + identifier + ',' + to_websocket(html)
+    if protocol == _PROTOCOL_NATIVE:
+        out = bytearray(encode_text(_MSG_UPDATE_BATCH))
+        for identifier, html in updates:
+            identifier = encode_text(identifier)
+            html = encode_text(html)
+            out += struct.pack('>H', len(identifier))
+            out += identifier
+            out += struct.pack('>I', len(html))
+            out += html
+        return bytes(out)
+    # formatted as  id,html;id,html;...  where ids and html are url encoded
+    return _MSG_UPDATE_BATCH + ';'.join(to_websocket(identifier) + ',' + to_websocket(html) for identifier, html in updates)
+
+
+def _split_update_batch(message):
+    """ Splits an update batch message, as returned by encode_update_message.
+
+        Returns:
+            list: (identifier, encoded entry) tuples, the entries keep the encoding of the message
+    """
+    entries = []
+    if isinstance(message, bytes) and not pyLessThan3:
+        i = 1
+        while i < len(message):
+            id_length = struct.unpack('>H', message[i:i + 2])[0]
+            identifier = message[i + 2:i + 2 + id_length].decode('utf-8')
+            end = i + 2 + id_length + 4 + struct.unpack('>I', message[i + 2 + id_length:i + 6 + id_length])[0]
+            entries.append((identifier, message[i:end]))
+            i = end
+        return entries
+    for entry in message[1:].split(';'):
+        entries.append((from_websocket(entry[:entry.find(',')]), entry))
+    return entries
+
+
+def _join_update_batch(message, entries):
+    # the inverse of _split_update_batch, message gives the encoding
+    if isinstance(message, bytes) and not pyLessThan3:
+        return encode_text(_MSG_UPDATE_BATCH) + b''.join(entries)
+    return _MSG_UPDATE_BATCH + ';'.join(entries)
+
+
+def encode_patch_message(patches, protocol):
+    """ Encodes the widgets patches, the same message for both the subprotocols.
+
+        Args:
+            patches (list): list of operations, as returned by Tag._patch
+            protocol (str): _PROTOCOL_NATIVE or _PROTOCOL_QUOTED
+
+        Returns:
+            str: '5' followed by the json array of the operations
+    """
+    return _MSG_PATCH + json.dumps(patches, separators=(',', ':'), ensure_ascii=False)
+
+
 def encode_text(data):
     if not pyLessThan3:
         return data.encode('utf-8')
     return data
 
 
+def websocket_unmask(mask, data):
+    """ Applies the 4 bytes client mask to a websocket frame payload.
+        The payload is processed as a whole big integer instead of byte by byte.
+
+        Args:
+            mask (bytes): the 4 bytes masking key
+            data (bytes): the masked payload
+
+        Returns:
+            bytes: the unmasked payload
+    """
+    length = len(data)
+    if length == 0:
+        return b''
+    if pyLessThan3:
+        mask = bytearray(mask)
+        data = bytearray(data)
+        for i in range(length):
+            data[i] ^= mask[i % 4]
+        return bytes(data)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+
+
 def get_method_by_name(root_node, name):
     val = None
     if hasattr(root_node, name):
@@ -119,14 +258,306 @@ def parse_session_cookie(cookie_to_cook):
     return session_value
 
 
+class PerMessageDeflate(object):
+    """ RFC 7692 permessage-deflate extension state for a single websocket connection.
+        The server side compressor and the client side decompressor are kept
+        across messages unless the context takeover has been disabled.
+    """
+    _tail = b'\x00\x00\xff\xff'
+    # upper bound of an inflated client message
+    max_message_size = 16 * 1024 * 1024
+
+    def __init__(self, threshold, server_max_window_bits, client_max_window_bits,
+                 server_no_context_takeover, client_no_context_takeover):
+        self.threshold = threshold
+        self.server_max_window_bits = server_max_window_bits
+        self.client_max_window_bits = client_max_window_bits
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self._compressor = None
+        self._decompressor = None
+
+    @classmethod
+    def negotiate(cls, header, threshold, window_bits, context_takeover):
+        """ Given the Sec-WebSocket-Extensions request header returns the tuple
+            (PerMessageDeflate instance, response header value), or (None, None)
+            if the client does not offer the extension or the offer is not acceptable.
+        """
+        for offer in header.split(','):
+            tokens = [t.strip() for t in offer.split(';')]
+            if tokens[0] != 'permessage-deflate':
+                continue
+            params = {}
+            valid = True
+            for t in tokens[1:]:
+                if not t:
+                    continue
+                k, _, v = t.partition('=')
+                k = k.strip()
+                v = v.strip().strip('"')
+                if k in params:
+                    valid = False
+                params[k] = v
+            if not valid:
+                continue
+
+            server_bits = window_bits
+            if 'server_max_window_bits' in params:
+                try:
+                    requested = int(params['server_max_window_bits'])
+                except ValueError:
+                    continue
+                # zlib does not support raw deflate streams with an 8 bits window, and
+                # the server can not answer with a window larger than the requested one
+                if not 9 <= requested <= 15:
+                    continue
+                server_bits = min(server_bits, requested)
+
+            client_bits = 15
+            if 'client_max_window_bits' in params:
+                client_bits = window_bits
+                if params['client_max_window_bits']:
+                    try:
+                        requested = int(params['client_max_window_bits'])
+                    except ValueError:
+                        continue
+                    if not 8 <= requested <= 15:
+                        continue
+                    # a client compressing with an 8 bits window is read with a 9 bits decompressor
+                    client_bits = min(client_bits, requested)
+
+            server_no_context_takeover = (not context_takeover) or ('server_no_context_takeover' in params)
+            client_no_context_takeover = (not context_takeover) or ('client_no_context_takeover' in params)
+
+            response = ['permessage-deflate']
+            if server_no_context_takeover:
+                response.append('server_no_context_takeover')
+            if client_no_context_takeover:
+                response.append('client_no_context_takeover')
+            if server_bits < 15 or 'server_max_window_bits' in params:
+                response.append('server_max_window_bits=%s' % server_bits)
+            if 'client_max_window_bits' in params:
+                response.append('client_max_window_bits=%s' % client_bits)
+
+            return (cls(threshold, server_bits, client_bits, server_no_context_takeover,
+                        client_no_context_takeover), '; '.join(response))
+        return None, None
+
+    def compress(self, data):
+        """ Returns the compressed payload, or None if the message is too short
+            to be worth compressing.
+        """
+        if len(data) < self.threshold:
+            return None
+        if self._compressor is None or self.server_no_context_takeover:
+            self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -self.server_max_window_bits)
+        data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data.endswith(self._tail):
+            data = data[:-4]
+        return data
+
+    def decompress(self, data):
+        """ Returns the inflated message, raises ValueError if it would be larger
+            than max_message_size.
+        """
+        if self._decompressor is None or self.client_no_context_takeover:
+            self._decompressor = zlib.decompressobj(-max(9, self.client_max_window_bits))
+        data = self._decompressor.decompress(bytes(data) + self._tail, self.max_message_size)
+        if self._decompressor.unconsumed_tail:
+            # the context can not be resumed after a partial read, the connection gets closed
+            self._decompressor = None
+            raise ValueError("inflated websocket message larger than %s bytes" % self.max_message_size)
+        return data
+
+
+class WebSocketOutboundQueue(object):
+    """ Bounded queue of the messages waiting to be sent to a single websocket client.
+        Producers (the App) never block, a writer drains the queue towards the network.
+        The image frames of a widget replace its pending frame with any policy, and at most
+        FRAMES_IN_FLIGHT of them are sent before the client tells they have been shown:
+        a slow client, or a slow network, gets only the newest frame.
+        When the queue is full, the overflow policy applies:
+            - POLICY_DROP_OLDEST: the oldest message gets discarded
+            - POLICY_COALESCE: an update of a widget replaces its previous pending update,
+                an update batch is merged into the pending batch at the end of the queue
+                and a patch message into the pending patch message at the end of the queue,
+                if the queue is full anyway the client gets disconnected
+            - POLICY_DISCONNECT: the client gets disconnected
+        A disconnected client reconnects and receives a full page refresh.
+    """
+    POLICY_DROP_OLDEST = 'drop_oldest'
+    POLICY_COALESCE = 'coalesce'
+    POLICY_DISCONNECT = 'disconnect'
+    # image frames of a widget sent and not shown yet, and seconds after which a frame counts as shown anyway
+    FRAMES_IN_FLIGHT = 2
+    FRAME_SHOWN_TIMEOUT = 2.0
+
+    def __init__(self, maxlen, policy, notify=None):
+        """
+        Args:
+            maxlen (int): max number of pending messages
+            policy (str): one of POLICY_DROP_OLDEST, POLICY_COALESCE, POLICY_DISCONNECT
+            notify (callable): optional function called after each put and at close,
+                used to wake up a writer that is not waiting on get
+        """
+        if not policy in (self.POLICY_DROP_OLDEST, self.POLICY_COALESCE, self.POLICY_DISCONNECT):
+            raise ValueError('invalid websocket overflow policy: %s' % policy)
+        self.maxlen = maxlen
+        self.policy = policy
+        self.closed = False
+        self._notify = notify
+        self._messages = collections.OrderedDict()
+        self._counter = itertools.count()
+        # send times of the frames in flight, per frame key
+        self._frames_in_flight = {}
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._messages)
+
+    def _frame_key(self, message):
+        if pyLessThan3:
+            if message[:1] == _MSG_IMAGE_FRAME:
+                return _image_frame_key(message[1:message.find(',')])
+            return None
+        if isinstance(message, bytes) and message[:1] == b'6':
+            return _image_frame_key(message[3:3 + struct.unpack('>H', message[1:3])[0]].decode('utf-8'))
+        return None
+
+    def _coalescing_key(self, message):
+        if message[:1] == _MSG_UPDATE:
+            return message[:message.find(',')]
+        if message[:1] == _MSG_SHOW_WINDOW:
+            return _MSG_SHOW_WINDOW
+        return None
+
+    def _merge(self, message):
+        """ Merges a batch or a patch message into the same kind of message pending at the
+            end of the queue, the messages in between could depend on the order otherwise.
+
+            Returns:
+                bool: True if the message has been merged
+        """
+        kind = message[:1]
+        if kind == encode_text(_MSG_UPDATE_BATCH) and isinstance(message, bytes) and not pyLessThan3:
+            kind = _MSG_UPDATE_BATCH
+        if not kind in (_MSG_UPDATE_BATCH, _MSG_PATCH):
+            return False
+        entries = None
+        if kind == _MSG_UPDATE_BATCH:
+            entries = _split_update_batch(message)
+            # the pending single updates of the widgets in the batch are outdated
+            for identifier, entry in entries:
+                self._messages.pop(_MSG_UPDATE + identifier, None)
+        if not self._messages:
+            return False
+        last_key = next(reversed(self._messages))
+        last = self._messages[last_key]
+        if isinstance(last_key, tuple) or type(last) != type(message) or last[:1] != message[:1]:
+            return False
+        if kind == _MSG_PATCH:
+            # both the json arrays are not empty, the operations get applied in sequence
+            self._messages[last_key] = last[:-1] + ',' + message[2:]
+            return True
+        identifiers = set(identifier for identifier, entry in entries)
+        merged = [entry for identifier, entry in _split_update_batch(last) if not identifier in identifiers]
+        merged.extend(entry for identifier, entry in entries)
+        self._messages[last_key] = _join_update_batch(message, merged)
+        return True
+
+    def put(self, message):
+        """ Appends a message without blocking.
+
+            Returns:
+                bool: False if the message cannot be queued and the client has to be disconnected
+        """
+        with self._condition:
+            if self.closed:
+                return False
+            key = self._frame_key(message)
+            merged = False
+            if key is None and self.policy == self.POLICY_COALESCE:
+                merged = self._merge(message)
+                key = self._coalescing_key(message)
+            if not merged:
+                # the newer content is moved to the end, after the updates of its parents
+                if key is not None and key in self._messages:
+                    del self._messages[key]
+                if key is None:
+                    key = next(self._counter)
+                if len(self._messages) >= self.maxlen:
+                    if self.policy == self.POLICY_DROP_OLDEST:
+                        self._messages.popitem(last=False)
+                    else:
+                        return False
+                self._messages[key] = message
+            self._condition.notify()
+        if self._notify:
+            self._notify()
+        return True
+
+    def get(self, block=True):
+        """ Returns the oldest message that can be sent, or None if the queue is closed
+            (or if there is none and not blocking).
+        """
+        with self._condition:
+            while not self.closed:
+                message = self._pop_message()
+                if message is not None or not block:
+                    return message
+                # the frames held wait at most the FRAME_SHOWN_TIMEOUT
+                self._condition.wait(self.FRAME_SHOWN_TIMEOUT if self._messages else None)
+            return None
+
+    def _pop_message(self):
+        now = time.time()
+        for key, message in self._messages.items():
+            if isinstance(key, tuple):
+                sent = self._frames_in_flight.setdefault(key, collections.deque())
+                while sent and now - sent[0] > self.FRAME_SHOWN_TIMEOUT:
+                    sent.popleft()
+                if len(sent) >= self.FRAMES_IN_FLIGHT:
+                    continue
+                sent.append(now)
+            del self._messages[key]
+            return message
+        return None
+
+    def frame_shown(self, identifier):
+        """ The client has shown, or dropped, a frame of the widget identifier: the next one can be sent.
+        """
+        with self._condition:
+            sent = self._frames_in_flight.get(_image_frame_key(identifier))
+            if sent:
+                sent.popleft()
+            self._condition.notify()
+        if self._notify:
+            self._notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._messages.clear()
+            self._condition.notify_all()
+        if self._notify:
+            self._notify()
+
+
 class WebSocketsHandler(socketserver.StreamRequestHandler):
 
     magic = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
 
+    # the permessage-deflate state, if negotiated at handshake
+    deflate = None
+    # the websocket subprotocol, negotiated at handshake
+    protocol = _PROTOCOL_QUOTED
+
     def __init__(self, headers, request, client_address, server, *args, **kwargs):
         self.headers = headers
         self.server = server
         self.handshake_done = False
+        self._outbound = WebSocketOutboundQueue(server.websocket_outbound_queue_length,
+                                                server.websocket_overflow_policy)
         self._log = logging.getLogger('remi.server.ws')
         #self._log.setLevel(logging.DEBUG)
         socketserver.StreamRequestHandler.__init__(self, request, client_address, server, *args, **kwargs)
@@ -142,6 +573,9 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
         # on some systems like ROS, the default socket timeout
         # is less than expected, we force it to infinite (None) as default socket value
         self.request.settimeout(None)
+        writer = threading.Thread(target=self._write_messages)
+        writer.daemon = True
+        writer.start()
         if self.handshake():
             while True:
                 if not self.read_next_message():
@@ -149,6 +583,26 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
                     self.handshake_done = False
                     self._log.debug('ws ending websocket service')
                     break
+        self._outbound.close()
+
+    def _write_messages(self):
+        """ Writer thread, sends the queued messages. This is the only place where the socket
+            can block on send, and where the compression context is used.
+        """
+        while True:
+            message = self._outbound.get()
+            if message is None:
+                break
+            # noinspection PyBroadException
+            try:
+                if self._send_frame(self._build_message_frame(message)):
+                    continue
+            except Exception:
+                self._log.error("sending websocket message", exc_info=True)
+            self._log.debug("communication error with client, closing websocket")
+            self._outbound.close()
+            self.close(terminate_server=False)
+            break
 
     @staticmethod
     def bytetonum(b):
@@ -159,9 +613,9 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
     def read_next_message(self):
         # noinspection PyBroadException
         try:
-            decoded = ''
-            fin = 0
-            while fin == 0:
+            message = None
+            compressed = False
+            while True:
                 head = None
                 try:
                     head = self.rfile.read(2)
@@ -172,31 +626,59 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
                     return False
                 if len(head) < 2:
                     return False
+                head = bytearray(head)
                 opcode = head[0] & 0b1111
                 fin = head[0] >> 7 & 1
                 is_masked = head[1] >> 7 & 1
-                length = self.bytetonum(head[1]) & 127
+                length = head[1] & 127
 
                 if length == 126:
                     length = struct.unpack('>H', self.rfile.read(2))[0]
                 elif length == 127:
                     length = struct.unpack('>Q', self.rfile.read(8))[0]
 
-                masks = []
+                mask = None
                 if is_masked:
-                    masks = [self.bytetonum(byte) for byte in self.rfile.read(4)]
+                    mask = self.rfile.read(4)
 
-                frame_data = ''
-                for char in self.rfile.read(length):
-                    if is_masked:
-                        next_data = chr(self.bytetonum(char) ^ masks[len(frame_data) % 4])
-                        frame_data += next_data
-                    else:
-                        frame_data += chr(self.bytetonum(char))
+                # the whole payload is read at once, and unmasked in bulk
+                frame_data = self.rfile.read(length)
+                if len(frame_data) < length:
+                    return False
+                if is_masked:
+                    frame_data = websocket_unmask(mask, frame_data)
+
+                if opcode == 0x8:
+                    # close frame
+                    return False
+                if opcode & 0x8:
+                    # ping and pong control frames can be interleaved with fragments, they are not part of the message
+                    continue
+
+                if message is None:
+                    # the RSV1 bit of the first frame marks a compressed message
+                    compressed = bool(head[0] & 0x40)
+                    message = frame_data
+                else:
+                    # continuation fragments are collected in a growing buffer
+                    if not isinstance(message, bytearray):
+                        message = bytearray(message)
+                    message += frame_data
 
-                decoded += frame_data
-                self._log.debug('read_message: %s...' % (decoded[:10]))
-            self.on_message(from_websocket(decoded))
+                if fin:
+                    break
+            if compressed:
+                if self.deflate is None:
+                    return False
+                message = self.deflate.decompress(message)
+            if not pyLessThan3:
+                message = bytes(message).decode('utf-8')
+            else:
+                message = str(message)
+            self._log.debug('read_message: %s...' % (message[:10]))
+            if self.protocol == _PROTOCOL_QUOTED:
+                message = from_websocket(message)
+            self.on_message(message)
         except socket.timeout:
             return False
         except Exception:
@@ -208,14 +690,33 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
         if not self.handshake_done:
             self._log.warning("ignoring message %s (handshake not done)" % message[:10])
             return False
-        
-        if message[0] == "2":
-            i = 0
 
         self._log.debug('send_message: %s... -> %s' % (message[:10], self.client_address))
+        # the message is queued, the network is left to the writer
+        if not self._outbound.put(message):
+            self._log.warning("websocket outbound queue overflow, client %s will be disconnected" % (self.client_address,))
+            return False
+        return True
+
+    def _build_message_frame(self, message):
+        """ str messages are sent as text frames, bytes messages as binary frames.
+        """
+        if not pyLessThan3 and isinstance(message, bytes):
+            # the image frames are compressed already
+            return self._build_frame(message, 0x2, message[:1] != b'6')
+        return self._build_frame(encode_text(message))
+
+    def _build_frame(self, message, opcode=0x1, compress=True):
         out = bytearray()
-        out.append(129)
-        length = len(message)
+        payload = None
+        if self.deflate is not None and compress:
+            payload = self.deflate.compress(message)
+        if payload is None:
+            payload = message
+            out.append(0x80 | opcode)
+        else:
+            out.append(0xC0 | opcode)
+        length = len(payload)
         if length <= 125:
             out.append(length)
         elif 126 <= length <= 65535:
@@ -224,10 +725,9 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
         else:
             out.append(127)
             out += struct.pack('>Q', length)
-        if not pyLessThan3:
-            message = message.encode('utf-8')
-        out = out + message
+        return out + payload
 
+    def _send_frame(self, out):
         readable, writable, errors = select.select([], [self.request,], [], self.server.websocket_timeout_timer_ms) #last parameter is timeout, when 0 is non blocking
         #self._log.debug('socket status readable=%s writable=%s errors=%s'%((self.request in readable), (self.request in writable), (self.request in error$
         writable = self.request in writable
@@ -254,7 +754,23 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
         response = 'HTTP/1.1 101 Switching Protocols\r\n'
         response += 'Upgrade: websocket\r\n'
         response += 'Connection: Upgrade\r\n'
-        response += 'Sec-WebSocket-Accept: %s\r\n\r\n' % digest.decode("utf-8")
+        response += 'Sec-WebSocket-Accept: %s\r\n' % digest.decode("utf-8")
+        self.protocol = _PROTOCOL_QUOTED
+        protocols = [p.strip() for p in self.headers.get('Sec-WebSocket-Protocol', '').split(',')]
+        if _PROTOCOL_NATIVE in protocols and not pyLessThan3:
+            self.protocol = _PROTOCOL_NATIVE
+        if self.protocol in protocols:
+            response += 'Sec-WebSocket-Protocol: %s\r\n' % self.protocol
+        self.deflate = None
+        extensions = self.headers.get('Sec-WebSocket-Extensions', None)
+        if extensions and self.server.websocket_compression:
+            self.deflate, extension_response = PerMessageDeflate.negotiate(extensions,
+                self.server.websocket_compression_threshold,
+                self.server.websocket_compression_window_bits,
+                self.server.websocket_compression_context_takeover)
+            if self.deflate is not None:
+                response += 'Sec-WebSocket-Extensions: %s\r\n' % extension_response
+        response += '\r\n'
         self._log.info('handshake complete')
         self.request.sendall(response.encode("utf-8"))
         self.handshake_done = True
@@ -269,6 +785,11 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
     def on_message(self, message):
         global runtimeInstances
 
+        if message.startswith(_MSG_FRAME_SHOWN):
+            # flow control of the image frames, without ack and without the update lock
+            self._outbound.frame_shown(message[len(_MSG_FRAME_SHOWN):])
+            return
+
         self.send_message(_MSG_ACK)
 
         with clients[self.session].update_lock:
@@ -279,7 +800,7 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
                     clients[self.session].websockets.add(self)
 
                 # parsing messages
-                chunks = message.split('/')
+                chunks = message.split('/', 3)
                 self._log.debug('on_message: %s' % chunks[0])
 
                 if len(chunks) > 3:  # msgtype,widget,function,params
@@ -288,10 +809,8 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
                     if chunks[0] == msg_type:
                         widget_id = chunks[1]
                         function_name = chunks[2]
-                        params = message[
-                            len(msg_type) + len(widget_id) + len(function_name) + 3:]
 
-                        param_dict = parse_parametrs(params)
+                        param_dict = parse_parametrs(chunks[3])
 
                         callback = get_method_by_name(runtimeInstances[widget_id], function_name)
                         if callback is not None:
@@ -314,22 +833,42 @@ class WebSocketsHandler(socketserver.StreamRequestHandler):
 def parse_parametrs(p):
     """
     Parses the parameters given from POST or websocket reqs
-    expecting the parameters as:  "11|par1='asd'|6|par2=1"
+    expecting the parameters as:  "10|par1='asd'|6|par2=1"
     returns a dict like {par1:'asd',par2:1}
+    The lengths are counted in utf-8 bytes. The string is scanned once,
+    the values are skipped by length so they can contain any character.
     """
+    if not isinstance(p, bytes):
+        p = p.encode('utf-8')
     ret = {}
-    while len(p) > 1 and p.count('|') > 0:
-        s = p.split('|')
-        l = int(s[0])  # length of param field
-        if l > 0:
-            p = p[len(s[0]) + 1:]
-            field_name = p.split('|')[0].split('=')[0]
-            field_value = p[len(field_name) + 1:l]
-            p = p[l + 1:]
-            ret[field_name] = field_value
+    pos = 0
+    end = len(p)
+    while pos < end:
+        separator = p.find(b'|', pos)
+        if separator < 0:
+            break
+        l = int(p[pos:separator])  # length of param field
+        field = p[separator + 1:separator + 1 + l]
+        if len(field) < l:
+            raise ValueError('truncated parameter field')
+        field_name, _, field_value = field.partition(b'=')
+        ret[field_name.decode('utf-8')] = field_value.decode('utf-8')
+        pos = separator + l + 2
     return ret
 
 
+def encode_parameters(params):
+    """
+    Inverse of parse_parametrs, same format as Remi.prototype._paramPacketize
+    returns "10|par1='asd'|6|par2=1" for {par1:'asd',par2:1}
+    """
+    fields = []
+    for name, value in params.items():
+        field = (u'%s=%s' % (name, value)).encode('utf-8')
+        fields.append(str(len(field)).encode('ascii') + b'|' + field)
+    return b'|'.join(fields).decode('utf-8')
+
+
 # noinspection PyPep8Naming
 class App(BaseHTTPRequestHandler, object):
 
@@ -344,6 +883,11 @@ class App(BaseHTTPRequestHandler, object):
     re_static_file = re.compile(r"^([\/]*[\w\d]+:[-_. $@?#£'%=()\/\[\]!+°§^,\w\d]+)") #https://regex101.com/r/uK1sX1/6
     re_attr_call = re.compile(r"^/*(\w+)\/(\w+)\?{0,1}(\w*\={1}([^&])+\&{0,1})*$") #https://regex101.com/r/UTJB6N/1
 
+    # nesting level of batch, and the update to be done at its end
+    # (None if there is not, otherwise the child_ignore_update of _need_update)
+    _batch_depth = 0
+    _batch_ignore_update = None
+
     def __init__(self, request, client_address, server, **app_args):
         self._app_args = app_args
         self.root = None
@@ -474,7 +1018,37 @@ class App(BaseHTTPRequestHandler, object):
             Useful to schedule tasks. """
         pass
 
+    @contextlib.contextmanager
+    def batch(self):
+        """ Groups the changes made to the widgets in the block: the gui update is
+            suspended, and done once at the end of the block.
+            The update_lock is held during the block, so that neither the idle loop
+            nor other threads send a part of the changes.
+
+            Usage:
+                with self.batch():
+                    self.label.set_text('...')
+                    self.table.append(rows)
+        """
+        with self.update_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._batch_ignore_update is not None:
+                    child_ignore_update = self._batch_ignore_update
+                    self._batch_ignore_update = None
+                    self._need_update(child_ignore_update=child_ignore_update)
+
     def _need_update(self, emitter=None, child_ignore_update=False):
+        if self._batch_depth:
+            # updated once, at the end of the batch
+            if self._batch_ignore_update is None:
+                self._batch_ignore_update = child_ignore_update
+            else:
+                self._batch_ignore_update = self._batch_ignore_update and child_ignore_update
+            return
         if child_ignore_update:
             #the widgets tree is processed to make it available for a intentional 
             # client update and to reset the changed flags of changed widget.
@@ -496,16 +1070,29 @@ class App(BaseHTTPRequestHandler, object):
         with self.update_lock:
             changed_widget_dict = {}
             self.root.repr(changed_widget_dict)
-            for widget in changed_widget_dict.keys():
-                html = changed_widget_dict[widget]
-                __id = str(widget.identifier)
-                self._send_spontaneous_websocket_message(_MSG_UPDATE + __id + ',' + to_websocket(self._overload(html, filename="internal")))
+            if changed_widget_dict:
+                # the widgets changed in this update cycle are sent in a single message,
+                # preceded by the patches (these never refer to the contents of the replaced widgets)
+                updates = []
+                patches = []
+                for widget, change in changed_widget_dict.items():
+                    if isinstance(change, list):
+                        patches.extend(self._overload_patch(change))
+                    else:
+                        updates.append((str(widget.identifier), self._overload(change, filename="internal")))
+                if patches:
+                    # the containers are patched in any order, a child moved from one to another
+                    # is removed before being inserted
+                    patches = [op for op in patches if op[0] == 'r'] + [op for op in patches if op[0] != 'r']
+                    self._send_spontaneous_websocket_message(lambda protocol: encode_patch_message(patches, protocol))
+                if updates:
+                    self._send_spontaneous_websocket_message(lambda protocol: encode_update_message(updates, protocol))
         self._need_update_flag = False
 
     def websocket_handshake_done(self, ws_instance_to_update):
         msg = ""
         with self.update_lock:
-            msg = "0" + self.root.identifier + ',' + to_websocket(self._overload(self.page.children['body'].innerHTML({}), filename="internal"))
+            msg = encode_show_window_message(self.root.identifier, self._overload(self.page.children['body'].innerHTML({}), filename="internal"), ws_instance_to_update.protocol)
         ws_instance_to_update.send_message(msg)
 
     def set_root_widget(self, widget):
@@ -516,14 +1103,26 @@ class App(BaseHTTPRequestHandler, object):
         self.root._parent = self
         self.root.enable_refresh()
 
-        msg = "0" + self.root.identifier + ',' + to_websocket(self._overload(self.page.children['body'].innerHTML({}), filename="internal"))
-        self._send_spontaneous_websocket_message(msg)
+        html = self._overload(self.page.children['body'].innerHTML({}), filename="internal")
+        self._send_spontaneous_websocket_message(lambda protocol: encode_show_window_message(self.root.identifier, html, protocol))
         
     def _send_spontaneous_websocket_message(self, message):
+        """ Sends a message to all the clients.
+
+            Args:
+                message (str or callable): the message, or a function that given the websocket
+                    subprotocol returns the message encoded for it. The function gets called once per protocol.
+        """
+        encoded_messages = {}
         for ws in list(self.websockets):
             # noinspection PyBroadException
             try:
-                if ws.send_message(message):
+                ws_message = message
+                if callable(message):
+                    if not ws.protocol in encoded_messages:
+                        encoded_messages[ws.protocol] = message(ws.protocol)
+                    ws_message = encoded_messages[ws.protocol]
+                if ws.send_message(ws_message):
                     #if message sent ok, continue with next client
                     continue
             except Exception:
@@ -678,6 +1277,13 @@ class App(BaseHTTPRequestHandler, object):
         """Used to overload the content before sent back to client"""
         return data
 
+    def _overload_patch(self, patch):
+        """Applies _overload to the values and html contents of the patch operations"""
+        if type(self)._overload == App._overload:
+            return patch
+        return [op[:-1] + (self._overload(op[-1], filename="internal"),)
+                if op[0] in ('a', 's', 't', 'i') and not op[-1] is None else op for op in patch]
+
     def _process_all(self, func, **kwargs):
         self._log.debug('get: %s' % func)
         static_file = self.re_static_file.match(func)
@@ -690,11 +1296,16 @@ class App(BaseHTTPRequestHandler, object):
             self.end_headers()
             
             with self.update_lock:
-                # render the HTML
-                page_content = self.page.repr()
+                # render the HTML, the chunks are the tags representations
+                # and are written one by one, without joining the whole page
+                page_chunks = list(self.page.iter_repr())
+            if type(self)._overload != App._overload:
+                # an overloading function expects the whole content
+                page_chunks = [self._overload(''.join(page_chunks), filename="internal")]
 
             self.wfile.write(encode_text("<!DOCTYPE html>\n"))
-            self.wfile.write(encode_text(self._overload(page_content, filename="internal")))
+            for chunk in page_chunks:
+                self.wfile.write(encode_text(chunk))
             
         elif static_file:
             filename = self._get_static_file(static_file.groups()[0])
@@ -723,7 +1334,6 @@ class App(BaseHTTPRequestHandler, object):
                     if content is None:
                         self.send_response(503)
                         return
-                    self.send_response(200)
                 except IOError:
                     self._log.error('attr %s/%s call error' % (widget, func), exc_info=True)
                     self.send_response(404)
@@ -733,6 +1343,22 @@ class App(BaseHTTPRequestHandler, object):
                     self.send_response(503)
                     return
 
+            etag = headers.get('ETag')
+            if etag is not None and etag in [tag.strip() for tag in (self.headers['If-None-Match'] or '').split(',')]:
+                # the client has this content already
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            if callable(content):
+                # produced out of the update_lock, like the images of gui.ImageEncodeCache
+                try:
+                    content = content()
+                except Exception:
+                    self._log.error('attr %s/%s content error' % (widget, func), exc_info=True)
+                    self.send_response(503)
+                    return
+            self.send_response(200)
             for k in headers:
                 self.send_header(k, headers[k])
             self.end_headers()
@@ -794,7 +1420,10 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
     def __init__(self, server_address, RequestHandlerClass,
                  auth, multiple_instance, enable_file_cache, update_interval,
                  websocket_timeout_timer_ms, pending_messages_queue_length,
-                 title, server_starter_instance, certfile, keyfile, ssl_version, *userdata):
+                 title, server_starter_instance, certfile, keyfile, ssl_version,
+                 websocket_compression, websocket_compression_threshold,
+                 websocket_compression_window_bits, websocket_compression_context_takeover,
+                 websocket_outbound_queue_length, websocket_overflow_policy, *userdata):
         HTTPServer.__init__(self, server_address, RequestHandlerClass)
         self.auth = auth
         self.multiple_instance = multiple_instance
@@ -802,6 +1431,12 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
         self.update_interval = update_interval
         self.websocket_timeout_timer_ms = websocket_timeout_timer_ms
         self.pending_messages_queue_length = pending_messages_queue_length
+        self.websocket_compression = websocket_compression
+        self.websocket_compression_threshold = websocket_compression_threshold
+        self.websocket_compression_window_bits = websocket_compression_window_bits
+        self.websocket_compression_context_takeover = websocket_compression_context_takeover
+        self.websocket_outbound_queue_length = websocket_outbound_queue_length
+        self.websocket_overflow_policy = websocket_overflow_policy
         self.title = title
         self.server_starter_instance = server_starter_instance
         self.userdata = userdata
@@ -818,7 +1453,27 @@ class Server(object):
     def __init__(self, gui_class, title='', start=True, address='127.0.0.1', port=0, username=None, password=None,
                  multiple_instance=False, enable_file_cache=True, update_interval=0.1, start_browser=True,
                  websocket_timeout_timer_ms=1000, pending_messages_queue_length=1000, 
-                 certfile=None, keyfile=None, ssl_version=None,  userdata=()):
+                 certfile=None, keyfile=None, ssl_version=None,  userdata=(),
+                 websocket_compression=True, websocket_compression_threshold=256,
+                 websocket_compression_window_bits=15, websocket_compression_context_takeover=True,
+                 backend='threading', executor_max_workers=None,
+                 websocket_outbound_queue_length=1000, websocket_overflow_policy='coalesce'):
+        """
+        Args:
+            websocket_compression (bool): negotiates the permessage-deflate extension (RFC 7692) with the clients
+            websocket_compression_threshold (int): messages shorter than this number of bytes are sent uncompressed
+            websocket_compression_window_bits (int): max LZ77 window size (9..15) for both directions
+            websocket_compression_context_takeover (bool): if False, each message gets compressed with a new
+                context, lowering the memory needed by each connection at the cost of the compression ratio
+            backend (str): 'threading' serves each connection in its own thread (ThreadedHTTPServer),
+                'asyncio' serves all the connections from a single event loop (python 3.5+ only)
+            executor_max_workers (int): with the 'asyncio' backend, the max number of threads
+                running the App requests and callbacks
+            websocket_outbound_queue_length (int): max number of messages waiting to be sent to each client
+            websocket_overflow_policy (str): what to do when a client is too slow and its queue is full,
+                'drop_oldest', 'coalesce' (pending updates of the same widget, consecutive update batches and patches are merged, then disconnect)
+                or 'disconnect' (see WebSocketOutboundQueue)
+        """
 
         self._gui = gui_class
         self._title = title or gui_class.__name__
@@ -837,6 +1492,14 @@ class Server(object):
         self._keyfile = keyfile
         self._ssl_version = ssl_version
         self._userdata = userdata
+        self._websocket_compression = websocket_compression
+        self._websocket_compression_threshold = websocket_compression_threshold
+        self._websocket_compression_window_bits = max(9, min(15, int(websocket_compression_window_bits)))
+        self._websocket_compression_context_takeover = websocket_compression_context_takeover
+        self._backend = backend
+        self._executor_max_workers = executor_max_workers
+        self._websocket_outbound_queue_length = websocket_outbound_queue_length
+        self._websocket_overflow_policy = websocket_overflow_policy
         if username and password:
             self._auth = base64.b64encode(encode_text("%s:%s" % (username, password)))
         else:
@@ -845,6 +1508,13 @@ class Server(object):
         if not isinstance(userdata, tuple):
             raise ValueError('userdata must be a tuple')
 
+        if not backend in ('threading', 'asyncio'):
+            raise ValueError("backend must be 'threading' or 'asyncio'")
+
+        if not websocket_overflow_policy in (WebSocketOutboundQueue.POLICY_DROP_OLDEST,
+                WebSocketOutboundQueue.POLICY_COALESCE, WebSocketOutboundQueue.POLICY_DISCONNECT):
+            raise ValueError("websocket_overflow_policy must be 'drop_oldest', 'coalesce' or 'disconnect'")
+
         self._log = logging.getLogger('remi.server')
         self._alive = True
         if start:
@@ -863,11 +1533,23 @@ class Server(object):
     def start(self):
         # Create a web server and define the handler to manage the incoming
         # request
-        self._sserver = ThreadedHTTPServer((self._address, self._sport), self._gui, self._auth,
+        server_class = ThreadedHTTPServer
+        server_kwargs = {}
+        if self._backend == 'asyncio':
+            from .server_asyncio import AsyncioHTTPServer
+            server_class = AsyncioHTTPServer
+            server_kwargs['executor_max_workers'] = self._executor_max_workers
+        self._sserver = server_class((self._address, self._sport), self._gui, self._auth,
                                            self._multiple_instance, self._enable_file_cache,
                                            self._update_interval, self._websocket_timeout_timer_ms,
                                            self._pending_messages_queue_length, self._title, 
-                                           self, self._certfile, self._keyfile, self._ssl_version, *self._userdata)
+                                           self, self._certfile, self._keyfile, self._ssl_version,
+                                           self._websocket_compression, self._websocket_compression_threshold,
+                                           self._websocket_compression_window_bits,
+                                           self._websocket_compression_context_takeover,
+                                           self._websocket_outbound_queue_length, self._websocket_overflow_policy,
+                                           *self._userdata,
+                                           **server_kwargs)
         shost, sport = self._sserver.socket.getsockname()[:2]
         self._log.info('Started httpserver http://%s:%s/'%(shost,sport))
         # when listening on multiple net interfaces the browsers connects to localhost
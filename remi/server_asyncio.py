@@ -0,0 +1,350 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+   asyncio server backend, selected by Server(..., backend='asyncio').
+   All the sockets are served by a single event loop, while the App request
+   handling and the websocket callbacks run in a bounded thread pool.
+   Requires python 3.5+.
+"""
+import asyncio
+import concurrent.futures
+import http.client
+import logging
+import os
+import socket
+import ssl
+import struct
+import threading
+from io import BytesIO
+
+from .server import WebSocketsHandler, WebSocketOutboundQueue, clients, websocket_unmask, from_websocket, _PROTOCOL_QUOTED
+
+
+class _StreamSocket(object):
+    """ Socket-like adapter given to the handlers running in the executor.
+        Reads are served from the data already received by the event loop,
+        writes are handed over to the event loop thread.
+    """
+
+    def __init__(self, loop, writer, data=b''):
+        self._loop = loop
+        self._writer = writer
+        self._data = data
+
+    def makefile(self, mode='rb', *args, **kwargs):
+        return BytesIO(self._data)
+
+    def sendall(self, data):
+        if self._writer.transport.is_closing():
+            raise socket.error('connection closed')
+        try:
+            self._loop.call_soon_threadsafe(self._writer.write, bytes(data))
+        except RuntimeError:
+            # event loop closed
+            raise socket.error('connection closed')
+
+    def getsockname(self):
+        return self._writer.get_extra_info('sockname')
+
+    def settimeout(self, timeout):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def shutdown(self, how=None):
+        try:
+            self._loop.call_soon_threadsafe(self._writer.close)
+        except RuntimeError:
+            pass
+
+    def close(self):
+        self.shutdown()
+
+
+class AsyncioWebSocketsHandler(WebSocketsHandler):
+    """ WebSocketsHandler whose socket is owned by the event loop.
+        The handshake and the messages dispatch (App callbacks) run in the executor,
+        the frames are read and written by the event loop.
+    """
+
+    def __init__(self, headers, request, client_address, server, loop):
+        self.headers = headers
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.handshake_done = False
+        self._log = logging.getLogger('remi.server.ws')
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._outbound = WebSocketOutboundQueue(server.websocket_outbound_queue_length,
+                                                server.websocket_overflow_policy, self._notify_writer)
+        self._log.info('connection established: %r' % (client_address,))
+
+    def _notify_writer(self):
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # event loop closed
+            pass
+
+    async def write_messages(self, writer):
+        """ Writer coroutine, drains the outbound queue waiting for the socket to accept the data.
+        """
+        try:
+            while not self._outbound.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while True:
+                    message = self._outbound.get(block=False)
+                    if message is None:
+                        break
+                    writer.write(bytes(self._build_message_frame(message)))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        except Exception:
+            self._log.error("sending websocket message", exc_info=True)
+        finally:
+            self._outbound.close()
+            writer.close()
+
+    async def read_message(self, reader):
+        """ Returns the next decoded message, or None if the connection has to be closed.
+        """
+        # noinspection PyBroadException
+        try:
+            message = None
+            compressed = False
+            while True:
+                head = await reader.readexactly(2)
+                opcode = head[0] & 0b1111
+                fin = head[0] >> 7 & 1
+                is_masked = head[1] >> 7 & 1
+                length = head[1] & 127
+
+                if length == 126:
+                    length = struct.unpack('>H', await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack('>Q', await reader.readexactly(8))[0]
+
+                mask = None
+                if is_masked:
+                    mask = await reader.readexactly(4)
+
+                frame_data = await reader.readexactly(length)
+                if is_masked:
+                    frame_data = websocket_unmask(mask, frame_data)
+
+                if opcode == 0x8:
+                    return None
+                if opcode & 0x8:
+                    continue
+
+                if message is None:
+                    compressed = bool(head[0] & 0x40)
+                    message = frame_data
+                else:
+                    if not isinstance(message, bytearray):
+                        message = bytearray(message)
+                    message += frame_data
+
+                if fin:
+                    break
+            if compressed:
+                if self.deflate is None:
+                    return None
+                message = self.deflate.decompress(message)
+            message = bytes(message).decode('utf-8')
+            self._log.debug('read_message: %s...' % (message[:10]))
+            if self.protocol == _PROTOCOL_QUOTED:
+                message = from_websocket(message)
+            return message
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        except Exception:
+            self._log.error('Error managing incoming websocket message', exc_info=True)
+            return None
+
+    def close(self, terminate_server=True):
+        try:
+            self.request.shutdown()
+            if terminate_server:
+                self.server.shutdown()
+        except Exception:
+            self._log.error("exception in AsyncioWebSocketsHandler.close method", exc_info=True)
+
+
+class AsyncioHTTPServer(object):
+    """ Drop in replacement of ThreadedHTTPServer, serving all the connections
+        from one event loop thread. The App instances are created in a bounded
+        thread pool, exactly as ThreadedHTTPServer does in its request threads.
+    """
+
+    request_queue_size = 1024
+    max_header_size = 65536
+
+    # noinspection PyPep8Naming
+    def __init__(self, server_address, RequestHandlerClass,
+                 auth, multiple_instance, enable_file_cache, update_interval,
+                 websocket_timeout_timer_ms, pending_messages_queue_length,
+                 title, server_starter_instance, certfile, keyfile, ssl_version,
+                 websocket_compression, websocket_compression_threshold,
+                 websocket_compression_window_bits, websocket_compression_context_takeover,
+                 websocket_outbound_queue_length, websocket_overflow_policy,
+                 *userdata, executor_max_workers=None):
+        self.RequestHandlerClass = RequestHandlerClass
+        self.auth = auth
+        self.multiple_instance = multiple_instance
+        self.enable_file_cache = enable_file_cache
+        self.update_interval = update_interval
+        self.websocket_timeout_timer_ms = websocket_timeout_timer_ms
+        self.pending_messages_queue_length = pending_messages_queue_length
+        self.websocket_compression = websocket_compression
+        self.websocket_compression_threshold = websocket_compression_threshold
+        self.websocket_compression_window_bits = websocket_compression_window_bits
+        self.websocket_compression_context_takeover = websocket_compression_context_takeover
+        self.websocket_outbound_queue_length = websocket_outbound_queue_length
+        self.websocket_overflow_policy = websocket_overflow_policy
+        self.title = title
+        self.server_starter_instance = server_starter_instance
+        self.userdata = userdata
+
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.ssl_version = ssl_version
+        self._ssl_context = None
+        if self.ssl_version is not None:
+            self._ssl_context = ssl.SSLContext(self.ssl_version)
+            self._ssl_context.load_cert_chain(self.certfile, self.keyfile)
+
+        if executor_max_workers is None:
+            executor_max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=executor_max_workers)
+
+        self._log = logging.getLogger('remi.server.asyncio')
+
+        # the listening socket is created here, to make the address available before serving
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(server_address)
+        self.socket.listen(self.request_queue_size)
+        self.socket.setblocking(False)
+        self.server_address = self.socket.getsockname()
+
+        self._loop = None
+        self._loop_thread = None
+        self._stop_request = None
+        self._connections = set()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    def serve_forever(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._executor.shutdown(wait=False)
+            self._loop.close()
+            self.socket.close()
+            self._stopped.set()
+            self._ready.set()
+
+    def shutdown(self):
+        """ Stops the event loop. Waits for it to be stopped, unless it gets called by the loop itself.
+        """
+        self._ready.wait()
+        if self._stopped.is_set():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._stop_request.set)
+        except RuntimeError:
+            # event loop already closed
+            return
+        if not self._loop_thread is threading.current_thread():
+            self._stopped.wait()
+
+    async def _serve(self):
+        self._loop_thread = threading.current_thread()
+        self._stop_request = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, sock=self.socket, ssl=self._ssl_context,
+                                            limit=self.max_header_size)
+        self._ready.set()
+        await self._stop_request.wait()
+        server.close()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.Task.current_task() if hasattr(asyncio.Task, 'current_task') else asyncio.current_task()
+        self._connections.add(task)
+        client_address = writer.get_extra_info('peername')
+        try:
+            try:
+                header_data = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            request_line, _, header_lines = header_data.partition(b'\r\n')
+            headers = http.client.parse_headers(BytesIO(header_lines))
+
+            if headers.get('Upgrade', '').lower() == 'websocket':
+                await self._serve_websocket(headers, reader, writer, client_address)
+                return
+
+            body = b''
+            length = int(headers.get('Content-Length', 0) or 0)
+            if length > 0:
+                body = await reader.readexactly(length)
+
+            request = _StreamSocket(self._loop, writer, header_data + body)
+            await self._loop.run_in_executor(self._executor, self._process_request, request, client_address)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # server shutdown
+            pass
+        except Exception:
+            self._log.error('error processing request', exc_info=True)
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    def _process_request(self, request, client_address):
+        # the App (a BaseHTTPRequestHandler) processes the request at construction
+        self.RequestHandlerClass(request, client_address, self)
+
+    async def _serve_websocket(self, headers, reader, writer, client_address):
+        ws = AsyncioWebSocketsHandler(headers, _StreamSocket(self._loop, writer), client_address, self, self._loop)
+        write_task = self._loop.create_task(ws.write_messages(writer))
+        try:
+            if not await self._loop.run_in_executor(self._executor, ws.handshake):
+                return
+            while True:
+                message = await ws.read_message(reader)
+                if message is None:
+                    break
+                # messages of the same connection are dispatched in order
+                await self._loop.run_in_executor(self._executor, ws.on_message, message)
+        finally:
+            if ws.handshake_done and ws.session in clients:
+                clients[ws.session].websockets.discard(ws)
+            ws.handshake_done = False
+            ws._outbound.close()
+            await write_task
+            ws._log.debug('ws ending websocket service')
@@ -28,4 +28,10 @@ class MockServer(object):
     	self.server_address = ('0.0.0.0', 8888)
     	self.websocket_timeout_timer_ms = None
     	self.pending_messages_queue_length = None
+    	self.websocket_compression = False
+    	self.websocket_compression_threshold = 256
+    	self.websocket_compression_window_bits = 15
+    	self.websocket_compression_context_takeover = True
+    	self.websocket_outbound_queue_length = 1000
+    	self.websocket_overflow_policy = 'coalesce'
     	self.userdata = {}
\ No newline at end of file
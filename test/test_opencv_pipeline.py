@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import threading
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'editor'))
+try:
+    import numpy as np
+    from widgets import toolbox_opencv as opencv
+except ImportError:
+    opencv = None
+
+
+if opencv is not None:
+    class Stage(opencv.OpencvImage):
+        def __init__(self, work):
+            super(Stage, self).__init__('')
+            self.work = work
+
+        def on_new_image_listener(self, emitter):
+            time.sleep(self.work)
+            self.set_image_data(emitter.img)
+
+    class Join(opencv.OpencvImage, opencv.BinaryOperator):
+        def __init__(self, last_frame):
+            super(Join, self).__init__('')
+            self.last_frame = last_frame
+            self.joined = []
+            self.done = threading.Event()
+
+        def process(self):
+            if self.img1 is not None and self.img2 is not None:
+                self.joined.append((int(np.ravel(self.img1)[0]), int(np.ravel(self.img2)[0])))
+                if self.joined[-1][0] == self.last_frame:
+                    self.done.set()
+
+
+class TestOpencvPipeline(unittest.TestCase):
+    def setUp(self):
+        if opencv is None:
+            self.skipTest("OpenCV and numpy are not installed")
+
+    def test_slow_branch(self):
+        # the join gets the frames of the slow branch, paired with the same frames of the fast one
+        frames = 100
+        source = opencv.OpencvImage('')
+        split = opencv.OpencvSplit()
+        fast, slow = Stage(0), Stage(0.1)
+        join = Join(frames - 1)
+        source.on_new_image.do(split.on_new_image_listener)
+        split.on_new_image.do(fast.on_new_image_listener)
+        split.on_new_image_first_component.do(slow.on_new_image_listener)
+        fast.on_new_image.do(join.on_new_image_1_listener)
+        slow.on_new_image.do(join.on_new_image_2_listener)
+        pipeline = opencv.OpencvPipeline(source, max_workers=4)
+        for i in range(frames):
+            source.set_image_data(np.full((2, 2, 3), i, np.uint8))
+            time.sleep(0.01)
+        self.assertTrue(join.done.wait(5))
+        pipeline.close()
+        self.assertGreaterEqual(len(join.joined), 5)
+        self.assertTrue(all(first == second for first, second in join.joined))
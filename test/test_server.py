@@ -0,0 +1,660 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import logging
+import os
+import re
+import json
+import threading
+import struct
+import zlib
+from io import BytesIO
+
+import socket
+import remi.gui as gui
+import remi.server as server
+try:
+    from mock_server_and_request import MockServer, MockRequest
+except ValueError:
+    from .mock_server_and_request import MockServer, MockRequest
+
+
+def make_frame(payload, opcode=0x1, fin=True, mask=b'\x11\x22\x33\x44'):
+    """Builds a client to server (masked) websocket frame"""
+    head = bytearray()
+    head.append((0x80 if fin else 0) | opcode)
+    length = len(payload)
+    if length <= 125:
+        head.append(0x80 | length)
+    elif length <= 65535:
+        head.append(0x80 | 126)
+        head += struct.pack('>H', length)
+    else:
+        head.append(0x80 | 127)
+        head += struct.pack('>Q', length)
+    masked = bytearray(payload)
+    for i in range(len(masked)):
+        masked[i] ^= bytearray(mask)[i % 4]
+    return bytes(head) + mask + bytes(masked)
+
+
+def make_handler(data, deflate=None):
+    ws = server.WebSocketsHandler.__new__(server.WebSocketsHandler)
+    ws._log = logging.getLogger('remi.server.ws')
+    ws.rfile = BytesIO(data)
+    ws.received = []
+    ws.on_message = ws.received.append
+    ws.deflate = deflate
+    return ws
+
+
+class TestWebsocketUnmask(unittest.TestCase):
+    def test_unmask(self):
+        mask = b'\x01\x02\x03\x04'
+        for length in (0, 1, 3, 4, 5, 1000):
+            data = os.urandom(length)
+            expected = bytes(bytearray(b ^ bytearray(mask)[i % 4] for i, b in enumerate(bytearray(data))))
+            self.assertEqual(server.websocket_unmask(mask, data), expected)
+
+
+class TestWebSocketsHandlerRead(unittest.TestCase):
+    def test_single_frame(self):
+        ws = make_handler(make_frame(b'callback/1/onclick/'))
+        self.assertTrue(ws.read_next_message())
+        self.assertEqual(ws.received, ['callback/1/onclick/'])
+
+    def test_extended_lengths(self):
+        for length in (126, 70000):
+            payload = b'a' * length
+            ws = make_handler(make_frame(payload))
+            self.assertTrue(ws.read_next_message())
+            self.assertEqual(ws.received, ['a' * length])
+
+    def test_fragmented_with_control_frame(self):
+        data = make_frame(b'callback/', fin=False) + \
+            make_frame(b'ping', opcode=0x9) + \
+            make_frame(b'1/onclick/', opcode=0x0, fin=False) + \
+            make_frame(b'%C3%A8', opcode=0x0)
+        ws = make_handler(data)
+        self.assertTrue(ws.read_next_message())
+        self.assertEqual(ws.received, [u'callback/1/onclick/è'])
+
+    def test_close_and_truncated(self):
+        self.assertFalse(make_handler(make_frame(b'', opcode=0x8)).read_next_message())
+        self.assertFalse(make_handler(make_frame(b'truncated')[:-2]).read_next_message())
+        self.assertFalse(make_handler(b'').read_next_message())
+
+
+class TestPerMessageDeflate(unittest.TestCase):
+    def test_negotiate(self):
+        deflate, response = server.PerMessageDeflate.negotiate('x-webkit-deflate-frame', 256, 15, True)
+        self.assertIsNone(deflate)
+
+        deflate, response = server.PerMessageDeflate.negotiate(
+            'permessage-deflate; client_max_window_bits', 256, 15, True)
+        self.assertEqual(response, 'permessage-deflate; client_max_window_bits=15')
+
+        deflate, response = server.PerMessageDeflate.negotiate(
+            'permessage-deflate; server_max_window_bits=10; client_max_window_bits', 256, 12, False)
+        self.assertEqual(deflate.server_max_window_bits, 10)
+        self.assertEqual(deflate.client_max_window_bits, 12)
+        self.assertIn('server_no_context_takeover', response)
+        self.assertIn('client_no_context_takeover', response)
+        self.assertIn('server_max_window_bits=10', response)
+
+    def test_negotiate_window_bits(self):
+        # a server window smaller than 9 bits can not be honoured, the offer is declined
+        deflate, response = server.PerMessageDeflate.negotiate(
+            'permessage-deflate; server_max_window_bits=8', 256, 15, True)
+        self.assertIsNone(deflate)
+        deflate, response = server.PerMessageDeflate.negotiate(
+            'permessage-deflate; server_max_window_bits=8, permessage-deflate', 256, 15, True)
+        self.assertEqual(response, 'permessage-deflate')
+
+        deflate, response = server.PerMessageDeflate.negotiate(
+            'permessage-deflate; client_max_window_bits=8', 256, 15, True)
+        self.assertEqual(response, 'permessage-deflate; client_max_window_bits=8')
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -9)
+        message = b'callback/1/onclick/' * 40
+        payload = compressor.compress(message) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.assertEqual(deflate.decompress(payload[:-4]), message)
+
+    def test_decompress_limit(self):
+        deflate, response = server.PerMessageDeflate.negotiate('permessage-deflate', 16, 15, True)
+        deflate.max_message_size = 1000
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        payload = compressor.compress(b'\x00' * 100000) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.assertRaises(ValueError, deflate.decompress, payload[:-4])
+
+        frame = bytearray(make_frame(payload[:-4]))
+        frame[0] |= 0x40
+        ws = make_handler(bytes(frame), deflate)
+        self.assertFalse(ws.read_next_message())
+        self.assertEqual(ws.received, [])
+
+    def test_compress(self):
+        deflate, response = server.PerMessageDeflate.negotiate('permessage-deflate', 16, 15, True)
+        self.assertIsNone(deflate.compress(b'short'))
+        message = b'<div id="1234" class="Label">text</div>' * 50
+        for i in range(2):
+            # the second message reuses the compression context
+            payload = deflate.compress(message)
+            self.assertLess(len(payload), len(message))
+            self.assertEqual(deflate.decompress(payload), message)
+
+    def test_read_compressed(self):
+        deflate, response = server.PerMessageDeflate.negotiate('permessage-deflate', 16, 15, True)
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        payload = compressor.compress(b'callback/1/onclick/') + compressor.flush(zlib.Z_SYNC_FLUSH)
+        frame = bytearray(make_frame(payload[:-4]))
+        frame[0] |= 0x40
+        ws = make_handler(bytes(frame), deflate)
+        self.assertTrue(ws.read_next_message())
+        self.assertEqual(ws.received, ['callback/1/onclick/'])
+
+
+class TestWebSocketOutboundQueue(unittest.TestCase):
+    def test_drop_oldest(self):
+        q = server.WebSocketOutboundQueue(2, server.WebSocketOutboundQueue.POLICY_DROP_OLDEST)
+        for m in ('21', '22', '23'):
+            self.assertTrue(q.put(m))
+        self.assertEqual([q.get(), q.get(), q.get(block=False)], ['22', '23', None])
+
+    def test_coalesce(self):
+        q = server.WebSocketOutboundQueue(3, server.WebSocketOutboundQueue.POLICY_COALESCE)
+        self.assertTrue(q.put('1a,old'))
+        self.assertTrue(q.put('1parent,<div>'))
+        self.assertTrue(q.put('1a,new'))
+        self.assertTrue(q.put('3'))
+        self.assertEqual(len(q), 3)
+        self.assertFalse(q.put('3'))
+        self.assertEqual([q.get(), q.get(), q.get()], ['1parent,<div>', '1a,new', '3'])
+
+    def test_coalesce_batches_and_patches(self):
+        for protocol in (server._PROTOCOL_QUOTED, server._PROTOCOL_NATIVE):
+            q = server.WebSocketOutboundQueue(3, server.WebSocketOutboundQueue.POLICY_COALESCE)
+            self.assertTrue(q.put('1c,old'))
+            self.assertTrue(q.put(server.encode_update_message([('a', 'a1'), ('b', 'b;1')], protocol)))
+            self.assertTrue(q.put(server.encode_update_message([('b', 'b,2'), ('c', 'c2')], protocol)))
+            self.assertTrue(q.put(server.encode_patch_message([['t', 'a', 'x']], protocol)))
+            self.assertTrue(q.put(server.encode_patch_message([['t', 'b', 'y']], protocol)))
+            self.assertTrue(q.put('3'))
+            self.assertEqual(len(q), 3)
+            self.assertEqual(q.get(), server.encode_update_message([('a', 'a1'), ('b', 'b,2'), ('c', 'c2')], protocol))
+            self.assertEqual(q.get(), server.encode_patch_message([['t', 'a', 'x'], ['t', 'b', 'y']], protocol))
+            self.assertEqual(q.get(), '3')
+
+        # a patch is not merged across other messages
+        q = server.WebSocketOutboundQueue(3, server.WebSocketOutboundQueue.POLICY_COALESCE)
+        q.put(server.encode_patch_message([['t', 'a', 'x']], server._PROTOCOL_QUOTED))
+        q.put('1b,new')
+        q.put(server.encode_patch_message([['t', 'a', 'y']], server._PROTOCOL_QUOTED))
+        self.assertEqual(len(q), 3)
+
+    def test_disconnect(self):
+        q = server.WebSocketOutboundQueue(1, server.WebSocketOutboundQueue.POLICY_DISCONNECT)
+        self.assertTrue(q.put('1a,x'))
+        self.assertFalse(q.put('1a,y'))
+        q.close()
+        self.assertIsNone(q.get())
+        self.assertFalse(q.put('3'))
+
+    def test_image_frames(self):
+        # with any policy, a frame replaces the pending frame of the same widget
+        q = server.WebSocketOutboundQueue(3, server.WebSocketOutboundQueue.POLICY_DISCONNECT)
+        frames = [server.encode_image_frame_message(identifier, 'image/jpeg', data)
+                  for identifier, data in (('a', b'1'), ('a', b'2'), ('b', b'1'))]
+        self.assertTrue(q.put(frames[0]))
+        self.assertTrue(q.put('3'))
+        self.assertTrue(q.put(frames[1]))
+        self.assertTrue(q.put(frames[2]))
+        self.assertEqual([q.get(), q.get(), q.get(), q.get(block=False)], ['3', frames[1], frames[2], None])
+        self.assertEqual(frames[1], b'6\x00\x01a\x00\x0aimage/jpeg2')
+
+    def test_frames_in_flight(self):
+        q = server.WebSocketOutboundQueue(10, server.WebSocketOutboundQueue.POLICY_DROP_OLDEST)
+        frames = [server.encode_image_frame_message('a', 'image/jpeg', b'%d' % i) for i in range(4)]
+        for f in frames[:2]:
+            self.assertTrue(q.put(f))
+            self.assertEqual(q.get(block=False), f)
+        # the next frame waits until the client has shown one, the other messages do not
+        self.assertTrue(q.put(frames[2]))
+        self.assertTrue(q.put('3'))
+        self.assertEqual(q.get(block=False), '3')
+        self.assertIsNone(q.get(block=False))
+        self.assertTrue(q.put(frames[3]))
+        q.frame_shown('a')
+        self.assertEqual([q.get(block=False), q.get(block=False)], [frames[3], None])
+
+
+class TestParseParameters(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(server.parse_parametrs("10|par1='asd'|6|par2=1"), {'par1': "'asd'", 'par2': '1'})
+        self.assertEqual(server.parse_parametrs(''), {})
+
+    def test_separators_in_values(self):
+        params = {'a': 'x|y=z', 'b': '|', 'c': '', 'd': '12|d=1'}
+        self.assertEqual(server.parse_parametrs(server.encode_parameters(params)), params)
+
+    def test_utf8_lengths(self):
+        # lengths in utf-8 bytes, as computed by Remi.prototype._byteLength
+        self.assertEqual(server.parse_parametrs(u'8|b=\U0001f600\xe8|2|c='), {'b': u'\U0001f600\xe8', 'c': ''})
+        self.assertEqual(server.encode_parameters({'b': u'\u20ac'}), u'5|b=\u20ac')
+
+    def test_fuzz(self):
+        import random
+        rnd = random.Random(0)
+        alphabet = u'ab|=0123\xe8\u20ac\U0001f600'
+        for i in range(200):
+            params = {}
+            for j in range(rnd.randint(0, 5)):
+                name = u''.join(rnd.choice(u'abcdef') for k in range(rnd.randint(1, 6)))
+                params[name] = u''.join(rnd.choice(alphabet) for k in range(rnd.randint(0, 50)))
+            self.assertEqual(server.parse_parametrs(server.encode_parameters(params)), params)
+
+    def test_large_values(self):
+        params = {'image': 'A' * (8 * 1024 * 1024), 'text': u'\u20ac|' * (512 * 1024)}
+        self.assertEqual(server.parse_parametrs(server.encode_parameters(params)), params)
+
+    def test_truncated(self):
+        self.assertRaises(ValueError, server.parse_parametrs, '20|a=1')
+        self.assertRaises(ValueError, server.parse_parametrs, 'x|a=1')
+
+
+class MockWebSocket(object):
+    def __init__(self, protocol=server._PROTOCOL_QUOTED):
+        self.protocol = protocol
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+        return True
+
+    def close(self, terminate_server=True):
+        pass
+
+
+class TestAppGuiUpdate(unittest.TestCase):
+    class AppClass(server.App):
+        def main(self):
+            self.labels = [gui.Label('label %s' % i) for i in range(3)]
+            return gui.VBox(children=self.labels)
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        mock_server = MockServer()
+        mock_server.multiple_instance = True
+        self.app = self.AppClass(MockRequest(), ('0.0.0.0', 8888), mock_server)
+        # updates are sent by explicit do_gui_update calls
+        self.app.update_interval = 1
+        self.ws = MockWebSocket()
+        self.app.websockets.add(self.ws)
+
+    def tearDown(self):
+        self.app.on_close()
+
+    def set_bold_text(self, label, text):
+        # the text child replaced by a tag is a structural change, the label gets replaced entirely
+        bold = gui.Tag(_type='b')
+        bold.add_child('text', text)
+        label.add_child('text', bold)
+
+    def test_single_update(self):
+        self.set_bold_text(self.app.labels[0], 'changed')
+        self.app.do_gui_update()
+        self.assertEqual(len(self.ws.messages), 1)
+        self.assertTrue(self.ws.messages[0].startswith(server._MSG_UPDATE + self.app.labels[0].identifier + ','))
+
+    def test_batch_update(self):
+        self.set_bold_text(self.app.labels[0], 'changed 0')
+        self.set_bold_text(self.app.labels[2], 'changed 2')
+        self.app.do_gui_update()
+        self.assertEqual(len(self.ws.messages), 1)
+        message = self.ws.messages[0]
+        self.assertEqual(message[0], server._MSG_UPDATE_BATCH)
+        items = [item.split(',') for item in message[1:].split(';')]
+        self.assertEqual([i for i, html in items], [self.app.labels[0].identifier, self.app.labels[2].identifier])
+        self.assertIn('changed 2', server.from_websocket(items[1][1]))
+
+    def test_native_protocol(self):
+        native_ws = MockWebSocket(server._PROTOCOL_NATIVE)
+        self.app.websockets.add(native_ws)
+        self.set_bold_text(self.app.labels[0], u'changed è')
+        self.set_bold_text(self.app.labels[1], 'changed 1')
+        self.app.do_gui_update()
+        self.assertEqual(len(self.ws.messages), 1)
+        message = native_ws.messages[0]
+        self.assertEqual(message[:1], server._MSG_UPDATE_BATCH.encode())
+        pos = 1
+        items = []
+        while pos < len(message):
+            length = struct.unpack('>H', message[pos:pos + 2])[0]
+            identifier = message[pos + 2:pos + 2 + length].decode('utf-8')
+            pos += 2 + length
+            length = struct.unpack('>I', message[pos:pos + 4])[0]
+            items.append((identifier, message[pos + 4:pos + 4 + length].decode('utf-8')))
+            pos += 4 + length
+        self.assertEqual(items[0][0], self.app.labels[0].identifier)
+        self.assertIn(u'>changed è<', items[0][1])
+
+        self.set_bold_text(self.app.labels[2], '<b>')
+        self.app.do_gui_update()
+        self.assertTrue(native_ws.messages[1].startswith(server._MSG_UPDATE + self.app.labels[2].identifier + ',<'))
+
+    def test_patch(self):
+        label = self.app.labels[0]
+        label.set_text(u'changed è')
+        label.style['color'] = 'red'
+        label.attributes['title'] = 'tip'
+        self.app.do_gui_update()
+        self.assertEqual(len(self.ws.messages), 1)
+        message = self.ws.messages[0]
+        self.assertEqual(message[0], server._MSG_PATCH)
+        ops = json.loads(message[1:])
+        self.assertEqual(sorted(ops), sorted([['a', label.identifier, 'title', 'tip'],
+                                              ['s', label.identifier, 'color', 'red'],
+                                              ['t', label.identifier, u'changed è']]))
+
+        del label.attributes['title']
+        del label.style['color']
+        self.app.do_gui_update()
+        self.assertEqual(sorted(json.loads(self.ws.messages[1][1:])), sorted([['d', label.identifier, 'title'],
+                                                                           ['s', label.identifier, 'color', None]]))
+
+    def test_patch_children(self):
+        container = self.app.labels[0].get_parent()
+        container.remove_child(self.app.labels[1])
+        new_label = gui.Label('new')
+        container.append(new_label)
+        self.app.labels[2].set_text('changed 2')
+        self.app.do_gui_update()
+        self.assertEqual(len(self.ws.messages), 1)
+        ops = json.loads(self.ws.messages[0][1:])
+        # the patch of the container precedes the ones of its children
+        self.assertEqual(ops[0], ['r', container.identifier, self.app.labels[1].identifier])
+        # the new child is inserted after its previous sibling
+        self.assertEqual(ops[1][:3], ['i', container.identifier, self.app.labels[2].identifier])
+        self.assertEqual(ops[1][3], new_label.repr())
+        self.assertEqual(ops[2], ['t', self.app.labels[2].identifier, 'changed 2'])
+
+    def test_patch_and_update(self):
+        self.app.labels[0].set_text('changed 0')
+        self.set_bold_text(self.app.labels[1], 'changed 1')
+        self.app.do_gui_update()
+        self.assertEqual([message[0] for message in self.ws.messages], [server._MSG_PATCH, server._MSG_UPDATE])
+
+    def test_patch_move(self):
+        container = self.app.labels[0].get_parent()
+        container.remove_child(self.app.labels[0])
+        container.append(self.app.labels[0])
+        self.app.do_gui_update()
+        ops = json.loads(self.ws.messages[0][1:])
+        self.assertEqual(ops[0], ['r', container.identifier, self.app.labels[0].identifier])
+        self.assertEqual(ops[1], ['i', container.identifier, self.app.labels[2].identifier,
+                                  self.app.labels[0].repr()])
+
+    def test_patch_first_child(self):
+        container = self.app.labels[0].get_parent()
+        container.empty()
+        first = gui.Label('first')
+        container.append(first)
+        self.app.do_gui_update()
+        ops = json.loads(self.ws.messages[0][1:])
+        self.assertEqual([op[0] for op in ops], ['r', 'r', 'r', 'i'])
+        self.assertEqual(ops[3], ['i', container.identifier, None, first.repr()])
+
+    def test_patch_move_between_containers(self):
+        container = self.app.labels[0].get_parent()
+        inner = gui.VBox(children=[gui.Label('inner')])
+        moved = gui.Label('moved')
+        inner.append(moved)
+        container.append(inner)
+        self.app.do_gui_update()
+        inner.remove_child(moved)
+        container.append(moved)
+        container.append(gui.Label('last'))
+        self.app.do_gui_update()
+        ops = json.loads(self.ws.messages[-1][1:])
+        # whatever the order of the containers, the moved child is removed before being inserted
+        self.assertEqual([op[0] for op in ops], ['r', 'i', 'i'])
+        self.assertEqual(ops[0], ['r', inner.identifier, moved.identifier])
+
+    def test_patch_move_out_of_replaced_container(self):
+        container = self.app.labels[0].get_parent()
+        inner = gui.VBox(children=[gui.Label('inner')])
+        moved = gui.Label('moved')
+        inner.append(moved)
+        container.append(inner)
+        self.app.do_gui_update()
+        messages = len(self.ws.messages)
+        inner.remove_child(moved)
+        container.append(moved)
+        inner.add_child('text', 'replaced')
+        last = gui.Label('last')
+        container.append(last)
+        self.app.do_gui_update()
+        self.assertEqual([message[0] for message in self.ws.messages[messages:]],
+                         [server._MSG_PATCH, server._MSG_UPDATE])
+        # the stale copy of the moved child stays in the container until its update, the client
+        # inserts after the previous sibling only among the children of the patched container
+        ops = json.loads(self.ws.messages[messages][1:])
+        self.assertEqual(ops[-1], ['i', container.identifier, moved.identifier, last.repr()])
+        update = self.ws.messages[messages + 1]
+        self.assertTrue(update.startswith(server._MSG_UPDATE + inner.identifier + ','))
+        self.assertNotIn(moved.identifier, update)
+
+    def test_patch_inserted_subtree(self):
+        container = self.app.labels[0].get_parent()
+        inner = gui.VBox(children=[gui.Label('inner')])
+        container.append(inner)
+        self.app.do_gui_update()
+        # the changes in the subtree of a child inserted again are part of its html
+        container.remove_child(inner)
+        inner.append(gui.Label('added'))
+        inner.children[inner._render_children_list[0]].set_text('changed')
+        container.append(inner)
+        self.app.do_gui_update()
+        ops = json.loads(self.ws.messages[-1][1:])
+        self.assertEqual([op[0] for op in ops], ['r', 'i'])
+        self.assertEqual(ops[1][3], inner.repr())
+
+    def test_patch_children_changed_directly(self):
+        # the changes not made by means of add_child and remove_child update the entire container
+        container = self.app.labels[0].get_parent()
+        container.children.pop(container._render_children_list.pop(0))
+        self.app.do_gui_update()
+        self.assertTrue(self.ws.messages[0].startswith(server._MSG_UPDATE + container.identifier + ','))
+
+
+class TestStreamingImage(unittest.TestCase):
+    class AppClass(server.App):
+        def main(self):
+            self.image = gui.StreamingImage()
+            return gui.VBox(children=[self.image])
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        mock_server = MockServer()
+        mock_server.multiple_instance = True
+        self.app = self.AppClass(MockRequest(), ('0.0.0.0', 8888), mock_server)
+        self.app.update_interval = 1
+        self.ws = MockWebSocket(server._PROTOCOL_NATIVE)
+        self.app.websockets.add(self.ws)
+
+    def tearDown(self):
+        self.app.on_close()
+
+    def wait_frames(self, count):
+        for i in range(200):
+            if len(self.ws.messages) >= count:
+                break
+            threading.Event().wait(0.01)
+        return self.ws.messages
+
+    def test_push_frame(self):
+        # the frames get encoded and sent while the update lock is held by another thread
+        with self.app.update_lock:
+            self.app.image.push_frame(b'frame data')
+            messages = self.wait_frames(1)
+        self.assertEqual(messages, [server.encode_image_frame_message(self.app.image.identifier, 'image/jpeg', b'frame data')])
+
+    def test_newest_frame(self):
+        encoding = threading.Event()
+        release = threading.Event()
+        image = self.app.image
+
+        def encode_frame(frame):
+            encoding.set()
+            release.wait(5)
+            return frame
+        image.encode_frame = encode_frame
+        image.push_frame(b'0')
+        encoding.wait(5)
+        # pushed while the first frame gets encoded, only the newest one is encoded then
+        for i in range(1, 5):
+            image.push_frame(b'%d' % i)
+        release.set()
+        messages = self.wait_frames(2)
+        self.assertEqual([m[-1:] for m in messages], [b'0', b'4'])
+        self.assertEqual((image.encoded_frames, image.dropped_frames), (2, 3))
+
+
+class TestImageEndpoint(unittest.TestCase):
+    class AppClass(server.App):
+        def main(self):
+            self.image = gui.Image('')
+            self.image.image_cache = gui.ImageEncodeCache(lambda image: image, 'image/test')
+            self.image.image_cache.set_image(b'encoded image')
+            self.image.get_image_data = lambda index=0: self.image.image_cache.response()
+            return self.image
+
+        def log_message(self, *args):
+            pass
+
+    def get(self, path, headers=''):
+        sock = socket.create_connection(('127.0.0.1', self.port))
+        sock.sendall(('GET %s HTTP/1.1\r\nHost: 127.0.0.1\r\n%s\r\n' % (path, headers)).encode())
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        sock.close()
+        return data
+
+    def test_etag(self):
+        s = server.Server(self.AppClass, start=False, address='127.0.0.1', port=0, start_browser=False,
+                          multiple_instance=True)
+        s.start()
+        try:
+            self.port = s._sserver.socket.getsockname()[1]
+            page = self.get('/').decode('utf-8')
+            image_id = re.search(r'<img[^>]*id="([^"]+)"', page).group(1)
+            cookie = 'Cookie: %s\r\n' % re.search(r'Set-Cookie: (remi_session=\d+)', page).group(1)
+            data = self.get('/%s/get_image_data' % image_id, cookie)
+            self.assertTrue(data.startswith(b'HTTP/1.0 200'))
+            self.assertTrue(data.endswith(b'\r\n\r\nencoded image'))
+            etag = re.search(r'ETag: (.+)\r\n', data.decode('utf-8')).group(1)
+            data = self.get('/%s/get_image_data' % image_id, cookie + 'If-None-Match: %s\r\n' % etag)
+            self.assertTrue(data.startswith(b'HTTP/1.0 304'))
+            self.assertTrue(data.endswith(b'\r\n\r\n'))
+            data = self.get('/%s/get_image_data' % image_id, cookie + 'If-None-Match: "other"\r\n')
+            self.assertTrue(data.startswith(b'HTTP/1.0 200'))
+        finally:
+            s.stop()
+
+
+class TestAppBatch(unittest.TestCase):
+    def setUp(self):
+        mock_server = MockServer()
+        mock_server.multiple_instance = True
+        self.app = TestAppGuiUpdate.AppClass(MockRequest(), ('0.0.0.0', 8888), mock_server)
+        # immediate updates, one per change outside of a batch
+        self.app.update_interval = 0
+        self.ws = MockWebSocket()
+        self.app.websockets.add(self.ws)
+
+    def tearDown(self):
+        self.app.on_close()
+
+    def test_app_batch(self):
+        with self.app.batch():
+            with self.app.batch():
+                self.app.labels[0].set_text('changed 0')
+            self.app.labels[1].set_text('changed 1')
+            self.app.labels[2].style['color'] = 'red'
+            self.assertEqual(self.ws.messages, [])
+        self.assertEqual(len(self.ws.messages), 1)
+        ops = json.loads(self.ws.messages[0][1:])
+        self.assertEqual(len(ops), 3)
+
+    def test_widget_batch(self):
+        container = self.app.labels[0].get_parent()
+        with container.batch():
+            container.append([gui.Label('new %s' % i) for i in range(3)])
+            self.app.labels[0].set_text('changed 0')
+            self.assertEqual(self.ws.messages, [])
+        self.assertEqual(len(self.ws.messages), 1)
+        self.assertEqual([op[0] for op in json.loads(self.ws.messages[0][1:])], ['i', 'i', 'i', 't'])
+
+    def test_batch_without_changes(self):
+        with self.app.labels[0].batch():
+            pass
+        with self.app.batch():
+            pass
+        self.assertEqual(self.ws.messages, [])
+
+    def test_batch_lock(self):
+        # the updates of other threads wait for the end of the batch
+        with self.app.labels[0].batch():
+            self.app.labels[0].set_text('changed')
+            thread = threading.Thread(target=self.app.do_gui_update)
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(self.ws.messages, [])
+        thread.join()
+        self.assertEqual(len(self.ws.messages), 1)
+
+
+class TestAsyncioBackend(unittest.TestCase):
+    class AppClass(server.App):
+        def main(self):
+            return gui.Label('asyncio backend label')
+
+        def log_message(self, *args):
+            pass
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            server.Server(self.AppClass, start=False, backend='gevent')
+
+    def test_get_page(self):
+        s = server.Server(self.AppClass, start=False, address='127.0.0.1', port=0, start_browser=False,
+                          multiple_instance=True, backend='asyncio', executor_max_workers=2)
+        s.start()
+        try:
+            port = s._sserver.socket.getsockname()[1]
+            sock = socket.create_connection(('127.0.0.1', port))
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n')
+            data = b''
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            sock.close()
+            self.assertTrue(data.startswith(b'HTTP/1.0 200'))
+            self.assertIn(b'asyncio backend label', data)
+        finally:
+            s.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
 #!/usr/bin/env python
 
+import os
+import json
+import shutil
+import tempfile
+import threading
 import unittest
 import remi.gui as gui
 try:
@@ -12,16 +17,201 @@ class TestTag(unittest.TestCase):
     def test_init(self):
         widget = gui.Tag()
         assertValidHTML(widget.repr())
-        
+
+    def test_dirty_subtree_repr(self):
+        leaves = [gui.Label('leaf %s' % i) for i in range(3)]
+        branches = [gui.VBox(children=[leaf]) for leaf in leaves]
+        root = gui.VBox(children=branches)
+        root.repr({})
+        for tag in [root] + branches + leaves:
+            self.assertFalse(tag._dirty)
+
+        leaves[1].set_text('changed')
+        self.assertTrue(leaves[1]._dirty and branches[1]._dirty and root._dirty)
+        self.assertFalse(branches[0]._dirty or branches[2]._dirty)
+
+        # the clean subtrees are not visited
+        visited = []
+        for branch in branches:
+            branch.repr = (lambda branch: lambda changed_widgets=None: visited.append(branch) or
+                           gui.Tag.repr(branch, changed_widgets))(branch)
+        changed_widgets = {}
+        html = root.repr(changed_widgets)
+        self.assertEqual(visited, [branches[1]])
+        self.assertEqual(list(changed_widgets.keys()), [leaves[1]])
+        self.assertIn('changed', html)
+        self.assertIn('leaf 0', html)
+        self.assertIn('leaf 2', html)
+
+    def test_dirty_with_refresh_disabled(self):
+        leaf = gui.Label('leaf')
+        root = gui.VBox(children=[gui.VBox(children=[leaf])])
+        root.repr({})
+        leaf.disable_refresh()
+        leaf.set_text('changed')
+        leaf.enable_refresh()
+        changed_widgets = {}
+        self.assertIn('changed', root.repr(changed_widgets))
+        self.assertEqual(list(changed_widgets.keys()), [leaf])
+
+    def test_incremental_repr(self):
+        def full_repr(tag):
+            if not isinstance(tag, gui.Tag):
+                return tag
+            return '<%s %s>%s</%s>' % (tag.type, tag._repr_attributes,
+                ''.join(full_repr(tag.children[k]) for k in tag._render_children_list), tag.type)
+
+        random = __import__('random').Random(0)
+        containers = [gui.VBox() for i in range(3)]
+        root = gui.VBox(children=containers)
+        labels = []
+        for step in range(300):
+            op = random.randrange(5)
+            container = random.choice(containers)
+            if op < 2 or not labels:
+                label = gui.Label('label %s' % step)
+                labels.append(label)
+                container.append(label)
+            elif op == 2:
+                label = labels.pop(random.randrange(len(labels)))
+                label.get_parent().remove_child(label)
+            elif op == 3:
+                random.choice(labels).set_text('text %s' % step)
+            else:
+                # moved to the end
+                label = random.choice(labels)
+                label.get_parent().remove_child(label)
+                container.append(label)
+            if random.randrange(3) == 0:
+                self.assertEqual(root.repr({}), full_repr(root))
+        self.assertEqual(root.repr({}), full_repr(root))
+
+    def test_move_into_sibling(self):
+        label = gui.Label('moved')
+        sibling = gui.VBox()
+        root = gui.VBox(children=[sibling, label])
+        root.repr({})
+        root.remove_child(label)
+        sibling.append(label)
+        label.style['color'] = 'red'
+        html = root.repr({})
+        self.assertEqual(html.count('moved'), 1)
+        self.assertIn(label.repr(), sibling.repr())
+        self.assertIn(sibling.repr(), html)
+
+    def test_add_child_again(self):
+        labels = [gui.Label('label %s' % i) for i in range(3)]
+        root = gui.VBox(children=labels)
+        root.repr({})
+        # the same child added again under its key is moved to the end
+        root.append(labels[0])
+        changed_widgets = {}
+        html = root.repr(changed_widgets)
+        self.assertLess(html.index('label 2'), html.index('label 0'))
+        self.assertEqual([op[0] for op in changed_widgets[root]], ['r', 'i'])
+        root.add_child('text', 'text')
+        root.append(labels[1])
+        root.repr({})
+        root.add_child('text', 'text')
+        html = root.repr({})
+        self.assertLess(html.index('label 1'), html.index('text'))
+        # already the last child, nothing changes
+        root.add_child('text', 'text')
+        self.assertFalse(root._dirty)
+
+    def test_lazy_attributes_repr(self):
+        widget = gui.Widget()
+        widget.repr()
+        widget.style['color'] = 'red'
+        widget.attributes['title'] = 'a title'
+        # serialized when represented
+        self.assertIsNone(widget._attributes_repr)
+        html = widget.repr()
+        self.assertIn('color:red', html)
+        self.assertIn('title="a title"', html)
+        widget.add_child('child', 'text')
+        self.assertIsNotNone(widget._attributes_repr)
+        del widget.style['color']
+        self.assertNotIn('color:red', widget.repr())
+
+    def test_render_children_list(self):
+        keys = gui._RenderChildrenList(['a', 'b', 'c', 'd'])
+        keys.remove('b')
+        self.assertEqual(list(keys), ['a', 'c', 'd'])
+        self.assertEqual((len(keys), keys[1], keys[-1], keys.index('d')), (3, 'c', 'd', 2))
+        self.assertFalse('b' in keys)
+        keys.append('a')
+        keys.remove('d')
+        self.assertEqual((list(keys), keys[-1]), (['c', 'a'], 'a'))
+        self.assertEqual(keys.pop(0), 'c')
+        self.assertRaises(ValueError, keys.remove, 'c')
+        self.assertEqual(list(keys), ['a'])
+
+    def test_remove_child(self):
+        labels = [gui.Label('label %s' % i) for i in range(4)]
+        root = gui.VBox(children=labels)
+        root.remove_child(labels[1])
+        self.assertEqual([root.children[key] for key in root._render_children_list], [labels[0], labels[2], labels[3]])
+        # a widget that is not a child
+        root.remove_child(labels[1])
+        root.remove_child(gui.Label('other'))
+        self.assertEqual(len(root.children), 3)
+        # the children changed directly are found as well
+        key = root._render_children_list[0]
+        root.children['other'] = root.children.pop(key)
+        root._render_children_list.remove(key)
+        root._render_children_list.append('other')
+        root.remove_child(labels[0])
+        self.assertEqual([root.children[key] for key in root._render_children_list], [labels[2], labels[3]])
+        root.empty()
+        self.assertEqual((len(root.children), len(root._render_children_list)), (0, 0))
+
 class TestWidget(unittest.TestCase):
     def test_init(self):
         widget = gui.Widget()
         assertValidHTML(widget.repr())
+
+    def test_event_connectors(self):
+        class MyButton(gui.Button):
+            @gui.decorate_event
+            def onclick(self):
+                return super(MyButton, self).onclick()
+
+        widget = MyButton('button')
+        self.assertNotIn('onclick', widget.__dict__)
+        self.assertTrue(hasattr(MyButton.onclick, '__is_event'))
+        self.assertIsInstance(widget.onclick, gui.ClassEventConnector)
+        self.assertIs(widget.onclick, widget.onclick)
+        self.assertIsNone(widget.onclick._event_info)
+        self.assertEqual(widget.onmousedown._event_info['name'], 'onmousedown')
+
+        clicks = []
+        widget.onclick.connect(lambda emitter: clicks.append(emitter))
+        widget.onclick()
+        self.assertEqual(clicks, [widget])
+
+        other = gui.Button('other')
+        self.assertNotIn('onclick', other.__dict__)
+        other.onclick.do(None)
+        self.assertIn('onclick', other.attributes)
         
 class TestHTML(unittest.TestCase):
     def test_init(self):
         widget = gui.HTML()
         assertValidHTML(widget.repr())
+
+    def test_iter_repr(self):
+        widget = gui.HTML()
+        body = gui.BODY()
+        widget.add_child('head', gui.HEAD(title="my remi app"))
+        widget.add_child('body', body)
+        label = gui.Label('first')
+        body.append(gui.VBox(children=[label]))
+        chunks = list(widget.iter_repr())
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual(''.join(chunks), widget.repr())
+        label.set_text('second')
+        self.assertIn('second', ''.join(widget.iter_repr()))
         
 class TestHEAD(unittest.TestCase):
     def test_init(self):
@@ -65,6 +255,18 @@ class TestTabBox(unittest.TestCase):
         w.add_tab(l, key='testtabbox', callback=None) 
         self.assertIn('testTabBox_label',w.repr())
         assertValidHTML(w.repr())
+
+    def test_remove_child(self):
+        w = gui.TabBox()
+        labels = [gui.Label('label %s' % i) for i in range(3)]
+        for i, l in enumerate(labels):
+            w.append(l, 'tab %s' % i)
+        w.remove_child(labels[1])
+        self.assertEqual(list(w.tab_keys_ordered_list), ['tab 0', 'tab 2'])
+        self.assertNotIn('tab 1', w.container_tab_titles.children)
+        w.select_by_widget(labels[2])
+        w.select_by_index(0)
+        self.assertEqual(w.selected_widget_key, 'tab 0')
         
         
 class TestButton(unittest.TestCase):
@@ -145,7 +347,86 @@ class TestListView(unittest.TestCase):
     def test_init(self):
         widget = gui.ListView()
         assertValidHTML(widget.repr())
-        
+
+    def test_selection(self):
+        widget = gui.ListView.new_from_list(['item %s' % i for i in range(100)])
+        keys = []
+        widget.onselection.do(lambda emitter, key: keys.append(key))
+        item = widget.children[widget._render_children_list[10]]
+        widget.onselection(item)
+        self.assertEqual(keys, [widget._child_key(item)])
+        self.assertEqual(widget.get_value(), 'item 10')
+        widget.select_by_value('item 20')
+        self.assertEqual(widget.get_value(), 'item 20')
+        self.assertFalse(item.attributes['selected'])
+        self.assertTrue(widget.get_item().attributes['selected'])
+        # the index follows the changes of the items
+        widget.get_item().set_text('renamed')
+        widget.select_by_value('item 20')
+        self.assertIsNone(widget.get_item())
+        widget.select_by_value('renamed')
+        self.assertEqual(widget.get_key(), widget._child_key(widget.children[widget._render_children_list[20]]))
+        widget.remove_child(widget.get_item())
+        widget.select_by_value('renamed')
+        self.assertIsNone(widget.get_key())
+        widget.append('item 30', 'last')
+        # the last item with the value is selected
+        widget.select_by_value('item 30')
+        self.assertEqual(widget.get_key(), 'last')
+
+    def test_select_added_child(self):
+        widget = gui.ListView.new_from_list(['a', 'b'])
+        widget.select_by_value('a')
+        widget.add_child('k', gui.ListItem('c'))
+        widget.select_by_value('c')
+        self.assertEqual(widget.get_key(), 'k')
+        # the children dictionary changed directly, the index is built again
+        widget.children['direct'] = gui.ListItem('d')
+        widget.select_by_value('d')
+        self.assertEqual(widget.get_key(), 'direct')
+
+class TestVirtualListView(unittest.TestCase):
+    def test_init(self):
+        widget = gui.VirtualListView.new_from_list(['item %s' % i for i in range(10000)], height=240, overscan=5)
+        html = widget.repr()
+        assertValidHTML(html)
+        # 10 visible rows and 5 below
+        self.assertEqual(widget._window, (0, 15))
+        self.assertIn('item 14<', html)
+        self.assertNotIn('item 15<', html)
+
+    def test_scroll(self):
+        widget = gui.VirtualListView.new_from_list(['item %s' % i for i in range(10000)], height=240, overscan=5)
+        widget.repr()
+        widget.onscroll('2400', '480')
+        self.assertEqual(widget._window, (95, 125))
+        html = widget.repr()
+        self.assertIn('item 95<', html)
+        self.assertIn('height:%spx' % (95 * 24), html)
+        # scrolled to the end
+        widget.onscroll('1000000', '480')
+        self.assertEqual(widget._window, (9975, 10000))
+
+    def test_selection(self):
+        fetched = []
+        def data(start, stop):
+            fetched.append((start, stop))
+            return ['row %s' % i for i in range(start, stop)]
+        widget = gui.VirtualListView(data, length=1000, height=240)
+        widget.onscroll('240', '240')
+        keys = []
+        widget.onselection.do(lambda emitter, key: keys.append(key))
+        widget.onselection(widget.get_child('row2'))
+        self.assertEqual(keys, [2])
+        self.assertEqual((widget.get_key(), widget.get_value()), (2, 'row 2'))
+        self.assertEqual(widget.get_item().attributes['selected'], True)
+        widget.select_by_value('row 500')
+        self.assertEqual(widget.get_key(), 500)
+        self.assertIsNone(widget.get_item())
+        widget.select_by_key(1000)
+        self.assertIsNone(widget.get_key())
+        self.assertTrue(all(stop - start <= 1000 for start, stop in fetched))
+
 class TestListItem(unittest.TestCase):
     def test_init(self):
         widget = gui.ListItem('test list item')
@@ -158,6 +439,31 @@ class TestDropDown(unittest.TestCase):
         widget.append('test drop down')
         self.assertIn('test drop down', widget.repr())
         assertValidHTML(widget.repr())
+
+    def test_select_by_value(self):
+        widget = gui.DropDown.new_from_list(['item %s' % i for i in range(100)])
+        self.assertEqual(widget.get_value(), 'item 99')
+        widget.onchange('item 5')
+        self.assertEqual(widget.get_value(), 'item 5')
+        self.assertEqual([item.value for item in widget.children.values() if 'selected' in item.attributes], ['item 5'])
+        widget.get_item().value = 'five'
+        widget.select_by_value('five')
+        self.assertEqual(widget.get_item().get_text(), 'item 5')
+        widget.select_by_value('item 5')
+        self.assertIsNone(widget.get_item())
+        self.assertEqual([item for item in widget.children.values() if 'selected' in item.attributes], [])
+
+    def test_select_added_child(self):
+        widget = gui.DropDown.new_from_list(['a', 'b'])
+        widget.select_by_value('a')
+        widget.add_child('k', gui.DropDownItem('c'))
+        widget.select_by_value('c')
+        self.assertEqual(widget.get_key(), 'k')
+        widget.add_child('k', gui.DropDownItem('e'))
+        widget.select_by_value('e')
+        self.assertEqual(widget.get_value(), 'e')
+        widget.select_by_value('c')
+        self.assertIsNone(widget.get_key())
         
 class TestDropDownItem(unittest.TestCase):
     def test_init(self):
@@ -170,6 +476,55 @@ class TestImage(unittest.TestCase):
         widget = gui.Image('http://placekitten.com/200/200')
         assertValidHTML(widget.repr())
         
+class TestStreamingImage(unittest.TestCase):
+    def test_init(self):
+        widget = gui.StreamingImage(image_format='webp', quality=60)
+        assertValidHTML(widget.repr())
+        self.assertEqual(widget.encode_frame(bytearray(b'frame')), b'frame')
+        # not shown, the frame gets encoded anyway
+        sent = []
+        encoded = threading.Event()
+        widget._send_frame = lambda data: sent.append(data) or encoded.set()
+        widget.push_frame(b'frame')
+        self.assertTrue(encoded.wait(5))
+        self.assertEqual((sent, widget.encoded_frames), ([b'frame'], 1))
+
+class TestImageEncodeCache(unittest.TestCase):
+    def test_versions(self):
+        cache = gui.ImageEncodeCache(lambda image: image.upper(), 'image/test')
+        self.assertEqual(cache.response(), [None, None])
+        cache.set_image(b'first')
+        content, headers = cache.response()
+        self.assertEqual(content(), b'FIRST')
+        self.assertEqual(headers['Content-type'], 'image/test')
+        self.assertEqual(headers['ETag'], cache.get_etag())
+        # the same version is encoded once
+        self.assertEqual(cache.response()[0](), b'FIRST')
+        self.assertEqual(cache.encodings, 1)
+        cache.set_image(b'second')
+        content, second_headers = cache.response()
+        self.assertNotEqual(second_headers['ETag'], headers['ETag'])
+        self.assertEqual(content(), b'SECOND')
+        self.assertEqual(cache.encodings, 2)
+
+    def test_concurrent_requests(self):
+        release = threading.Event()
+
+        def encode(image):
+            release.wait(5)
+            return image
+        cache = gui.ImageEncodeCache(encode)
+        cache.set_image(b'image')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.response()[0]())) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [b'image'] * 4)
+        self.assertEqual(cache.encodings, 1)
+
 class TestTable(unittest.TestCase):
     def test_init(self):
         widget = gui.Table()
@@ -179,7 +534,101 @@ class TestTableWidget(unittest.TestCase):
     def test_init(self):
         widget = gui.TableWidget(2, 3, use_title=True, editable=False)
         assertValidHTML(widget.repr())
+
+    def test_item_coords(self):
+        widget = gui.TableWidget(10, 4, use_title=True, editable=True)
+        self.assertEqual(widget.item_coords(widget.item_at(7, 2)), (7, 2))
+        # the title cells are replaced by _update_first_row
+        self.assertEqual(widget.item_coords(widget.item_at(0, 3)), (0, 3))
+        item = widget.item_at(9, 3)
+        widget.set_row_count(5)
+        self.assertIsNone(widget.item_coords(item))
+        widget.set_column_count(6)
+        self.assertEqual(widget.item_coords(widget.item_at(4, 5)), (4, 5))
+        self.assertIsNone(widget.item_coords(gui.TableItem()))
         
+class TestDataTable(unittest.TestCase):
+    def setUp(self):
+        self.names = ['name %s' % (i * 7 % 100) for i in range(100)]
+        self.values = __import__('array').array('d', [i * 0.5 for i in range(100)])
+        self.widget = gui.DataTable([list(range(100)), self.names, self.values], titles=['id', 'name', 'value'],
+                                    page_size=10, editable=True)
+
+    def shown(self, column, widget=None):
+        widget = widget or self.widget
+        return [row.children[str(column)].get_text() for row in widget._rows if row._data_row is not None]
+
+    def test_init(self):
+        assertValidHTML(self.widget.repr())
+        self.assertEqual((self.widget.row_count, self.widget.page_count), (100, 10))
+        # only the page is represented
+        self.assertEqual(len(self.widget._rows), 10)
+        self.assertEqual(self.shown(0), [str(i) for i in range(10)])
+
+    def test_paging(self):
+        self.widget.next_page()
+        self.assertEqual(self.shown(0)[0], '10')
+        self.widget.set_page(100)
+        self.assertEqual(self.widget.page, 9)
+        self.assertEqual(self.shown(0)[-1], '99')
+
+    def test_sort(self):
+        self.widget.sort_by(1)
+        self.assertEqual(self.shown(1), sorted(self.names)[:10])
+        permutation = self.widget._sort_cache[1]
+        self.widget.sort_by(1, reverse=True)
+        self.assertIs(self.widget._sort_cache[1], permutation)
+        self.assertEqual(self.shown(1), sorted(self.names, reverse=True)[:10])
+        self.widget.on_column_title_click(2)
+        self.widget.on_column_title_click(2)
+        self.assertEqual(self.shown(2)[0], '49.5')
+
+    def test_sort_none_and_mixed_types(self):
+        widget = gui.DataTable([[3, None, 'b', 1.5, None, 'a']], page_size=10)
+        widget.sort_by(0)
+        self.assertEqual(self.shown(0, widget), ['None', 'None', '1.5', '3', 'a', 'b'])
+
+    def test_filter_refined(self):
+        self.widget.set_filter('name 1')
+        rows = self.widget._get_view()
+        self.assertEqual(len(rows), 11)
+        self.widget.set_filter('name 1', columns=[1])
+        self.widget.set_filter('name 19', columns=[1])
+        self.assertEqual([self.names[row] for row in self.widget._get_view()], ['name 19'])
+        # the extended text searches only the rows of the longest cached prefix
+        self.widget._filter_cache[('name 1', (1,))] = [row for row in rows if self.names[row] != 'name 18']
+        self.widget.set_filter('name 18', columns=[1])
+        self.assertEqual(self.widget._get_view(), [])
+        self.widget.set_filter('name 18')
+        self.assertEqual(len(self.widget._get_view()), 1)
+
+    def test_filter(self):
+        self.widget.set_filter('NAME 1')
+        self.assertEqual(len(self.widget._get_view()), 11)
+        self.assertEqual(self.widget.page_count, 2)
+        self.assertTrue(all(text.startswith('name 1') for text in self.shown(1)))
+        self.widget.sort_by(0, True)
+        last = max(i for i, name in enumerate(self.names) if name.startswith('name 1'))
+        self.assertEqual(self.shown(0)[0], str(last))
+        self.widget.set_filter('1', columns=[0])
+        self.assertEqual(len(self.widget._get_view()), 19)
+        self.widget.set_filter('not found')
+        self.assertEqual(self.shown(0), [])
+
+    def test_edit(self):
+        changes = []
+        self.widget.on_item_changed.do(lambda emitter, item, value, row, column: changes.append((value, row, column)))
+        self.widget.sort_by(0, True)
+        item = self.widget._rows[0].children['2']
+        self.assertEqual(self.widget.item_coords(item), (99, 2))
+        item.onchange(item, '1.25')
+        self.assertEqual(changes, [('1.25', 99, 2)])
+        self.assertEqual(self.values[99], 1.25)
+        # not a number, the value is restored
+        item.onchange(item, 'text')
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(item.get_text(), '1.25')
+
 class TestTableRow(unittest.TestCase):
     def test_init(self):
         widget = gui.TableRow()
@@ -253,6 +702,73 @@ class TestFileFolderNavigator(unittest.TestCase):
                                          allow_file_selection=True, 
                                          allow_folder_selection=True)
         assertValidHTML(widget.repr())
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for name in ('b.txt', 'A.txt', '.c.txt', 'sub', 'Dir'):
+            path = os.path.join(self.folder, name)
+            if name in ('sub', 'Dir'):
+                os.mkdir(path)
+            else:
+                open(path, 'w').close()
+        for i in range(25):
+            open(os.path.join(self.folder, 'sub', 'file %02d' % i), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def names(self, widget):
+        return [item.get_text() for item in widget.folderItems]
+
+    def test_listing(self):
+        cwd = os.getcwd()
+        widget = gui.FileFolderNavigator(selection_folder=self.folder)
+        self.assertEqual(self.names(widget), ['Dir', 'sub', 'A.txt', 'b.txt', '.c.txt'])
+        self.assertEqual(os.getcwd(), cwd)
+        # the listings are cached until the directory changes
+        entries = gui.FileFolderNavigator._list_directory(self.folder)
+        self.assertIs(gui.FileFolderNavigator._list_directory(self.folder), entries)
+        open(os.path.join(self.folder, 'd.txt'), 'w').close()
+        os.utime(self.folder, (0, 0))
+        self.assertIn(('d.txt', False), gui.FileFolderNavigator._list_directory(self.folder))
+
+    def test_navigation(self):
+        widget = gui.FileFolderNavigator(selection_folder=self.folder, page_size=10, allow_file_selection=False)
+        self.assertEqual(self.names(widget), ['Dir', 'sub'])
+        widget.on_folder_item_click(widget.folderItems[0])
+        self.assertEqual(widget.pathEditor.get_text(), os.path.join(self.folder, 'Dir'))
+        widget.dir_go_back(None)
+        self.assertEqual(widget.currDir, self.folder)
+        widget.allow_file_selection = True
+        widget.chdir(os.path.join(self.folder, 'sub'))
+        # a page and the item that shows the next one
+        self.assertEqual(len(widget.folderItems), 10)
+        self.assertIn('15 more', widget.repr())
+        widget.append_page()
+        widget.append_page()
+        self.assertEqual(self.names(widget)[-1], 'file 24')
+        self.assertNotIn('more', widget.repr())
+        widget.on_folder_item_selected(widget.folderItems[3])
+        self.assertEqual(widget.get_selection_list(), [os.path.join(self.folder, 'sub', 'file 03')])
+
+    def test_background_listing(self):
+        widget = gui.FileFolderNavigator(selection_folder=self.folder)
+        release = threading.Event()
+        list_directory = widget._list_directory
+        widget._list_directory = lambda directory: release.wait() and list_directory(directory)
+        shown = threading.Event()
+        show_background_listing = widget._show_background_listing
+        def show_and_notify(*args):
+            show_background_listing(*args)
+            shown.set()
+        widget._show_background_listing = show_and_notify
+        widget.LISTING_TIMEOUT = 0
+        widget.chdir(os.path.join(self.folder, 'sub'))
+        self.assertEqual(widget.folderItems, [])
+        self.assertIn('listing', widget.repr())
+        release.set()
+        self.assertTrue(shown.wait(5))
+        self.assertEqual(len(widget.folderItems), 25)
         
 class TestFileFolderItem(unittest.TestCase):
     def test_init(self):
@@ -286,7 +802,70 @@ class TestTreeView(unittest.TestCase):
     def test_init(self):
         widget = gui.TreeView()
         assertValidHTML(widget.repr())
-        
+
+    def test_lazy_loading(self):
+        loaded = []
+        def loader(item):
+            loaded.append(item.get_text())
+            return [gui.TreeItem('%s.%s' % (item.get_text(), i), has_children=True) for i in range(3)]
+        widget = gui.TreeView(loader=loader)
+        item = gui.TreeItem('1', has_children=True)
+        widget.append(item)
+        html = widget.repr()
+        assertValidHTML(html)
+        self.assertIn('has-subtree="true"', html)
+        self.assertEqual(loaded, [])
+        item.onclick()
+        self.assertEqual(loaded, ['1'])
+        self.assertIn('1.2<', widget.repr())
+        # the loader of the tree is used by the nested items
+        item.sub_container.children[item.sub_container._render_children_list[2]].onclick()
+        self.assertEqual(loaded, ['1', '1.2'])
+        item.onclick()
+        item.onclick()
+        self.assertEqual(loaded, ['1', '1.2'])
+
+    def test_paging(self):
+        consumed = []
+        def items():
+            for i in range(250):
+                consumed.append(i)
+                yield 'item %s' % i
+        widget = gui.TreeView()
+        widget.append_items(items(), page_size=100)
+        # the page and the item that loads the next one
+        self.assertEqual(len(widget.children), 101)
+        self.assertEqual(len(consumed), 101)
+        self.assertIn('TreeItemMore', widget.repr())
+        widget._more_item.onclick()
+        self.assertEqual(len(widget.children), 201)
+        widget._more_item.onclick()
+        self.assertEqual(len(widget.children), 250)
+        self.assertEqual([widget.children[k].get_text() for k in widget._render_children_list][-2:],
+            ['item 248', 'item 249'])
+        self.assertNotIn('TreeItemMore', widget.repr())
+
+    def test_eviction(self):
+        loaded = []
+        def loader(item):
+            loaded.append(item.get_text())
+            return ['child %s' % i for i in range(10)]
+        widget = gui.TreeView(loader=loader, evict_timeout=60)
+        items = [gui.TreeItem('item %s' % i, has_children=True) for i in range(2)]
+        widget.append(items)
+        items[0].onclick()
+        items[0].onclick()
+        items[1].onclick()
+        # collapsed, not yet evicted
+        self.assertIsNotNone(items[0].sub_container)
+        self.assertEqual(widget.evict_collapsed(0), 1)
+        self.assertIsNone(items[0].sub_container)
+        self.assertIsNotNone(items[1].sub_container)
+        self.assertEqual(items[0].attributes['has-subtree'], 'true')
+        items[0].onclick()
+        self.assertEqual(loaded, ['item 0', 'item 1', 'item 0'])
+        self.assertIn('child 9<', items[0].repr())
+
 class TestTreeItem(unittest.TestCase):
     def test_init(self):
         widget = gui.TreeItem('test tree item')
@@ -358,7 +937,42 @@ class TestSvgPolyline(unittest.TestCase):
     def test_init(self):
         widget = gui.SvgPolyline()
         assertValidHTML(widget.repr())
-        
+
+    def test_add_coord(self):
+        widget = gui.SvgPolyline(3)
+        for i in range(5):
+            widget.add_coord(i, i * 2)
+        self.assertIn('points="2.0,4.0 3.0,6.0 4.0,8.0"', widget.repr())
+        self.assertEqual((list(widget.coordsX), widget.coordsY[-1]), ([2, 3, 4], 8))
+        widget.add_coords([5, 6], [10, 12])
+        self.assertIn('points="4.0,8.0 5.0,10.0 6.0,12.0"', widget.repr())
+        # the points are serialized once per repr
+        serialized = []
+        str_points = gui._SvgPoints.__str__
+        gui._SvgPoints.__str__ = lambda points: serialized.append(points._text is None) or str_points(points)
+        try:
+            for i in range(100):
+                widget.add_coord(i, i)
+            self.assertEqual(serialized, [])
+            changed_widgets = {}
+            widget.repr(changed_widgets)
+            self.assertEqual(changed_widgets[widget], [('a', widget.identifier, 'points', '97.0,97.0 98.0,98.0 99.0,99.0')])
+        finally:
+            gui._SvgPoints.__str__ = str_points
+        self.assertEqual(serialized.count(True), 1)
+
+    def test_maxlen(self):
+        widget = gui.SvgPolyline(0)
+        for i in range(4):
+            widget.add_coord(10 + i, 10)
+        # the last points are kept, as many as the new maxlen
+        widget.maxlen = 6
+        self.assertIn('points="10.0,10.0 11.0,10.0 12.0,10.0 13.0,10.0"', widget.repr())
+        widget.maxlen = 3
+        self.assertIn('points="11.0,10.0 12.0,10.0 13.0,10.0"', widget.repr())
+        widget.add_coord(14, 10)
+        self.assertIn('points="12.0,10.0 13.0,10.0 14.0,10.0"', widget.repr())
+
 class TestSvgPolygon(unittest.TestCase):
     def test_init(self):
         widget = gui.SvgPolygon()
@@ -374,6 +988,93 @@ class TestSvgPath(unittest.TestCase):
         widget = gui.SvgPath(path_value='M 10 10 L 20 20 Z')
         assertValidHTML(widget.repr())
 
+class TestTimeSeriesChart(unittest.TestCase):
+    def chart_data(self, widget, key):
+        return json.loads(gui.unescape(str(widget.attributes[key])))
+
+    def test_init(self):
+        widget = gui.TimeSeriesChart(width=200)
+        widget.add_series('a')
+        assertValidHTML(widget.repr())
+        self.assertEqual(widget.buckets, 200)
+
+    def test_decimate(self):
+        widget = gui.TimeSeriesChart(capacity=5000)
+        widget.add_series('a')
+        xs = [i * 0.01 for i in range(20000)]
+        widget.add_samples('a', xs, [(i * 7919) % 1000 for i in range(20000)])
+        series = widget.series['a']
+        self.assertEqual(list(series.xs), xs[-5000:])
+        for x0, bucket_width, buckets in ((150.0, 0.25, 200), (151.3, 0.017, 100), (0.0, 1.0, 300)):
+            lows, highs = {}, {}
+            for x, y in zip(series.xs, series.ys):
+                index = int((x - x0) // bucket_width)
+                if 0 <= index < buckets:
+                    lows[index] = min(lows.get(index, y), y)
+                    highs[index] = max(highs.get(index, y), y)
+            expected = []
+            for index in sorted(lows):
+                center = x0 + (index + 0.5) * bucket_width
+                expected.extend((center, lows[index]) if lows[index] == highs[index] else
+                                (center, lows[index], center, highs[index]))
+            # the summary gives the same buckets as the samples
+            self.assertEqual(series.decimate(x0, bucket_width, buckets), expected)
+
+    def test_append(self):
+        widget = gui.TimeSeriesChart(span=1.0, width=10)
+        widget.add_series('a')
+        widget.add_series('b')
+        widget.repr({})
+        view = self.chart_data(widget, 'data-view')
+        self.assertEqual((view['follow'], view['x'], [s['p'] for s in view['series']]), (1, [-1.0, 0.0], [[], []]))
+
+        # the buckets of 0.1 get sent once complete
+        widget.add_samples('a', [0.0, 0.05, 0.1, 0.15], [1, 2, 3, 4])
+        widget.add_samples('b', [0.0, 0.12], [5, 6])
+        changed_widgets = {}
+        widget.repr(changed_widgets)
+        self.assertEqual([op[2] for op in changed_widgets[widget]], ['data-append'])
+        append = self.chart_data(widget, 'data-append')
+        self.assertEqual((append['view'], append['seq']), (view['seq'], view['append'] + 1))
+        self.assertEqual(append['p'], [[0.05, 1, 0.05, 2], [0.05, 5]])
+        self.assertAlmostEqual(append['x'][1], 0.1)
+
+        # a new view resets the data appended
+        widget.add_sample('a', 0.21, 7)
+        widget.set_range(0.0, 0.2)
+        changed_widgets = {}
+        widget.repr(changed_widgets)
+        self.assertIn('data-view', [op[2] for op in changed_widgets[widget]])
+        view = self.chart_data(widget, 'data-view')
+        self.assertEqual((view['follow'], view['x'], view['series'][0]['p']), (0, [0.0, 0.2], [0.01, 1, 0.05, 2, 0.11, 3, 0.15, 4]))
+        self.assertEqual(self.chart_data(widget, 'data-append')['p'], [[], []])
+
+    def test_append_not_represented(self):
+        widget = gui.TimeSeriesChart(span=1.0, width=10)
+        widget.add_series('a')
+        widget.repr({})
+        view_seq = self.chart_data(widget, 'data-view')['seq']
+        # never represented, the points appended are limited to a view
+        for i in range(1000):
+            widget.add_sample('a', i * 0.1, i)
+            self.assertLessEqual(len(widget._appended[0]), 4 * widget.buckets)
+        widget.repr({})
+        view = self.chart_data(widget, 'data-view')
+        self.assertEqual(view['seq'], view_seq + 1)
+        self.assertGreater(view['x'][1], 99.0)
+
+    def test_onrangechange(self):
+        widget = gui.TimeSeriesChart(span=10.0)
+        widget.add_series('a')
+        widget.add_samples('a', range(100), range(100))
+        self.assertEqual(widget.onrangechange('20', '40', '0', '50'), (20.0, 40.0))
+        self.assertEqual(widget.buckets, 50)
+        # the range includes the latest sample, the chart follows
+        x0, x1 = widget.onrangechange('90', '100', '0', '50')
+        self.assertAlmostEqual(x1 - x0, 10.0)
+        self.assertEqual(self.chart_data(widget, 'data-view')['follow'], 1)
+
+
 
 if __name__ == '__main__':
     unittest.main()